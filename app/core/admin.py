@@ -1,3 +1,7 @@
 from django.contrib import admin
+from .models import RecomputeTask
 
-# Register your models here.
+@admin.register(RecomputeTask)
+class RecomputeTaskAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'key', 'created_at')
+    list_filter = ('kind',)
@@ -0,0 +1,39 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+
+class _Rollback(Exception):
+    pass
+
+
+class BenchmarkCommand(BaseCommand):
+    """
+    Base class for the bench_* management commands.
+
+    Subclasses implement run_benchmark(); everything it writes happens inside
+    one transaction that is rolled back, so benchmarks can run against a real
+    database without leaving seed data behind.
+    """
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run_benchmark(**options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def run_benchmark(self, **options):
+        raise NotImplementedError
+
+    def measure(self, label, func, repeat=5):
+        """Run func `repeat` times and report the best wall time in ms"""
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        self.stdout.write(f"{label:<48} {best * 1000:>10.2f} ms")
+        return best
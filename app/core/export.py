@@ -0,0 +1,106 @@
+"""
+Streaming data exports.
+
+Apps register a Dataset per exportable table (an ordered queryset and the
+columns to read from it) and the export view and the export_dataset
+command write it out. Rows are read with values_list().iterator(), so
+only one chunk of tuples is in memory at a time whatever the table size,
+and CSV output is produced as it is read: the header goes out before the
+first query runs.
+
+XLSX needs openpyxl, which is optional; without it only CSV is offered.
+"""
+import csv
+import io
+from importlib.util import find_spec
+from collections import namedtuple
+from datetime import datetime
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+
+# Rows fetched per round trip (server-side cursor on PostgreSQL)
+EXPORT_CHUNK_SIZE = 2000
+# CSV text is handed out in pieces of about this many characters
+CSV_BUFFER_SIZE = 64 * 1024
+
+XLSX_AVAILABLE = find_spec('openpyxl') is not None
+FORMATS = ('csv', 'xlsx') if XLSX_AVAILABLE else ('csv',)
+
+# columns: (header, lookup) pairs passed to values_list()
+Dataset = namedtuple('Dataset', ['name', 'queryset', 'columns'])
+
+_datasets = {}
+
+
+def register(dataset):
+    _datasets[dataset.name] = dataset
+
+
+def get_dataset(name):
+    """The registered Dataset called `name`; raises KeyError when unknown"""
+    return _datasets[name]
+
+
+def dataset_names():
+    return sorted(_datasets)
+
+
+def headers(dataset):
+    return [header for header, _ in dataset.columns]
+
+
+def iter_rows(dataset, chunk_size=EXPORT_CHUNK_SIZE):
+    lookups = [lookup for _, lookup in dataset.columns]
+    return dataset.queryset.values_list(*lookups).iterator(chunk_size=chunk_size)
+
+
+def iter_csv(dataset, chunk_size=EXPORT_CHUNK_SIZE, buffer_size=CSV_BUFFER_SIZE):
+    """
+    Yield the dataset as CSV text.
+
+    The header line is yielded on its own, then rows are written into a
+    small buffer that is emptied every `buffer_size` characters.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers(dataset))
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+
+    for row in iter_rows(dataset, chunk_size):
+        writer.writerow(row)
+        if buffer.tell() >= buffer_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _excel_value(value):
+    # Excel has no time zones: write aware datetimes in local time
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        return timezone.make_naive(value)
+    return value
+
+
+def write_xlsx(dataset, fileobj, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Write the dataset as an XLSX workbook to `fileobj`.
+
+    Uses openpyxl's write-only mode, which keeps rows out of memory once they are
+    appended. An XLSX file is a zip archive and cannot be sent before it
+    is complete, so callers write it to a file first.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ImproperlyConfigured("XLSX export requires openpyxl")
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(dataset.name[:31])
+    sheet.append(headers(dataset))
+    for row in iter_rows(dataset, chunk_size):
+        sheet.append([_excel_value(value) for value in row])
+    workbook.save(fileobj)
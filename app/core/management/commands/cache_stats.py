@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from core.versioned_cache import CacheStats, registered_caches
+
+
+class Command(BaseCommand):
+    help = "Hit and miss ratios of the versioned caches, summed over every process sharing the cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Zero the counters after printing them")
+
+    def handle(self, *args, reset, **options):
+        for versioned in registered_caches():
+            hits, misses = versioned.stats.shared()
+            self.stdout.write(
+                f"{versioned.namespace:<24} {hits:>10} hits {misses:>10} misses "
+                f"{CacheStats.ratio(hits, misses):>7.1%} hit ratio"
+            )
+            if reset:
+                versioned.stats.reset()
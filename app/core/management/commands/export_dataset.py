@@ -0,0 +1,35 @@
+import os
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from core import export
+
+
+class Command(BaseCommand):
+    help = "Write a registered export dataset as CSV (to stdout by default) or XLSX"
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=export.dataset_names())
+        parser.add_argument('--format', choices=export.FORMATS, default='csv')
+        parser.add_argument('--output', '-o', help="File to write; required for xlsx")
+        parser.add_argument('--chunk-size', type=int, default=export.EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, dataset, format, output, chunk_size, **options):
+        dataset = export.get_dataset(dataset)
+
+        if format == 'xlsx':
+            if not output:
+                raise CommandError("--output is required for xlsx")
+            try:
+                with open(output, 'wb') as fileobj:
+                    export.write_xlsx(dataset, fileobj, chunk_size=chunk_size)
+            except ImproperlyConfigured as exc:
+                os.remove(output)
+                raise CommandError(str(exc))
+            return
+
+        if output:
+            with open(output, 'w', newline='', encoding='utf-8') as fileobj:
+                fileobj.writelines(export.iter_csv(dataset, chunk_size=chunk_size))
+        else:
+            for piece in export.iter_csv(dataset, chunk_size=chunk_size):
+                self.stdout.write(piece, ending='')
@@ -0,0 +1,23 @@
+import time
+from django.core.management.base import BaseCommand
+from core.recompute import drain
+
+
+class Command(BaseCommand):
+    help = "Drain queued score recomputations (run once, or keep polling with --loop)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep polling the queue instead of exiting when it is empty")
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help="Seconds to sleep between polls in --loop mode")
+
+    def handle(self, *args, batch_size, loop, interval, **options):
+        while True:
+            processed = drain(batch_size=batch_size)
+            if processed:
+                self.stdout.write(f"Processed {processed} recompute tasks")
+            if not loop:
+                break
+            time.sleep(interval)
@@ -18,3 +18,22 @@ class TimeStampedModel(CreatedUpdatedModel, IsActiveModel):
     class Meta:
         abstract = True
 
+class RecomputeTask(models.Model):
+    """
+    A pending recomputation, collapsed to one row per (kind, key).
+
+    Rows are written by core.recompute.schedule() after the triggering
+    transaction commits and removed by the process_recompute_queue command.
+    """
+    kind = models.CharField(max_length=50)
+    key = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('kind', 'key')
+        ordering = ['created_at']
+        verbose_name = "Recompute Task"
+        verbose_name_plural = "Recompute Tasks"
+
+    def __str__(self):
+        return f"{self.kind}:{self.key}"
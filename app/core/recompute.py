@@ -0,0 +1,140 @@
+"""
+Deferred, de-duplicated recomputation queue.
+
+Apps register a handler per kind of derived data (supplier scores, product
+scores...) and call schedule(kind, key) from their signals. Keys are
+collected per transaction, written to RecomputeTask once the transaction
+commits and collapsed per (kind, key) by the table's unique constraint.
+The process_recompute_queue command drains them with drain().
+"""
+import logging
+import threading
+import weakref
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.timezone import now
+from .models import RecomputeTask
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+_local = threading.local()
+
+
+def register(kind, handler):
+    """handler(keys) recomputes everything for a list of string keys"""
+    _handlers[kind] = handler
+
+
+class _PendingBatch:
+    def __init__(self, using):
+        self.using = using
+        self.keys = set()
+        self.flushed = False
+
+    def flush(self):
+        self.flushed = True
+        _enqueue(self.keys, self.using)
+
+
+def _enqueue(keys, using):
+    # A key already queued gets a fresh created_at, so a drain() that claimed it
+    # earlier sees it changed again and leaves it queued
+    RecomputeTask.objects.using(using).bulk_create(
+        [RecomputeTask(kind=kind, key=key) for kind, key in sorted(keys)],
+        update_conflicts=True, unique_fields=['kind', 'key'], update_fields=['created_at'],
+    )
+
+
+def _pending_batch(using):
+    # Only on_commit holds the batch: a commit runs it and a rollback drops it,
+    # and either way the weak reference kept here dies with it
+    batches = _local.__dict__.setdefault('batches', {})
+    batch = batches[using]() if using in batches else None
+    if batch is None or batch.flushed:
+        batch = _PendingBatch(using)
+        batches[using] = weakref.ref(batch)
+        transaction.on_commit(batch.flush, using=using)
+    return batch
+
+
+def schedule(kind, key, using=DEFAULT_DB_ALIAS):
+    """Queue a recomputation of `key` once the current transaction commits"""
+    if getattr(_local, 'suppressed', 0):
+        return
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        _enqueue([(kind, str(key))], using)
+        return
+    _pending_batch(using).keys.add((kind, str(key)))
+
+
+class suppressed:
+    """Context manager that ignores schedule() calls, e.g. during bulk imports"""
+
+    def __enter__(self):
+        _local.suppressed = getattr(_local, 'suppressed', 0) + 1
+        return self
+
+    def __exit__(self, *exc_info):
+        _local.suppressed -= 1
+
+
+def _run(handler, keys, using):
+    """Keys whose recomputation failed; a failing batch is retried key by key"""
+    try:
+        with transaction.atomic(using=using):
+            handler(keys)
+        return set()
+    except Exception:
+        if len(keys) == 1:
+            logger.exception("Recompute failed for %s", keys[0])
+            return set(keys)
+    failed = set()
+    for key in keys:
+        failed |= _run(handler, [key], using)
+    return failed
+
+
+def drain(batch_size=100, using=DEFAULT_DB_ALIAS):
+    """
+    Run queued recomputations until the queue is empty.
+
+    Each batch is claimed with SELECT ... FOR UPDATE SKIP LOCKED (where the
+    backend supports it) so several workers can drain side by side. A
+    handler that raises does not stop the others: its keys are retried one
+    by one and the ones that still fail are logged and left in the queue
+    for the next drain(). A task scheduled again while its handler ran
+    (created_at after the claim) stays queued, since the handler may have
+    read the data from before that change. Returns the number of tasks
+    processed.
+    """
+    processed, failed = 0, set()
+    while True:
+        with transaction.atomic(using=using):
+            claimed_at = now()
+            tasks = list(
+                RecomputeTask.objects.using(using)
+                .exclude(pk__in=failed)
+                .select_for_update(skip_locked=True)
+                .order_by('created_at', 'pk')[:batch_size]
+            )
+            if not tasks:
+                return processed
+
+            tasks_by_kind = {}
+            for task in tasks:
+                tasks_by_kind.setdefault(task.kind, []).append(task)
+            done = []
+            for kind, kind_tasks in tasks_by_kind.items():
+                handler = _handlers.get(kind)
+                failed_keys = set()
+                if handler is not None:
+                    failed_keys = _run(handler, [task.key for task in kind_tasks], using)
+                for task in kind_tasks:
+                    if task.key in failed_keys:
+                        failed.add(task.pk)
+                    else:
+                        done.append(task.pk)
+
+            RecomputeTask.objects.using(using).filter(pk__in=done, created_at__lte=claimed_at).delete()
+        processed += len(done)
@@ -0,0 +1,121 @@
+import csv
+import io
+import tracemalloc
+import unittest
+from unittest import mock
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from core import export
+from inventory.models import Brand, InventoryItem, Product, ProductVariant, StatusChangeLog
+from inventory.services import receive_items
+from productsupplier.models import SupplierProduct
+from srm.models import Supplier
+
+
+class ExportTestCase(TestCase):
+    def setUp(self):
+        self.supplier = Supplier.objects.create(name="Truper")
+        brand = Brand.objects.create(name="Pretul")
+        product = Product.objects.create(name="Martillo", price=Decimal("100.00"))
+        self.variant = ProductVariant.objects.create(product=product, brand=brand, barcode="EXP1")
+        self.items = receive_items(self.variant, 3, Decimal("40.00"), supplier=self.supplier)
+
+    def _csv(self, name, **kwargs):
+        return list(csv.reader(io.StringIO(''.join(export.iter_csv(export.get_dataset(name), **kwargs)))))
+
+
+class ExportTest(ExportTestCase):
+    def test_datasets_are_registered(self):
+        self.assertEqual(
+            export.dataset_names(), ['inventory_items', 'status_logs', 'supplier_products', 'suppliers'])
+
+    def test_inventory_items_csv(self):
+        rows = self._csv('inventory_items')
+        self.assertEqual(rows[0][:5], ['id', 'barcode', 'product', 'sequential_id', 'status'])
+        self.assertEqual([row[1:5] for row in rows[1:]], [['EXP1', 'Martillo', str(item.sequential_id), 'received'] for item in self.items])
+
+    def test_supplier_products_include_scores(self):
+        SupplierProduct.objects.create(product_variant=self.variant, supplier=self.supplier, cost=Decimal("35.00"), min_order_quantity=10)
+        header, row = self._csv('supplier_products')
+        scores = dict(zip(header, row))
+        self.assertEqual((scores['supplier'], scores['cost'], scores['min_order_quantity']), ('Truper', '35.00', '10'))
+        self.assertIn('overall_score', scores)
+
+    def test_header_is_yielded_before_rows_are_read(self):
+        pieces = export.iter_csv(export.get_dataset('status_logs'))
+        with self.assertNumQueries(0):
+            self.assertTrue(next(pieces).startswith('id,inventory_item_id'))
+
+    def test_rows_are_read_in_chunks(self):
+        with self.assertNumQueries(1):
+            rows = self._csv('status_logs', chunk_size=2, buffer_size=1)
+        self.assertEqual(len(rows), 1 + StatusChangeLog.objects.count())
+
+    def test_streaming_memory_does_not_grow_with_rows(self):
+        item = self.items[0]
+        def peak(rows):
+            StatusChangeLog.objects.all().delete()
+            StatusChangeLog.objects.bulk_create(
+                [StatusChangeLog(inventory_item=item, old_status='received', new_status='quality_check', notes='x' * 50)] * rows,
+                batch_size=1000,
+            )
+            tracemalloc.start()
+            try:
+                for _ in export.iter_csv(export.get_dataset('status_logs'), chunk_size=500):
+                    pass
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        small, large = peak(2000), peak(20000)
+        # Ten times the rows, about the same peak: one chunk and one buffer at a time
+        self.assertLess(large, small * 1.5)
+        self.assertLess(large, 2 * 1024 * 1024)
+
+
+class ExportViewTest(ExportTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+
+    def test_csv_is_streamed(self):
+        response = self.client.get(reverse('export_dataset', args=['inventory_items']))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment; filename="inventory_items-', response['Content-Disposition'])
+        self.assertEqual(len(b''.join(response.streaming_content).decode().splitlines()), 4)
+
+    def test_unknown_dataset_or_format(self):
+        self.assertEqual(self.client.get(reverse('export_dataset', args=['nope'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('export_dataset', args=['suppliers']), {'format': 'pdf'}).status_code, 404)
+
+    @unittest.skipUnless(export.XLSX_AVAILABLE, "needs openpyxl")
+    def test_xlsx_download(self):
+        from openpyxl import load_workbook
+        response = self.client.get(reverse('export_dataset', args=['inventory_items']), {'format': 'xlsx'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('filename="inventory_items-', response['Content-Disposition'])
+        sheet = load_workbook(io.BytesIO(b''.join(response.streaming_content)), read_only=True).active
+        rows = list(sheet.values)
+        self.assertEqual(list(rows[0][:3]), ['id', 'barcode', 'product'])
+        self.assertEqual([row[1] for row in rows[1:]], ['EXP1'] * 3)
+
+    def test_xlsx_without_openpyxl_is_not_found(self):
+        with mock.patch.object(export, 'FORMATS', ('csv',)):
+            response = self.client.get(reverse('export_dataset', args=['suppliers']), {'format': 'xlsx'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_staff_only(self):
+        self.client.logout()
+        response = self.client.get(reverse('export_dataset', args=['suppliers']))
+        self.assertEqual(response.status_code, 302)
+
+
+class ExportCommandTest(ExportTestCase):
+    def test_writes_csv_to_stdout(self):
+        out = io.StringIO()
+        call_command('export_dataset', 'suppliers', stdout=out)
+        self.assertEqual(out.getvalue().splitlines()[1].split(',')[:2], [str(self.supplier.pk), 'Truper'])
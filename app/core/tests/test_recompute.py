@@ -0,0 +1,76 @@
+from django.db import transaction
+from django.test import TestCase
+from core import recompute
+from core.models import RecomputeTask
+
+
+class RecomputeQueueTests(TestCase):
+    def setUp(self):
+        self.calls = []
+        recompute.register('test_kind', self.calls.append)
+
+    def _queued(self):
+        return sorted(RecomputeTask.objects.filter(kind='test_kind').values_list('key', flat=True))
+
+    def test_keys_are_queued_once_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for key in [1, 2, 1, 2, 1]:
+                recompute.schedule('test_kind', key)
+            self.assertEqual(self._queued(), [])
+        self.assertEqual(self._queued(), ['1', '2'])
+
+    def test_rolled_back_changes_are_not_queued(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    recompute.schedule('test_kind', 1)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            recompute.schedule('test_kind', 2)
+        self.assertEqual(self._queued(), ['2'])
+
+    def test_suppressed_schedules_are_ignored(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with recompute.suppressed():
+                recompute.schedule('test_kind', 1)
+        self.assertEqual(self._queued(), [])
+
+    def test_drain_runs_each_kind_once_per_batch(self):
+        RecomputeTask.objects.bulk_create([
+            RecomputeTask(kind='test_kind', key=str(key)) for key in range(5)
+        ])
+        self.assertEqual(recompute.drain(batch_size=100), 5)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(sorted(self.calls[0]), ['0', '1', '2', '3', '4'])
+        self.assertFalse(RecomputeTask.objects.exists())
+
+    def test_failing_handler_leaves_only_its_failing_keys_queued(self):
+        def broken(keys):
+            if '2' in keys:
+                raise ValueError("cannot recompute 2")
+            self.calls.append(('broken', keys))
+        recompute.register('broken_kind', broken)
+        RecomputeTask.objects.bulk_create(
+            [RecomputeTask(kind='broken_kind', key=str(key)) for key in range(4)]
+            + [RecomputeTask(kind='test_kind', key='9')]
+        )
+        with self.assertLogs('core.recompute', 'ERROR'):
+            self.assertEqual(recompute.drain(batch_size=100), 4)
+        self.assertIn(['9'], self.calls)
+        self.assertEqual(sorted(key for call in self.calls if call[0] == 'broken' for key in call[1]), ['0', '1', '3'])
+        self.assertEqual(list(RecomputeTask.objects.values_list('kind', 'key')), [('broken_kind', '2')])
+
+    def test_key_scheduled_while_its_handler_runs_stays_queued(self):
+        runs = []
+        def handler(keys):
+            runs.append(keys)
+            if len(runs) == 1:
+                # Another transaction changes the data and commits mid-run
+                with self.captureOnCommitCallbacks(execute=True):
+                    recompute.schedule('racing_kind', '1')
+        recompute.register('racing_kind', handler)
+        RecomputeTask.objects.create(kind='racing_kind', key='1')
+        recompute.drain()
+        self.assertEqual(runs, [['1'], ['1']])
+        self.assertFalse(RecomputeTask.objects.exists())
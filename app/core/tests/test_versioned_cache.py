@@ -0,0 +1,61 @@
+from django.core.cache import cache
+from django.test import TestCase
+from core import versioned_cache
+from core.versioned_cache import GENERATION_PREFIX, VersionedCache, bump
+
+
+class VersionedCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.versioned = VersionedCache('test', ['test.a', 'test.b'])
+        self.addCleanup(versioned_cache._registry.remove, self.versioned)
+        self.calls = 0
+
+    def _compute(self):
+        self.calls += 1
+        return self.calls
+
+    def test_read_through(self):
+        self.assertEqual(self.versioned.get_or_set(('x',), self._compute), 1)
+        self.assertEqual(self.versioned.get_or_set(('x',), self._compute), 1)
+        self.assertEqual((self.versioned.stats.hits, self.versioned.stats.misses), (1, 1))
+
+    def test_none_is_cached(self):
+        self.versioned.get_or_set(('missing',), lambda: None)
+        self.assertIsNone(self.versioned.get_or_set(('missing',), self._compute))
+        self.assertEqual(self.calls, 0)
+
+    def test_bumping_any_scope_orphans_entries(self):
+        self.versioned.get_or_set(('x',), self._compute)
+        bump('test.b')
+        self.assertEqual(self.versioned.get_or_set(('x',), self._compute), 2)
+        bump('test.other')
+        self.assertEqual(self.versioned.get_or_set(('x',), self._compute), 2)
+
+    def test_bump_is_repeated_after_commit(self):
+        before = self.versioned.generations()
+        with self.captureOnCommitCallbacks(execute=True):
+            bump('test.a')
+        self.assertEqual(self.versioned.generations()[0], before[0] + 2)
+
+    def test_evicted_generation_does_not_restart_low(self):
+        bump('test.a')
+        old = self.versioned.generations()[0]
+        cache.delete(GENERATION_PREFIX + 'test.a')
+        self.assertGreater(self.versioned.generations()[0], old)
+
+    def test_get_many_loads_only_misses(self):
+        loaded = []
+        def compute(missing):
+            loaded.append(sorted(missing))
+            return {pk: pk * 10 for pk in missing if pk != 3}
+        self.assertEqual(self.versioned.get_many_or_set('n', [1, 2, 3], compute), {1: 10, 2: 20})
+        self.assertEqual(self.versioned.get_many_or_set('n', [2, 4], compute), {2: 20, 4: 40})
+        self.assertEqual(loaded, [[1, 2, 3], [4]])
+
+    def test_counts_are_shared_through_the_cache(self):
+        for _ in range(versioned_cache.STATS_FLUSH_EVERY):
+            self.versioned.get_or_set(('x',), self._compute)
+        self.assertEqual(self.versioned.stats.shared(), (versioned_cache.STATS_FLUSH_EVERY - 1, 1))
+        self.versioned.stats.reset()
+        self.assertEqual(self.versioned.stats.shared(), (0, 0))
@@ -3,4 +3,5 @@ from . import views
 
 urlpatterns = [
     path("", views.home, name="home"),
+    path("exportar/<slug:name>/", views.export_dataset, name="export_dataset"),
 ]
@@ -0,0 +1,185 @@
+"""
+Read-through cache with generation-numbered keys.
+
+Each cached value depends on one or more scopes (usually a model label).
+Every scope has a generation number stored in the cache, and entry keys
+embed the current generation of each scope they depend on. Invalidating
+a scope is one cache.incr(): keys built with the old number are never
+read again and expire on their own, so nothing has to find and delete
+them by pattern.
+
+Hits and misses are counted per namespace in the process and added to
+shared counters in the cache every STATS_FLUSH_EVERY lookups, so
+cache_stats sees every worker when the backend is shared (DatabaseCache).
+"""
+import hashlib
+import threading
+import time
+from django.core.cache import caches
+from django.db import transaction
+
+GENERATION_PREFIX = 'gen:'
+STATS_PREFIX = 'cachestats:'
+DEFAULT_TIMEOUT = 15 * 60
+STATS_FLUSH_EVERY = 100
+
+_MISSING = object()
+_registry = []
+
+
+def _initial_generation():
+    # A generation key that was evicted must not restart at a number old entries used
+    return time.time_ns()
+
+
+def _incr(cache, key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_generation(), None)
+
+
+def bump(*scopes, alias='default'):
+    """
+    Invalidate everything cached under `scopes`.
+
+    The generation moves now, so this process stops reading old entries
+    at once, and again after the transaction commits, so a concurrent
+    request cannot leave rows it read before the commit under the new
+    generation.
+    """
+    cache = caches[alias]
+    keys = [GENERATION_PREFIX + scope for scope in scopes]
+    for key in keys:
+        _incr(cache, key)
+    transaction.on_commit(lambda: [_incr(cache, key) for key in keys])
+
+
+class CacheStats:
+    """Thread safe hit/miss counters for one namespace"""
+
+    def __init__(self, namespace, alias='default'):
+        self.namespace = namespace
+        self.alias = alias
+        self._lock = threading.Lock()
+        self._pending = {'hits': 0, 'misses': 0}
+        self.hits = self.misses = 0
+
+    def record(self, hit, count=1):
+        field = 'hits' if hit else 'misses'
+        with self._lock:
+            setattr(self, field, getattr(self, field) + count)
+            self._pending[field] += count
+            flush = sum(self._pending.values()) >= STATS_FLUSH_EVERY
+        if flush:
+            self.flush()
+
+    def flush(self):
+        """Add the counts since the last flush to the shared counters"""
+        with self._lock:
+            pending, self._pending = self._pending, {'hits': 0, 'misses': 0}
+        cache = caches[self.alias]
+        for field, count in pending.items():
+            if count:
+                key = f"{STATS_PREFIX}{self.namespace}:{field}"
+                try:
+                    cache.incr(key, count)
+                except ValueError:
+                    if not cache.add(key, count, None):
+                        cache.incr(key, count)
+
+    def shared(self):
+        """(hits, misses) summed over every process that flushed"""
+        cache = caches[self.alias]
+        prefix = f"{STATS_PREFIX}{self.namespace}:"
+        values = cache.get_many([prefix + 'hits', prefix + 'misses'])
+        return values.get(prefix + 'hits', 0), values.get(prefix + 'misses', 0)
+
+    def reset(self):
+        with self._lock:
+            self.hits = self.misses = 0
+            self._pending = {'hits': 0, 'misses': 0}
+        cache = caches[self.alias]
+        cache.delete_many([f"{STATS_PREFIX}{self.namespace}:hits", f"{STATS_PREFIX}{self.namespace}:misses"])
+
+    @staticmethod
+    def ratio(hits, misses):
+        return hits / (hits + misses) if hits + misses else 0.0
+
+
+class VersionedCache:
+    """
+    Read-through cache for values that depend on `scopes`.
+
+    get_or_set() costs two cache round trips: one get_many for the scope
+    generations and one for the entry.
+    """
+
+    def __init__(self, namespace, scopes, timeout=DEFAULT_TIMEOUT, alias='default'):
+        self.namespace = namespace
+        self.scopes = tuple(scopes)
+        self.timeout = timeout
+        self.alias = alias
+        self.stats = CacheStats(namespace, alias)
+        _registry.append(self)
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def generations(self):
+        keys = [GENERATION_PREFIX + scope for scope in self.scopes]
+        found = self.cache.get_many(keys)
+        for key in keys:
+            if key not in found:
+                self.cache.add(key, _initial_generation(), None)
+                found[key] = self.cache.get(key)
+        return [found[key] for key in keys]
+
+    def _key(self, generations, parts):
+        # Parts may be user input (search terms): hash them into a safe key
+        digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+        return f"{self.namespace}:{generations}:{digest}"
+
+    def key(self, *parts):
+        return self._key('.'.join(str(generation) for generation in self.generations()), parts)
+
+    def get_or_set(self, parts, compute):
+        """Cached value for the key `parts`, computing and storing it on a miss"""
+        key = self.key(*parts)
+        value = self.cache.get(key, _MISSING)
+        if value is not _MISSING:
+            self.stats.record(hit=True)
+            return value
+        self.stats.record(hit=False)
+        value = compute()
+        self.cache.set(key, value, self.timeout)
+        return value
+
+    def get_many_or_set(self, name, ids, compute):
+        """
+        {id: value} for several entries of one kind in two round trips.
+
+        `compute(missing_ids)` returns {id: value} for the misses; ids it
+        leaves out are not cached and are missing from the result.
+        """
+        generations = '.'.join(str(generation) for generation in self.generations())
+        keys = {self._key(generations, (name, pk)): pk for pk in ids}
+        found = self.cache.get_many(list(keys))
+        values = {keys[key]: value for key, value in found.items()}
+        missing = [pk for key, pk in keys.items() if key not in found]
+        self.stats.record(hit=True, count=len(values))
+        self.stats.record(hit=False, count=len(missing))
+        if missing:
+            computed = compute(missing)
+            self.cache.set_many(
+                {self._key(generations, (name, pk)): value for pk, value in computed.items()}, self.timeout)
+            values.update(computed)
+        return values
+
+    def invalidate(self):
+        bump(*self.scopes, alias=self.alias)
+
+
+def registered_caches():
+    return list(_registry)
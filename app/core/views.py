@@ -1,6 +1,12 @@
 # core/views.py
 
+import tempfile
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404, StreamingHttpResponse
 from django.shortcuts import render
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+from . import export
 
 def home(request):
     modules = [
@@ -15,3 +21,36 @@ def home(request):
     ]
     return render(request, "home.html", {"modules": modules})
 
+
+
+@require_GET
+@staff_member_required
+def export_dataset(request, name):
+    """
+    Download a registered export dataset: CSV by default, ?format=xlsx.
+
+    CSV is streamed while the rows are read; XLSX is built in a temporary
+    file and then sent. Formats that are not installed are a 404.
+    """
+    try:
+        dataset = export.get_dataset(name)
+    except KeyError:
+        raise Http404(f"Unknown dataset: {name}")
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in export.FORMATS:
+        raise Http404(f"Unknown format: {fmt}")
+
+    filename = f"{name}-{timezone.localdate():%Y%m%d}.{fmt}"
+    if fmt == 'csv':
+        response = StreamingHttpResponse(export.iter_csv(dataset), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    workbook = tempfile.TemporaryFile()
+    try:
+        export.write_xlsx(dataset, workbook)
+    except BaseException:
+        workbook.close()
+        raise
+    workbook.seek(0)
+    return FileResponse(workbook, as_attachment=True, filename=filename)
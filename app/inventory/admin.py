@@ -1,6 +1,6 @@
 from django.contrib import admin
 from .models import Product, ProductVariant, Brand
-from .models import InventoryItem, StatusChangeLog
+from .models import InventoryItem, InventoryItemDetails, StatusChangeLog, StatusChangeLogArchive, StockCounter
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
@@ -28,16 +28,45 @@ class BrandAdmin(admin.ModelAdmin):
 
 
 
+class InventoryItemDetailsInline(admin.StackedInline):
+    model = InventoryItemDetails
+    can_delete = False
+
+
 @admin.register(InventoryItem)
 class InventoryItemAdmin(admin.ModelAdmin):
     list_display = ('id','product_variant', 'sequential_id', 'current_status', 'location_in_warehouse')
     list_filter = ('current_status', 'supplier')
     search_fields = ('product_variant__name', 'sequential_id')
     readonly_fields = ('status_changed','sequential_id')
+    ordering = ('-status_changed',)
+    inlines = [InventoryItemDetailsInline]
 
 @admin.register(StatusChangeLog)
 class StatusChangeLogAdmin(admin.ModelAdmin):
     list_display = ('inventory_item', 'old_status', 'new_status', 'change_date','changed_by')
     list_filter = ('new_status',)
     search_fields = ('inventory_item__product_variant__name',)
+    list_select_related = ('inventory_item__product_variant__product', 'inventory_item__product_variant__brand', 'changed_by')
+    show_full_result_count = False  # skip COUNT(*) over the whole log on every page
+
+
+@admin.register(StatusChangeLogArchive)
+class StatusChangeLogArchiveAdmin(admin.ModelAdmin):
+    list_display = ('inventory_item_id', 'old_status', 'new_status', 'change_date', 'changed_by_id')
+    search_fields = ('=inventory_item__id',)
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 
+@admin.register(StockCounter)
+class StockCounterAdmin(admin.ModelAdmin):
+    list_display = ('product_variant', 'status', 'quantity')
+    list_filter = ('status',)
+    search_fields = ('product_variant__barcode', 'product_variant__product__name')
+    readonly_fields = ('product_variant', 'status', 'quantity')
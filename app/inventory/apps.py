@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inventory'
+
+    def ready(self):
+        import inventory.signals  # This triggers the signal registration
+        from core import export
+        from .exports import INVENTORY_ITEMS, STATUS_LOGS
+        export.register(INVENTORY_ITEMS)
+        export.register(STATUS_LOGS)
@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import OrderedDict
+from django.core.cache import cache
+from .models import ProductVariant
+
+# Entries kept in each worker process; the POS only scans a working set of SKUs
+LOCAL_CACHE_SIZE = 2048
+# Seconds a process trusts its local copy before going back to the shared cache.
+# Signals clear the local copy immediately in the process that made the change.
+LOCAL_CACHE_TTL = 5
+SHARED_CACHE_TIMEOUT = 60 * 60
+SHARED_KEY_PREFIX = 'inventory:barcode:'
+
+
+class BarcodeCache:
+    """
+    Two tier cache of barcode lookup payloads.
+
+    The first tier is a bounded, thread safe LRU local to the process; the
+    second tier is Django's default cache, shared between workers when a
+    shared backend is configured.
+    """
+
+    def __init__(self, maxsize=LOCAL_CACHE_SIZE, ttl=LOCAL_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, barcode):
+        with self._lock:
+            entry = self._entries.get(barcode)
+            if entry is not None:
+                expires, payload = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(barcode)
+                    return payload
+                del self._entries[barcode]
+
+        payload = cache.get(SHARED_KEY_PREFIX + barcode)
+        if payload is not None:
+            self._store_local(barcode, payload)
+        return payload
+
+    def set(self, barcode, payload):
+        self._store_local(barcode, payload)
+        cache.set(SHARED_KEY_PREFIX + barcode, payload, SHARED_CACHE_TIMEOUT)
+
+    def invalidate(self, barcodes):
+        barcodes = [str(barcode) for barcode in barcodes if barcode]
+        with self._lock:
+            for barcode in barcodes:
+                self._entries.pop(barcode, None)
+        cache.delete_many([SHARED_KEY_PREFIX + barcode for barcode in barcodes])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _store_local(self, barcode, payload):
+        with self._lock:
+            self._entries[barcode] = (time.monotonic() + self.ttl, payload)
+            self._entries.move_to_end(barcode)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+barcode_cache = BarcodeCache()
+
+
+def variant_payload(variant):
+    """Compact JSON-ready description of a variant for the point of sale"""
+    product = variant.product
+    return {
+        'variant': {
+            'id': variant.pk,
+            'barcode': variant.barcode,
+            'brand': variant.brand.name if variant.brand else None,
+        },
+        'product': {
+            'id': product.pk,
+            'name': product.name,
+            'is_bulk': product.is_bulk,
+        },
+        'price': str(product.price),
+        'stock': variant.stock,
+    }
+
+
+def lookup_barcode(barcode):
+    """Return the payload for a scanned barcode, or None if it is unknown"""
+    payload = barcode_cache.get(barcode)
+    if payload is None:
+        variant = ProductVariant.objects.select_related(
+            'product', 'brand'
+        ).filter(barcode=barcode).first()
+        if variant is None:
+            return None
+        payload = variant_payload(variant)
+        barcode_cache.set(barcode, payload)
+    return payload
+
+
+def invalidate_variants(variant_ids):
+    """Drop cached payloads for variants changed through queryset updates"""
+    barcodes = ProductVariant.objects.filter(
+        pk__in=variant_ids
+    ).values_list('barcode', flat=True)
+    barcode_cache.invalidate(list(barcodes))
+
+
+def invalidate_products(product_ids):
+    """Drop cached payloads for every variant of products changed in bulk"""
+    barcodes = ProductVariant.objects.filter(
+        product_id__in=product_ids
+    ).values_list('barcode', flat=True)
+    barcode_cache.invalidate(list(barcodes))
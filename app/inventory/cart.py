@@ -0,0 +1,54 @@
+from collections import namedtuple
+from decimal import Decimal
+from .catalog_cache import get_variants
+
+CartLine = namedtuple('CartLine', ['product_variant', 'quantity', 'unit_price', 'subtotal'])
+
+
+class Cart:
+    """
+    Sale screen cart kept in the session as {variant_id: quantity}.
+
+    Nothing is reserved while a ticket is being built; units are only
+    claimed when the sale is committed.
+    """
+    SESSION_KEY = 'sale_cart'
+
+    def __init__(self, session):
+        self.session = session
+
+    def quantities(self):
+        return {int(pk): quantity for pk, quantity in self.session.get(self.SESSION_KEY, {}).items()}
+
+    def _store(self, quantities):
+        # Session data goes through JSON, so keys are kept as strings
+        self.session[self.SESSION_KEY] = {str(pk): quantity for pk, quantity in quantities.items()}
+
+    def add(self, product_variant_id, quantity=1):
+        quantities = self.quantities()
+        quantities[product_variant_id] = quantities.get(product_variant_id, 0) + quantity
+        if quantities[product_variant_id] <= 0:
+            del quantities[product_variant_id]
+        self._store(quantities)
+
+    def remove(self, product_variant_id):
+        quantities = self.quantities()
+        quantities.pop(product_variant_id, None)
+        self._store(quantities)
+
+    def clear(self):
+        self.session.pop(self.SESSION_KEY, None)
+
+    def lines(self):
+        """CartLines priced from the product; variants come from the catalog cache"""
+        quantities = self.quantities()
+        variants = get_variants(quantities)
+        return [
+            CartLine(variant, quantities[pk], variant.product.price,
+                     variant.product.price * quantities[pk])
+            for pk, variant in sorted(variants.items())
+        ]
+
+    @staticmethod
+    def total(lines):
+        return sum((line.subtotal for line in lines), Decimal('0'))
@@ -0,0 +1,75 @@
+"""
+Cached catalog reads.
+
+Product, variant and brand lookups and the sale screen's product listing
+are served through core.versioned_cache. Saving or deleting a Product,
+ProductVariant or Brand bumps that model's generation (see
+inventory.signals), and items_changed bumps the stock generation that the
+listing also depends on. Writes that skip model signals (queryset
+updates, bulk_create) call bump_catalog() themselves.
+
+Variants come back with their product and brand but their `stock` may lag
+behind sales; read stock from the listing or the database.
+"""
+from django.core.paginator import Page, Paginator
+from core.versioned_cache import VersionedCache, bump
+from .models import Brand, Product, ProductVariant
+
+PRODUCT_SCOPE = Product._meta.label_lower
+VARIANT_SCOPE = ProductVariant._meta.label_lower
+BRAND_SCOPE = Brand._meta.label_lower
+STOCK_SCOPE = 'inventory.stock'
+
+LISTING_TIMEOUT = 5 * 60
+
+catalog_cache = VersionedCache('catalog', [PRODUCT_SCOPE, VARIANT_SCOPE, BRAND_SCOPE])
+listing_cache = VersionedCache(
+    'catalog-listing', [PRODUCT_SCOPE, VARIANT_SCOPE, BRAND_SCOPE, STOCK_SCOPE], timeout=LISTING_TIMEOUT)
+
+
+def bump_catalog(*scopes):
+    """Invalidate catalog entries for `scopes` (all catalog models by default)"""
+    bump(*(scopes or (PRODUCT_SCOPE, VARIANT_SCOPE, BRAND_SCOPE)))
+
+
+def get_product(pk):
+    """The Product with this pk, or None"""
+    return catalog_cache.get_or_set(('product', pk), lambda: Product.objects.filter(pk=pk).first())
+
+
+def _variants():
+    return ProductVariant.objects.select_related('product', 'brand')
+
+
+def get_variant(pk):
+    """The ProductVariant with this pk, with product and brand, or None"""
+    return catalog_cache.get_or_set(('variant', pk), lambda: _variants().filter(pk=pk).first())
+
+
+def get_variants(pks):
+    """{pk: ProductVariant} for the variants that exist; misses load in one query"""
+    return catalog_cache.get_many_or_set('variant', pks, lambda missing: _variants().in_bulk(missing))
+
+
+def get_variant_by_barcode(barcode):
+    """The ProductVariant scanned as `barcode` (as typed or upper case), or None"""
+    return catalog_cache.get_or_set(
+        ('barcode', barcode),
+        lambda: _variants().filter(barcode__in={barcode, barcode.upper()}).first(),
+    )
+
+
+def cached_page(parts, queryset, per_page, number):
+    """
+    Paginator page of `queryset` cached under `parts`.
+
+    The rows and the total count are cached, not the queryset, and the
+    Page is rebuilt around them so templates keep working unchanged.
+    """
+    def compute():
+        page = Paginator(queryset, per_page).get_page(number)
+        return page.number, page.paginator.count, list(page.object_list)
+
+    page_number, count, rows = listing_cache.get_or_set((*parts, per_page, number), compute)
+    # range() has a len() and no ordering to warn about
+    return Page(rows, page_number, Paginator(range(count), per_page))
@@ -0,0 +1,12 @@
+"""
+Inventory domain events for other apps to subscribe to.
+
+Kept apart from the inventory.signals package, which holds this app's own
+receivers, so models and services can import it without cycles.
+"""
+from django.dispatch import Signal
+
+# Sent inside the writing transaction whenever InventoryItems are received,
+# change status, are saved or deleted. Keyword arguments: product_variant_ids
+# (a set of the affected variants) and using (the database alias).
+items_changed = Signal()
@@ -0,0 +1,29 @@
+from core.export import Dataset
+from .models import InventoryItem, StatusChangeLog
+
+INVENTORY_ITEMS = Dataset('inventory_items', InventoryItem.objects.order_by('pk'), [
+    ('id', 'pk'),
+    ('barcode', 'product_variant__barcode'),
+    ('product', 'product_variant__product__name'),
+    ('sequential_id', 'sequential_id'),
+    ('status', 'current_status'),
+    ('status_changed', 'status_changed'),
+    ('supplier', 'supplier__name'),
+    ('purchase_price', 'purchase_price'),
+    ('sale_price', 'sale_price'),
+    ('discount_applied', 'discount_applied'),
+    ('tax_rate', 'tax_rate'),
+    ('purchase_order_reference', 'purchase_order_reference'),
+    ('invoice_number', 'invoice_number'),
+    ('location_in_warehouse', 'location_in_warehouse'),
+])
+
+STATUS_LOGS = Dataset('status_logs', StatusChangeLog.objects.order_by('pk'), [
+    ('id', 'pk'),
+    ('inventory_item_id', 'inventory_item_id'),
+    ('old_status', 'old_status'),
+    ('new_status', 'new_status'),
+    ('change_date', 'change_date'),
+    ('changed_by', 'changed_by__username'),
+    ('notes', 'notes'),
+])
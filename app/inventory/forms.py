@@ -0,0 +1,34 @@
+from decimal import Decimal
+from django import forms
+from srm.models import Supplier
+from .catalog_cache import get_variant_by_barcode
+from .models import ProductVariant
+
+
+class BulkReceiveForm(forms.Form):
+    product_variant = forms.ModelChoiceField(queryset=ProductVariant.objects.all())
+    quantity = forms.IntegerField(min_value=1, max_value=100_000)
+    purchase_price = forms.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal("0.00"))
+    supplier = forms.ModelChoiceField(queryset=Supplier.objects.all(), required=False)
+    purchase_order_reference = forms.CharField(max_length=100, required=False)
+    notes = forms.CharField(required=False)
+
+
+class CartAddForm(forms.Form):
+    """Either a scanned barcode or a variant id; the barcode wins when both are sent"""
+    barcode = forms.CharField(max_length=50, required=False)
+    product_variant = forms.ModelChoiceField(queryset=ProductVariant.objects.all(), required=False)
+    quantity = forms.IntegerField(min_value=1, max_value=10_000, initial=1, required=False)
+
+    def clean(self):
+        cleaned = super().clean()
+        barcode = (cleaned.get('barcode') or '').strip()
+        if barcode:
+            variant = get_variant_by_barcode(barcode)
+            if variant is None:
+                raise forms.ValidationError(f"Unknown barcode {barcode}")
+            cleaned['product_variant'] = variant
+        elif cleaned.get('product_variant') is None:
+            raise forms.ValidationError("Scan a barcode or choose a product")
+        cleaned['quantity'] = cleaned.get('quantity') or 1
+        return cleaned
@@ -0,0 +1,38 @@
+"""
+Cached HTML of the product listing rows.
+
+A row shows a product's name, price and total stock, so its key is the
+product pk, updated_at and the total stock it was rendered with; saving
+the product or moving its stock changes the key and nothing has to be
+deleted. All rows of a page are fetched with one get_many and only the
+misses are rendered, then stored with one set_many.
+"""
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+ROW_TEMPLATE = 'product_row.html'
+# Bump when product_row.html changes so old markup is not served
+ROW_KEY_PREFIX = 'inventory:row:v1:'
+ROW_TIMEOUT = 24 * 60 * 60
+
+
+def row_key(product):
+    return f"{ROW_KEY_PREFIX}{product.pk}:{product.updated_at.timestamp()}:{product.total_stock}"
+
+
+def render_product_rows(products):
+    """One safe HTML string per product, in order"""
+    keys = [row_key(product) for product in products]
+    cached = cache.get_many(keys) if keys else {}
+    rendered, rows = {}, []
+    template = None
+    for key, product in zip(keys, products):
+        html = cached.get(key)
+        if html is None:
+            template = template or get_template(ROW_TEMPLATE)
+            html = rendered[key] = template.render({'product': product})
+        rows.append(mark_safe(html))
+    if rendered:
+        cache.set_many(rendered, ROW_TIMEOUT)
+    return rows
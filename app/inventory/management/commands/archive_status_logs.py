@@ -0,0 +1,34 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+from inventory.models import StatusChangeLog, StatusChangeLogArchive
+
+
+class Command(BaseCommand):
+    help = "Move old StatusChangeLog rows to the archive table and purge expired archive rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=180,
+                            help="Keep this many days of history in the live log")
+        parser.add_argument('--purge-days', type=int, default=None,
+                            help="Delete archived rows older than this many days (default: keep forever)")
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only count the rows that would be moved or purged")
+
+    def handle(self, *args, days, purge_days, batch_size, dry_run, **options):
+        cutoff = now() - timedelta(days=days)
+        purge_cutoff = now() - timedelta(days=purge_days) if purge_days is not None else None
+
+        if dry_run:
+            self.stdout.write(f"{StatusChangeLog.objects.filter(change_date__lt=cutoff).count()} rows to archive")
+            if purge_cutoff:
+                purgeable = StatusChangeLogArchive.objects.filter(change_date__lt=purge_cutoff).count()
+                self.stdout.write(f"{purgeable} archived rows to purge")
+            return
+
+        moved = StatusChangeLogArchive.archive_before(cutoff, batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"{moved} rows archived"))
+        if purge_cutoff:
+            purged = StatusChangeLogArchive.purge_before(purge_cutoff, batch_size=batch_size)
+            self.stdout.write(self.style.SUCCESS(f"{purged} archived rows purged"))
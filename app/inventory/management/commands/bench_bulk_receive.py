@@ -0,0 +1,34 @@
+from decimal import Decimal
+from core.benchmarks import BenchmarkCommand
+from inventory.models import InventoryItem, Product, ProductVariant, StatusChangeLog
+from inventory.services import receive_items
+
+
+class Command(BenchmarkCommand):
+    help = "Compare per-item receiving with the bulk receive_items() service"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=10_000)
+        parser.add_argument('--legacy-items', type=int, default=1_000,
+                            help="Units received one save() at a time (slow; kept smaller)")
+
+    def run_benchmark(self, items, legacy_items, **options):
+        product = Product.objects.create(name="Bench", price=1)
+        variant = ProductVariant.objects.create(product=product, barcode="BENCH-RECEIVE")
+        price = Decimal("9.99")
+
+        def legacy():
+            for _ in range(legacy_items):
+                item = InventoryItem.objects.create(product_variant=variant, purchase_price=price)
+                item.update_status('received')
+
+        def bulk():
+            receive_items(variant, items, price)
+
+        legacy_time = self.measure(f"save() + update_status ({legacy_items} units)", legacy, repeat=1)
+        bulk_time = self.measure(f"receive_items ({items} units)", bulk, repeat=1)
+        self.stdout.write(
+            f"per unit: {legacy_time / legacy_items * 1e6:.1f} us legacy, "
+            f"{bulk_time / items * 1e6:.1f} us bulk"
+        )
+        self.stdout.write(f"log rows written: {StatusChangeLog.objects.count()}")
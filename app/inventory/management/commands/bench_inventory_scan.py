@@ -0,0 +1,69 @@
+from decimal import Decimal
+from django.db import connection
+from django.utils.timezone import now
+from core.benchmarks import BenchmarkCommand
+from inventory.models import InventoryItem, InventorySequence, Product, ProductVariant
+
+SEED_BATCH_SIZE = 5000
+
+
+class Command(BenchmarkCommand):
+    help = "Compare full-width InventoryItem scans with the for_list()/for_stock() presets"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=5_000_000)
+        parser.add_argument('--variants', type=int, default=1000)
+        parser.add_argument('--scan', type=int, default=200_000,
+                            help="Rows read by each timed scan")
+
+    def run_benchmark(self, items, variants, scan, **options):
+        product = Product.objects.create(name="Bench", price=1)
+        variant_objs = ProductVariant.objects.bulk_create(
+            [ProductVariant(product=product, barcode=f"BENCH-SCAN-{n}") for n in range(variants)]
+        )
+        self._seed(variant_objs, items)
+        self.stdout.write(f"{items} items over {variants} variants")
+        self._report_row_size()
+
+        # Iterate rather than list() so both scans stream the same way
+        full = InventoryItem.objects.order_by('-status_changed')[:scan]
+        self.measure("full rows, ordered", lambda: sum(1 for _ in full.iterator(chunk_size=2000)), repeat=3)
+        self.measure("for_list()", lambda: sum(
+            1 for _ in InventoryItem.objects.for_list()[:scan].iterator(chunk_size=2000)), repeat=3)
+        self.measure("full rows, unordered stock read", lambda: sum(
+            1 for _ in InventoryItem.objects.filter(current_status='ready_for_sale')[:scan].iterator(chunk_size=2000)),
+            repeat=3)
+        self.measure("for_stock()", lambda: sum(
+            1 for _ in InventoryItem.objects.filter(current_status='ready_for_sale').for_stock()[:scan]
+            .iterator(chunk_size=2000)), repeat=3)
+
+    def _seed(self, variant_objs, items):
+        # Straight inserts with pre-allocated ids; the receive path is not what is measured
+        per_variant = -(-items // len(variant_objs))
+        blocks = InventorySequence.allocate_many({v.pk: per_variant for v in variant_objs})
+        stamp = now()
+        batch, created = [], 0
+        for variant in variant_objs:
+            for sequential_id in blocks[variant.pk]:
+                if created == items:
+                    break
+                batch.append(InventoryItem(
+                    product_variant_id=variant.pk, sequential_id=sequential_id,
+                    purchase_price=Decimal("10.00"), current_status='ready_for_sale',
+                    date_received=stamp, date_quality_check=stamp, date_ready_for_sale=stamp,
+                    purchase_order_reference=f"PO-{created // 500:06d}",
+                ))
+                created += 1
+                if len(batch) >= SEED_BATCH_SIZE:
+                    InventoryItem.objects.bulk_create(batch)
+                    batch = []
+        InventoryItem.objects.bulk_create(batch)
+
+    def _report_row_size(self):
+        if connection.vendor != 'postgresql':
+            return
+        table = InventoryItem._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT avg(pg_column_size(t.*)), pg_relation_size(%s) FROM {table} t", [table])
+            avg_row, relation = cursor.fetchone()
+        self.stdout.write(f"average row {avg_row:.0f} bytes, heap {relation / 2**20:.1f} MiB")
@@ -0,0 +1,46 @@
+from decimal import Decimal
+from django.db.models import Q
+from core.benchmarks import BenchmarkCommand
+from inventory.models import Product, ProductVariant
+from inventory.search import search_products
+
+WORDS = [
+    'Martillo', 'Clavos', 'Taladro', 'Pala', 'Serrucho', 'Lija', 'Tornillo',
+    'Pinza', 'Llave', 'Cinta', 'Brocha', 'Pintura', 'Cable', 'Foco', 'Manguera',
+]
+
+
+class Command(BenchmarkCommand):
+    help = "Compare the legacy icontains product search with search_products()"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def run_benchmark(self, products, repeat, **options):
+        self.stdout.write(f"Seeding {products} products...")
+        for start in range(0, products, 5000):
+            batch = [
+                Product(
+                    name=f"{WORDS[i % len(WORDS)]} {WORDS[(i // len(WORDS)) % len(WORDS)]} {i}",
+                    price=Decimal('10.00'),
+                )
+                for i in range(start, min(start + 5000, products))
+            ]
+            Product.objects.bulk_create(batch)
+            ProductVariant.objects.bulk_create(
+                ProductVariant(product=p, barcode=f"75{p.pk:011d}", stock=1) for p in batch
+            )
+        barcode = ProductVariant.objects.values_list('barcode', flat=True).last()
+
+        def legacy(query):
+            return list(Product.objects.filter(
+                Q(name__icontains=query) | Q(variants__barcode__iexact=query)
+            ).distinct().order_by('name')[:50])
+
+        def current(query):
+            return list(search_products(Product.objects.all(), query)[:50])
+
+        for query in ['Mart', 'Serrucho Pala', 'Martilo', barcode]:
+            self.measure(f"legacy  {query!r}", lambda: legacy(query), repeat)
+            self.measure(f"search  {query!r}", lambda: current(query), repeat)
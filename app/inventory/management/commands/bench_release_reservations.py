@@ -0,0 +1,36 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.utils.timezone import now
+from core.benchmarks import BenchmarkCommand
+from inventory.models import InventoryItem, Product, ProductVariant
+from inventory.services import receive_items, release_expired_reservations
+
+
+class Command(BenchmarkCommand):
+    help = "Time the expired reservation sweep over a large reserved backlog"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=200_000)
+        parser.add_argument('--expired-share', type=float, default=0.25,
+                            help="Fraction of the reservations that have already expired")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def run_benchmark(self, items, expired_share, batch_size, **options):
+        product = Product.objects.create(name="Bench", price=1)
+        variant = ProductVariant.objects.create(product=product, barcode="BENCH-RESERVE")
+        receive_items(variant, items, Decimal("1.00"))
+        # Seed straight to 'reserved'; the transition path is not what is measured
+        expired = int(items * expired_share)
+        reserved = InventoryItem.objects.filter(product_variant=variant)
+        reserved.update(current_status='reserved', reserved_until=now() + timedelta(minutes=15))
+        InventoryItem.objects.filter(
+            pk__in=reserved.order_by('pk').values('pk')[:expired]
+        ).update(reserved_until=now() - timedelta(minutes=1))
+        self.stdout.write(f"{items} reserved items, {expired} expired")
+
+        self.measure(
+            f"release_expired_reservations (batch {batch_size})",
+            lambda: self.stdout.write(f"  released {release_expired_reservations(batch_size=batch_size)}"),
+            repeat=1,
+        )
+        self.measure("sweep with nothing expired", release_expired_reservations, repeat=3)
@@ -0,0 +1,42 @@
+from decimal import Decimal
+from django.core.cache import cache
+from django.template.loader import get_template, render_to_string
+from core.benchmarks import BenchmarkCommand
+from inventory.fragments import ROW_TEMPLATE, render_product_rows, row_key
+from inventory.models import Product, ProductVariant
+
+
+class Command(BenchmarkCommand):
+    help = "Render table.html for many products: every row rendered, cold row cache and warm row cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def run_benchmark(self, rows, repeat, **options):
+        created = Product.objects.bulk_create(
+            [Product(name=f"Producto {i}", price=Decimal('10.00') + i) for i in range(rows)])
+        ProductVariant.objects.bulk_create(
+            ProductVariant(product=p, barcode=f"BENCH-RR-{p.pk}", stock=p.pk % 7) for p in created)
+        products = list(Product.objects.with_stock_total().filter(pk__in=[p.pk for p in created]).order_by('name', 'pk'))
+        row_template = get_template(ROW_TEMPLATE)
+
+        def table(product_rows):
+            return render_to_string('table.html', {'products': products, 'product_rows': product_rows})
+
+        def uncached():
+            table([row_template.render({'product': product}) for product in products])
+
+        keys = [row_key(product) for product in products]
+
+        def cold():
+            cache.delete_many(keys)
+            table(render_product_rows(products))
+
+        def warm():
+            table(render_product_rows(products))
+
+        self.measure(f"{rows} rows, every row rendered", uncached, repeat)
+        self.measure(f"{rows} rows, cold row cache", cold, repeat)
+        render_product_rows(products)
+        self.measure(f"{rows} rows, warm row cache", warm, repeat)
@@ -0,0 +1,41 @@
+from django.db.models import Max
+from core.benchmarks import BenchmarkCommand
+from inventory.models import InventoryItem, InventorySequence, Product, ProductVariant
+
+
+class Command(BenchmarkCommand):
+    help = "Compare Max()+1 sequential_id allocation with the InventorySequence counter"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def run_benchmark(self, items, repeat, **options):
+        product = Product.objects.create(name="Bench", price=1)
+        legacy_variant = ProductVariant.objects.create(product=product, barcode="BENCH-SEQ-LEGACY")
+        variant = ProductVariant.objects.create(product=product, barcode="BENCH-SEQ")
+
+        def legacy():
+            # The aggregate-then-insert path InventoryItem.save() used before
+            for _ in range(items):
+                last_id = InventoryItem.objects.filter(
+                    product_variant=legacy_variant
+                ).aggregate(Max('sequential_id'))['sequential_id__max'] or 0
+                InventoryItem.objects.bulk_create([InventoryItem(
+                    product_variant=legacy_variant, sequential_id=last_id + 1, purchase_price=1
+                )])
+
+        def counter():
+            for _ in range(items):
+                InventoryItem.objects.create(product_variant=variant, purchase_price=1)
+
+        def block():
+            ids = InventorySequence.allocate(variant.pk, items)
+            InventoryItem.objects.bulk_create(
+                InventoryItem(product_variant=variant, sequential_id=seq, purchase_price=1)
+                for seq in ids
+            )
+
+        self.measure(f"Max()+1 per insert ({items} items)", legacy, repeat)
+        self.measure(f"counter per insert ({items} items)", counter, repeat)
+        self.measure(f"one block + bulk_create ({items} items)", block, repeat)
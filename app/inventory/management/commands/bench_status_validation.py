@@ -0,0 +1,41 @@
+import random
+from django.core.exceptions import ValidationError
+from core.benchmarks import BenchmarkCommand
+from inventory.models import InventoryItem
+
+
+def legacy_validate(current_status, new_status):
+    # Previous validate_status_transition: dict and list rebuilt per call
+    if new_status not in dict(InventoryItem.STATUS_CHOICES):
+        raise ValidationError(f"Invalid status: {new_status}")
+    if new_status not in InventoryItem.STATUS_TRANSITION_RULES.get(current_status, []):
+        raise ValidationError(f"Cannot change status from {current_status} to {new_status}")
+
+
+class Command(BenchmarkCommand):
+    help = "Compare per-call transition validation with the compiled StatusMachine"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checks', type=int, default=1_000_000)
+
+    def run_benchmark(self, checks, **options):
+        machine = InventoryItem.STATUS_MACHINE
+        statuses = [random.choice(machine.statuses) for _ in range(checks)]
+        target = 'ready_for_sale'
+
+        def legacy():
+            allowed = []
+            for status in statuses:
+                try:
+                    legacy_validate(status, target)
+                    allowed.append(True)
+                except ValidationError:
+                    allowed.append(False)
+            return allowed
+
+        assert legacy() == machine.allowed(statuses, target)
+        self.measure(f"legacy validate ({checks} checks)", legacy, repeat=1)
+        self.measure("StatusMachine.can_transition loop",
+                     lambda: [machine.can_transition(status, target) for status in statuses], repeat=3)
+        self.measure("StatusMachine.allowed (vectorized)",
+                     lambda: machine.allowed(statuses, target), repeat=3)
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from inventory.models import InventoryItem, StockCounter
+
+
+class Command(BaseCommand):
+    help = "Rebuild StockCounter rows from InventoryItem and report any drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only report drift, do not rewrite the counters")
+
+    def handle(self, *args, dry_run=False, **options):
+        with transaction.atomic():
+            # Lock the counters so concurrent transitions wait for the rebuild
+            stored = {
+                (row['product_variant_id'], row['status']): row['quantity']
+                for row in StockCounter.objects.select_for_update().values(
+                    'product_variant_id', 'status', 'quantity'
+                )
+            }
+            actual = {
+                (row['product_variant_id'], row['current_status']): row['quantity']
+                for row in InventoryItem.objects.values(
+                    'product_variant_id', 'current_status'
+                ).annotate(quantity=Count('id')).order_by()
+            }
+
+            drift = []
+            for key in sorted(set(stored) | set(actual)):
+                expected = actual.get(key, 0)
+                found = stored.get(key, 0)
+                if expected != found:
+                    drift.append((key, found, expected))
+
+            for (variant_id, status), found, expected in drift:
+                self.stdout.write(
+                    f"variant {variant_id} {status}: counter {found}, items {expected}"
+                )
+
+            if drift and not dry_run:
+                StockCounter.objects.all().delete()
+                StockCounter.objects.bulk_create(
+                    [
+                        StockCounter(product_variant_id=variant_id, status=status, quantity=quantity)
+                        for (variant_id, status), quantity in actual.items()
+                    ],
+                    batch_size=1000,
+                )
+
+        verb = "found" if dry_run else "fixed"
+        self.stdout.write(self.style.SUCCESS(f"{len(drift)} drifted counters {verb}"))
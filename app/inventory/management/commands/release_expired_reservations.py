@@ -0,0 +1,22 @@
+import time
+from django.core.management.base import BaseCommand
+from inventory.services import RESERVATION_SWEEP_BATCH_SIZE, release_expired_reservations
+
+
+class Command(BaseCommand):
+    help = "Put expired reservations back on sale"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=RESERVATION_SWEEP_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep sweeping every --interval seconds")
+        parser.add_argument('--interval', type=float, default=60.0,
+                            help="Seconds to sleep between sweeps in --loop mode")
+
+    def handle(self, *args, batch_size, loop, interval, **options):
+        while True:
+            released = release_expired_reservations(batch_size=batch_size)
+            self.stdout.write(f"{released} reservations released")
+            if not loop:
+                return
+            time.sleep(interval)
@@ -0,0 +1,35 @@
+# Generated by Django 4.2 on 2026-10-18 14:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def seed_sequences(apps, schema_editor):
+    # Start every counter at the highest sequential_id already in use
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+    InventorySequence = apps.get_model('inventory', 'InventorySequence')
+    highest = InventoryItem.objects.values('product_variant').annotate(
+        last_value=models.Max('sequential_id')
+    ).order_by()
+    InventorySequence.objects.bulk_create(
+        InventorySequence(product_variant_id=row['product_variant'], last_value=row['last_value'])
+        for row in highest
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_product_name_trigram_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventorySequence',
+            fields=[
+                ('product_variant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='inventory_sequence', serialize=False, to='inventory.productvariant')),
+                ('last_value', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2 on 2026-10-18 14:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def seed_counters(apps, schema_editor):
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+    StockCounter = apps.get_model('inventory', 'StockCounter')
+    totals = InventoryItem.objects.values('product_variant', 'current_status').annotate(
+        quantity=models.Count('id')
+    ).order_by()
+    StockCounter.objects.bulk_create(
+        StockCounter(
+            product_variant_id=row['product_variant'],
+            status=row['current_status'],
+            quantity=row['quantity'],
+        )
+        for row in totals
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_inventorysequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('ordered', 'Ordered'), ('received', 'Received in Warehouse'), ('quality_check', 'Quality Check'), ('ready_for_sale', 'Ready for Sale'), ('reserved', 'Reserved'), ('sold', 'Sold'), ('shipped', 'Shipped'), ('delivered', 'Delivered'), ('returned', 'Returned'), ('discarded', 'Discarded')], max_length=20)),
+                ('quantity', models.IntegerField(default=0)),
+                ('product_variant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_counters', to='inventory.productvariant')),
+            ],
+            options={
+                'verbose_name': 'Stock Counter',
+                'verbose_name_plural': 'Stock Counters',
+                'unique_together': {('product_variant', 'status')},
+            },
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2 on 2026-10-18 14:22
+
+from datetime import timedelta
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def expire_open_reservations(apps, schema_editor):
+    # Items already reserved get the default time to live from now on
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+    InventoryItem.objects.filter(current_status='reserved', reserved_until__isnull=True).update(
+        reserved_until=timezone.now() + timedelta(minutes=15),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_sales'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='reserved_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(expire_open_reservations, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['current_status', 'reserved_until'], name='inventoryitem_expiry_idx'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 4.2 on 2026-10-18 14:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+ARCHIVE_BRIN_INDEX = 'statuslog_archive_date_brin'
+
+
+def create_brin_index(apps, schema_editor):
+    # BRIN is PostgreSQL only; other backends scan the archive by item index
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {ARCHIVE_BRIN_INDEX} '
+        'ON inventory_statuschangelogarchive USING brin (change_date)'
+    )
+
+
+def drop_brin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {ARCHIVE_BRIN_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('inventory', '0006_reservation_expiry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatusChangeLogArchive',
+            fields=[
+                ('old_status', models.CharField(choices=[('ordered', 'Ordered'), ('received', 'Received in Warehouse'), ('quality_check', 'Quality Check'), ('ready_for_sale', 'Ready for Sale'), ('reserved', 'Reserved'), ('sold', 'Sold'), ('shipped', 'Shipped'), ('delivered', 'Delivered'), ('returned', 'Returned'), ('discarded', 'Discarded')], max_length=20)),
+                ('new_status', models.CharField(choices=[('ordered', 'Ordered'), ('received', 'Received in Warehouse'), ('quality_check', 'Quality Check'), ('ready_for_sale', 'Ready for Sale'), ('reserved', 'Reserved'), ('sold', 'Sold'), ('shipped', 'Shipped'), ('delivered', 'Delivered'), ('returned', 'Returned'), ('discarded', 'Discarded')], max_length=20)),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('change_date', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Archived Status Change Log',
+                'verbose_name_plural': 'Archived Status Change Logs',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='statuschangelog',
+            index=models.Index(fields=['inventory_item', 'change_date'], name='statuslog_item_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='statuschangelog',
+            index=models.Index(fields=['change_date'], name='statuslog_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='statuschangelogarchive',
+            name='changed_by',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='statuschangelogarchive',
+            name='inventory_item',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='archived_status_logs', to='inventory.inventoryitem'),
+        ),
+        migrations.AddIndex(
+            model_name='statuschangelogarchive',
+            index=models.Index(fields=['inventory_item', 'change_date'], name='statuslog_archive_item_idx'),
+        ),
+        migrations.RunPython(create_brin_index, drop_brin_index),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 4.2 on 2026-10-18 14:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+DETAIL_FIELDS = ('shipping_carrier', 'tracking_number', 'notes', 'quality_check_notes')
+
+
+def copy_details(apps, schema_editor):
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+    InventoryItemDetails = apps.get_model('inventory', 'InventoryItemDetails')
+    # Only items with something to keep get a details row
+    has_details = models.Q()
+    for field in DETAIL_FIELDS:
+        has_details |= models.Q(**{f'{field}__isnull': False})
+    rows = InventoryItem.objects.filter(has_details).values_list('pk', *DETAIL_FIELDS).iterator(chunk_size=2000)
+    batch = []
+    for pk, *values in rows:
+        batch.append(InventoryItemDetails(inventory_item_id=pk, **dict(zip(DETAIL_FIELDS, values))))
+        if len(batch) >= 2000:
+            InventoryItemDetails.objects.bulk_create(batch)
+            batch = []
+    InventoryItemDetails.objects.bulk_create(batch)
+
+
+def restore_details(apps, schema_editor):
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+    InventoryItemDetails = apps.get_model('inventory', 'InventoryItemDetails')
+    for details in InventoryItemDetails.objects.iterator(chunk_size=2000):
+        InventoryItem.objects.filter(pk=details.inventory_item_id).update(
+            **{field: getattr(details, field) for field in DETAIL_FIELDS}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_status_log_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryItemDetails',
+            fields=[
+                ('inventory_item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='details', serialize=False, to='inventory.inventoryitem')),
+                ('shipping_carrier', models.CharField(blank=True, max_length=100, null=True)),
+                ('tracking_number', models.CharField(blank=True, max_length=100, null=True)),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('quality_check_notes', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Inventory Item Details',
+                'verbose_name_plural': 'Inventory Item Details',
+            },
+        ),
+        migrations.RunPython(copy_details, restore_details),
+        migrations.AlterModelOptions(
+            name='inventoryitem',
+            options={'verbose_name': 'Inventory Item', 'verbose_name_plural': 'Inventory Items'},
+        ),
+        migrations.RemoveField(
+            model_name='inventoryitem',
+            name='notes',
+        ),
+        migrations.RemoveField(
+            model_name='inventoryitem',
+            name='quality_check_notes',
+        ),
+        migrations.RemoveField(
+            model_name='inventoryitem',
+            name='shipping_carrier',
+        ),
+        migrations.RemoveField(
+            model_name='inventoryitem',
+            name='tracking_number',
+        ),
+    ]
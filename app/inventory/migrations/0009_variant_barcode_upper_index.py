@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 15:11
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_inventoryitem_details'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productvariant',
+            index=models.Index(django.db.models.functions.text.Upper('barcode'), name='variant_barcode_upper_idx'),
+        ),
+    ]
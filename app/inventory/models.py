@@ -1,4 +1,6 @@
-from django.db import models
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+from django.db import connection, connections, models, transaction
 from core.models  import TimeStampedModel
 from django.core.validators import MinValueValidator
 from decimal import Decimal
@@ -7,13 +9,28 @@ from django.utils.timezone import now
 from django.core.exceptions import ValidationError
 from django.utils.timezone import now
 from django.contrib.auth.models import User
-from django.core.exceptions import ValidationError
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.db.models.functions import Coalesce, Lead, Now, Upper
+from .events import items_changed
+from .status_machine import StatusMachine
 
 class Brand(TimeStampedModel):
     name = models.CharField(max_length=225, unique=True)
     def __str__(self):
         return self.name
 
+class ProductQuerySet(models.QuerySet):
+    def with_stock_total(self):
+        """Annotate each product with the summed stock of its variants"""
+        variant_stock = ProductVariant.objects.filter(
+            product=models.OuterRef('pk')
+        ).order_by().values('product').annotate(
+            total=models.Sum('stock')
+        ).values('total')
+        return self.annotate(
+            stock_total=Coalesce(models.Subquery(variant_stock), 0)
+        )
+
 class Product(TimeStampedModel):
     UNIT_CHOICES = [
             ('grams', 'Grams'),
@@ -28,11 +45,16 @@ class Product(TimeStampedModel):
     price = models.DecimalField(max_digits=10, decimal_places=2,validators=[MinValueValidator(Decimal("0.00"))])
     is_bulk = models.BooleanField(default=False)
 
+    objects = ProductQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.name} (${self.price:.2f})"
 
     @property
     def total_stock(self):
+        # Use the value from with_stock_total() when the queryset provided it
+        if hasattr(self, 'stock_total'):
+            return self.stock_total
         return self.variants.aggregate(total=models.Sum('stock'))['total'] or 0
 
 class ProductVariant(TimeStampedModel):
@@ -41,10 +63,232 @@ class ProductVariant(TimeStampedModel):
     barcode = models.CharField(max_length=50, unique=True)
     stock = models.IntegerField(default=0)
 
+    class Meta(TimeStampedModel.Meta):
+        indexes = [
+            # Case-insensitive barcode lookups in the sale screen search
+            models.Index(Upper('barcode'), name='variant_barcode_upper_idx'),
+        ]
+
     def __str__(self):
         return f"{self.product.name} - {self.brand.name if self.brand else 'No Brand'}"
 
 
+class InventorySequence(models.Model):
+    """Per-variant counter that hands out InventoryItem.sequential_id values"""
+    product_variant = models.OneToOneField(
+        ProductVariant,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="inventory_sequence"
+    )
+    last_value = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.product_variant} - {self.last_value}"
+
+    @classmethod
+    def allocate(cls, product_variant_id, count=1):
+        """Reserve `count` consecutive sequential ids for one variant"""
+        return cls.allocate_many({product_variant_id: count})[product_variant_id]
+
+    @classmethod
+    def allocate_many(cls, counts):
+        """
+        Reserve blocks of sequential ids for several variants in one statement.
+
+        Takes {variant_id: count} and returns {variant_id: range}. The upsert
+        increments each counter row atomically and returns the new value, so
+        concurrent workers never see the same block.
+        """
+        counts = {variant_id: count for variant_id, count in counts.items() if count > 0}
+        if not counts:
+            return {}
+
+        qn = connection.ops.quote_name
+        table = qn(cls._meta.db_table)
+        # Sorted keys keep row lock order stable between concurrent allocations
+        variant_ids = sorted(counts)
+        sql = (
+            f"INSERT INTO {table} (product_variant_id, last_value) "
+            f"VALUES {', '.join(['(%s, %s)'] * len(variant_ids))} "
+            f"ON CONFLICT (product_variant_id) DO UPDATE "
+            f"SET last_value = {table}.last_value + EXCLUDED.last_value "
+            f"RETURNING product_variant_id, last_value"
+        )
+        params = [value for variant_id in variant_ids for value in (variant_id, counts[variant_id])]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        return {
+            variant_id: range(last_value - counts[variant_id] + 1, last_value + 1)
+            for variant_id, last_value in rows
+        }
+
+
+BulkStatusResult = namedtuple('BulkStatusResult', ['updated', 'failed'])
+
+# Rows per UPDATE/INSERT; keeps pk__in lists under backend parameter limits
+STATUS_UPDATE_BATCH_SIZE = 500
+# How long a reservation holds its units when no expiry is given
+RESERVATION_TTL = timedelta(minutes=15)
+
+
+class InventoryItemQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Insert items; refuses items with details set (notes, tracking_number...),
+        which only save() writes to InventoryItemDetails.
+        """
+        objs = list(objs)
+        if any(getattr(obj, '_details_changed', False) for obj in objs):
+            raise ValueError(
+                "bulk_create() does not write InventoryItemDetails fields; "
+                "save() those items or bulk_create InventoryItemDetails rows separately"
+            )
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update_status(self, items, new_status, user=None, notes=None, reserved_until=None):
+        """
+        Move many items to `new_status` in one transaction.
+
+        Transitions are validated in memory against STATUS_MACHINE;
+        items that cannot make the transition are left untouched and reported
+        in `failed` as {pk: message} instead of aborting the batch. The UPDATE
+        is also guarded by each item's loaded status, so rows another writer
+        moved in the meantime are reported in `failed` rather than
+        overwritten. Returns a BulkStatusResult whose `updated` list holds the
+        changed instances. `reserved_until` is the expiry stamped on items
+        moved to 'reserved' (RESERVATION_TTL from now when not given); any
+        other status clears it.
+        """
+        machine = self.model.STATUS_MACHINE
+        if new_status not in machine.valid:
+            raise ValidationError(f"Invalid status: {new_status}")
+
+        changed_at = now()
+        if new_status != 'reserved':
+            reserved_until = None
+        elif reserved_until is None:
+            reserved_until = changed_at + RESERVATION_TTL
+        date_field = machine.date_fields[new_status]
+        sources = machine.sources[new_status]
+        candidates, failed = [], {}
+        by_status = defaultdict(list)
+        for item in items:
+            if item.current_status not in sources:
+                failed[item.pk] = f"Cannot change status from {item.current_status} to {new_status}"
+                continue
+            candidates.append(item)
+            by_status[item.current_status].append(item)
+        if not candidates:
+            return BulkStatusResult([], failed)
+
+        updated, logs, deltas = [], [], {}
+        with transaction.atomic(using=self.db):
+            applied = set()
+            for old_status, group in by_status.items():
+                for start in range(0, len(group), STATUS_UPDATE_BATCH_SIZE):
+                    pks = [item.pk for item in group[start:start + STATUS_UPDATE_BATCH_SIZE]]
+                    # Same values for every row, so a plain UPDATE beats bulk_update's CASE
+                    count = self.model.objects.using(self.db).filter(
+                        pk__in=pks, current_status=old_status,
+                    ).update(**{
+                        'current_status': new_status,
+                        'status_changed': changed_at,
+                        'reserved_until': reserved_until,
+                        date_field: Coalesce(models.F(date_field), models.Value(changed_at)),
+                    })
+                    if count == len(pks):
+                        applied.update(pks)
+                    else:
+                        # Some rows had moved on; the ones that did update carry our timestamp
+                        applied.update(self.model.objects.using(self.db).filter(
+                            pk__in=pks, current_status=new_status, status_changed=changed_at,
+                        ).values_list('pk', flat=True))
+
+            for item in candidates:
+                if item.pk not in applied:
+                    failed[item.pk] = f"Status of item {item.pk} is no longer {item.current_status}"
+                    continue
+                for key, delta in item._stock_key_change(new_status):
+                    deltas[key] = deltas.get(key, 0) + delta
+                logs.append(StatusChangeLog(
+                    inventory_item=item,
+                    old_status=item.current_status,
+                    new_status=new_status,
+                    changed_by=user,
+                    notes=notes,
+                ))
+                item.current_status = new_status
+                item._loaded_stock_key = (item.product_variant_id, new_status)
+                item.status_changed = changed_at
+                item.reserved_until = reserved_until
+                # Deferred dates are left alone; the UPDATE above stamped them in SQL
+                if date_field in item.__dict__ and getattr(item, date_field) is None:
+                    setattr(item, date_field, changed_at)
+                updated.append(item)
+
+            if updated:
+                StatusChangeLog.objects.using(self.db).bulk_create(
+                    logs, batch_size=STATUS_UPDATE_BATCH_SIZE
+                )
+                StockCounter.apply(deltas, using=self.db)
+                items_changed.send(
+                    sender=self.model, using=self.db,
+                    product_variant_ids={item.product_variant_id for item in updated},
+                )
+        return BulkStatusResult(updated, failed)
+
+    # Columns for item listings and for the stock/status paths
+    LIST_FIELDS = ('pk', 'product_variant_id', 'sequential_id', 'current_status',
+                   'status_changed', 'location_in_warehouse', 'sale_price')
+    STOCK_FIELDS = ('pk', 'product_variant_id', 'sequential_id', 'current_status')
+
+    def for_list(self):
+        """Narrow rows for item listings, newest status change first"""
+        return self.only(*self.LIST_FIELDS).order_by('-status_changed')
+
+    def for_stock(self):
+        """Only what status transitions and stock counters need"""
+        return self.only(*self.STOCK_FIELDS)
+
+    def can_transition_to(self, new_status):
+        """Items whose current status may move to `new_status`, filtered in SQL"""
+        return self.filter(self.model.STATUS_MACHINE.filter_q(new_status))
+
+    def with_timeline(self):
+        """Prefetch each item's status timeline for get_status_history()"""
+        return self.annotate(
+            has_archived_logs=models.Exists(
+                StatusChangeLogArchive.objects.filter(inventory_item=models.OuterRef('pk'))),
+        ).prefetch_related(models.Prefetch(
+            'status_logs',
+            queryset=StatusChangeLog.objects.timeline(),
+            to_attr='timeline_logs',
+        ))
+
+
+def _details_field(name):
+    """
+    Read/write proxy from InventoryItem to a column of its details row.
+
+    Only InventoryItem.save() writes the details row. Queryset paths never
+    do: bulk_create() rejects items with details set, and update() and
+    bulk_update() do not know these names as fields.
+    """
+    def get(item):
+        details = item._get_details()
+        return getattr(details, name) if details is not None else None
+
+    def set(item, value):
+        details = item._get_details(create=value is not None)
+        if details is not None and getattr(details, name) != value:
+            setattr(details, name, value)
+            item._details_changed = True
+
+    return property(get, set)
+
+
 class InventoryItem(models.Model):
     STATUS_CHOICES = [
         ('ordered', 'Ordered'),
@@ -72,6 +316,14 @@ class InventoryItem(models.Model):
         'discarded': []
     }
 
+    # Compiled once; validation and bulk paths use this instead of the dicts above
+    STATUS_MACHINE = StatusMachine(STATUS_CHOICES, STATUS_TRANSITION_RULES)
+
+    # Statuses that count as physically on hand
+    IN_STOCK_STATUSES = ('ready_for_sale', 'reserved')
+    # Bought but not yet sellable; counted against reorder needs
+    INCOMING_STATUSES = ('ordered', 'received', 'quality_check')
+
     # Basic Information
     id = models.AutoField(primary_key=True) 
     product_variant = models.ForeignKey(ProductVariant, on_delete=models.CASCADE, related_name="inventory_items")
@@ -87,6 +339,8 @@ class InventoryItem(models.Model):
     # Status Tracking
     current_status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='ordered')
     status_changed = models.DateTimeField(auto_now=True)
+    # Reserved units go back on sale after this; see release_expired_reservations
+    reserved_until = models.DateTimeField(null=True, blank=True)
     
     # Timeline Dates
     date_ordered = models.DateTimeField(default=now)
@@ -103,33 +357,105 @@ class InventoryItem(models.Model):
     # Additional Tracking Information
     purchase_order_reference = models.CharField(max_length=100, blank=True, null=True)
     invoice_number = models.CharField(max_length=100, blank=True, null=True)
-    shipping_carrier = models.CharField(max_length=100, blank=True, null=True)
-    tracking_number = models.CharField(max_length=100, blank=True, null=True)
     location_in_warehouse = models.CharField(max_length=100, blank=True, null=True)
-    notes = models.TextField(blank=True, null=True)
     
     # Quality Control
     quality_check_passed = models.BooleanField(null=True, blank=True)
-    quality_check_notes = models.TextField(blank=True, null=True)
+
+    # Rarely read text lives in InventoryItemDetails; these proxy to it
+    shipping_carrier = _details_field('shipping_carrier')
+    tracking_number = _details_field('tracking_number')
+    notes = _details_field('notes')
+    quality_check_notes = _details_field('quality_check_notes')
+    DETAIL_FIELDS = frozenset({'shipping_carrier', 'tracking_number', 'notes', 'quality_check_notes'})
+
+    objects = InventoryItemQuerySet.as_manager()
 
     class Meta:
         unique_together = ('product_variant', 'sequential_id')
-        ordering = ['-status_changed']
         verbose_name = "Inventory Item"
         verbose_name_plural = "Inventory Items"
         indexes = [
             models.Index(fields=['current_status']),
             models.Index(fields=['status_changed']),
+            # FIFO picking: oldest sellable units of a variant first
+            models.Index(fields=['product_variant', 'current_status', 'sequential_id'], name='inventoryitem_fifo_idx'),
+            # Expiry sweeps read reserved rows in reserved_until order
+            models.Index(fields=['current_status', 'reserved_until'], name='inventoryitem_expiry_idx'),
         ]
 
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_stock_key()
+        return instance
+
+    def _remember_stock_key(self):
+        """Remember the (variant, status) the stock counters currently hold for this row"""
+        if 'current_status' in self.__dict__ and 'product_variant_id' in self.__dict__:
+            self._loaded_stock_key = (self.product_variant_id, self.current_status)
+
+    def _stock_key_change(self, new_status, product_variant_id=None):
+        """Counter deltas for moving this item to `new_status`"""
+        old_key = getattr(self, '_loaded_stock_key', None)
+        new_key = (product_variant_id or self.product_variant_id, new_status)
+        if old_key == new_key:
+            return []
+        changes = [(new_key, 1)]
+        if old_key is not None:
+            changes.append((old_key, -1))
+        return changes
+
+    def _written_fields(self, update_fields):
+        """Field names save() will write, or None for every field"""
+        if update_fields is not None:
+            return set(update_fields)
+        deferred = self.get_deferred_fields() if self.pk is not None else set()
+        if deferred:
+            # Django only writes the loaded fields of a deferred instance
+            return {field.attname for field in self._meta.concrete_fields if field.attname not in deferred}
+        return None
+
     def save(self, *args, **kwargs):
-        if not self.pk:  # Only for new instances
-            last_id = InventoryItem.objects.filter(
-                product_variant=self.product_variant
-            ).aggregate(models.Max('sequential_id'))['sequential_id__max'] or 0
-            self.sequential_id = last_id + 1
-        super().save(*args, **kwargs)
+        # update_fields may name detail proxies: they go to the details row, not the item UPDATE
+        update_fields = kwargs.get('update_fields')
+        save_details = update_fields is None
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            save_details = bool(update_fields & self.DETAIL_FIELDS)
+            kwargs['update_fields'] = update_fields - self.DETAIL_FIELDS
+        written = self._written_fields(kwargs.get('update_fields'))
+        writes_variant = written is None or bool(written & {'product_variant', 'product_variant_id'})
+        writes_status = written is None or 'current_status' in written
+        with transaction.atomic():
+            if not self.pk:  # Only for new instances
+                self._loaded_stock_key = None
+                self.sequential_id = InventorySequence.allocate(self.product_variant_id)[0]
+            elif (writes_variant or writes_status) and not hasattr(self, '_loaded_stock_key'):
+                # Loaded without the stock columns: the counters hold what the row holds
+                self._loaded_stock_key = type(self).objects.filter(pk=self.pk).values_list(
+                    'product_variant_id', 'current_status').first()
+            super().save(*args, **kwargs)
+            if writes_variant or writes_status:
+                old_variant, old_status = self._loaded_stock_key or (None, None)
+                variant_id = self.product_variant_id if writes_variant else old_variant
+                status = self.current_status if writes_status else old_status
+                StockCounter.apply(dict(self._stock_key_change(status, variant_id)))
+                self._loaded_stock_key = (variant_id, status)
+            if save_details and getattr(self, '_details_changed', False):
+                self.details.inventory_item = self
+                self.details.save()
+                self._details_changed = False
+            items_changed.send(sender=type(self), using=self._state.db, product_variant_ids={self.product_variant_id})
+
+    def _get_details(self, create=False):
+        try:
+            return self.details  # cached after the first access, None included
+        except ObjectDoesNotExist:
+            if not create:
+                return None
+            return InventoryItemDetails(inventory_item=self)
 
     def __str__(self):
         return (f"{self.product_variant.product.name} - "
@@ -146,38 +472,40 @@ class InventoryItem(models.Model):
 
     def validate_status_transition(self, new_status):
         """Validate if status transition is allowed"""
-        if new_status not in dict(self.STATUS_CHOICES):
-            raise ValidationError(f"Invalid status: {new_status}")
-        
-        if new_status not in self.STATUS_TRANSITION_RULES.get(self.current_status, []):
-            raise ValidationError(
-                f"Cannot change status from {self.current_status} to {new_status}"
-            )
+        self.STATUS_MACHINE.validate(self.current_status, new_status)
 
-    def update_status(self, new_status, user=None, notes=None, commit=True):
+    def update_status(self, new_status, user=None, notes=None, commit=True, reserved_until=None):
         """
-        Enhanced status update with logging and validation
+        Enhanced status update with logging and validation.
+
+        A move to 'reserved' expires at `reserved_until`, RESERVATION_TTL
+        from now when not given.
         """
         self.validate_status_transition(new_status)
         
         old_status = self.current_status
         self.current_status = new_status
+        if new_status != 'reserved':
+            self.reserved_until = None
+        else:
+            self.reserved_until = reserved_until or self.reserved_until or now() + RESERVATION_TTL
         
         # Set the corresponding date field if it exists
-        status_date_field = f"date_{new_status}"
-        if hasattr(self, status_date_field) and getattr(self, status_date_field) is None:
+        status_date_field = self.STATUS_MACHINE.date_fields[new_status]
+        if getattr(self, status_date_field) is None:
             setattr(self, status_date_field, now())
         
         if commit:
-            self.save()
-            # Create log entry
-            StatusChangeLog.objects.create(
-                inventory_item=self,
-                old_status=old_status,
-                new_status=new_status,
-                changed_by=user,
-                notes=notes
-            )
+            with transaction.atomic():
+                self.save()
+                # Create log entry
+                StatusChangeLog.objects.create(
+                    inventory_item=self,
+                    old_status=old_status,
+                    new_status=new_status,
+                    changed_by=user,
+                    notes=notes
+                )
 
     @property
     def is_available_for_sale(self):
@@ -187,7 +515,7 @@ class InventoryItem(models.Model):
     @property
     def is_in_stock(self):
         """Check if item is in stock (available or reserved)"""
-        return self.current_status in ['ready_for_sale', 'reserved']
+        return self.current_status in self.IN_STOCK_STATUSES
 
     @property
     def is_shipped(self):
@@ -196,28 +524,67 @@ class InventoryItem(models.Model):
 
     def get_time_in_status(self):
         """Returns timedelta of how long in current status"""
-        date_field = getattr(self, f"date_{self.current_status}")
+        date_field = getattr(self, self.STATUS_MACHINE.date_fields[self.current_status])
         if date_field:
             return now() - date_field
         return None
 
-    def get_status_history(self):
+    def get_status_history(self, include_archived=False):
         """
-        Returns a list of all status changes with their dates
-        with proper status display names
+        Complete, ordered status timeline read from the status change log.
+
+        Every transition is listed, including repeats such as
+        returned → ready_for_sale → returned. The first entry is the status
+        the item was created in. Each entry's `dwell` is how long the item
+        stayed in that status (up to now for the current one), computed in
+        SQL. Uses the logs prefetched by InventoryItem.objects.with_timeline()
+        when available. Rows moved to StatusChangeLogArchive are only read
+        with `include_archived`; without it, an item with archived rows has
+        no creation entry and its history starts at the first live change.
         """
+        logs = getattr(self, 'timeline_logs', None)
+        if logs is None:
+            logs = list(self.status_logs.timeline())
+        if include_archived:
+            archived = list(self.archived_status_logs.timeline())
+            if archived and logs:
+                # The archive's LEAD() cannot see the live rows that follow it
+                archived[-1].dwell = logs[0].change_date - archived[-1].change_date
+            logs = archived + list(logs)
+            truncated = False
+        else:
+            truncated = getattr(self, 'has_archived_logs', None)
+            if truncated is None:
+                truncated = self.archived_status_logs.exists()
+
+        status_dict = self.STATUS_MACHINE.labels
         history = []
-        status_dict = dict(self.STATUS_CHOICES)
-        
-        for status, _ in self.STATUS_CHOICES:
-            date = getattr(self, f"date_{status}", None)
-            if date:
-                history.append({
-                    'status': status,
-                    'status_display': status_dict.get(status, status),
-                    'date': date
-                })
-        return sorted(history, key=lambda x: x['date'])
+        if not truncated:
+            initial_status = logs[0].old_status if logs else self.current_status
+            first_change = logs[0].change_date if logs else now()
+            history.append({
+                'status': initial_status,
+                'status_display': status_dict.get(initial_status, initial_status),
+                'date': self.date_ordered,
+                'dwell': first_change - self.date_ordered,
+            })
+        for log in logs:
+            history.append({
+                'status': log.new_status,
+                'status_display': status_dict.get(log.new_status, log.new_status),
+                'date': log.change_date,
+                'dwell': log.dwell,
+                'changed_by_id': log.changed_by_id,
+                'notes': log.notes,
+            })
+        return history
+
+    def get_dwell_by_status(self, include_archived=False):
+        """{status: total time spent in it} over the whole timeline"""
+        totals = {}
+        for entry in self.get_status_history(include_archived=include_archived):
+            totals[entry['status']] = totals.get(entry['status'], timedelta()) + entry['dwell']
+        return totals
 
     def calculate_profit(self):
         """
@@ -247,19 +614,233 @@ class InventoryItem(models.Model):
             return "Unknown"
 
 
-class StatusChangeLog(models.Model):
-    """Log of all status changes for inventory items"""
-    inventory_item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='status_logs')
+class InventoryItemDetails(models.Model):
+    """
+    Cold, free-text columns of an InventoryItem.
+
+    Split out so list and stock queries read narrow item rows; a row only
+    exists once one of the fields is set. Read and write them through the
+    same-named properties on InventoryItem.
+    """
+    inventory_item = models.OneToOneField(
+        InventoryItem, on_delete=models.CASCADE, primary_key=True, related_name='details',
+    )
+    shipping_carrier = models.CharField(max_length=100, blank=True, null=True)
+    tracking_number = models.CharField(max_length=100, blank=True, null=True)
+    notes = models.TextField(blank=True, null=True)
+    quality_check_notes = models.TextField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Inventory Item Details"
+        verbose_name_plural = "Inventory Item Details"
+
+    def __str__(self):
+        return f"Details of item {self.inventory_item_id}"
+
+
+class StatusChangeLogQuerySet(models.QuerySet):
+    def timeline(self):
+        """
+        Log rows in per-item order, each annotated with when the item left
+        that status (`left_at`) and how long it stayed (`dwell`).
+
+        Both come from a LEAD() window over the (inventory_item, change_date)
+        index; the latest status is open-ended and measured up to now.
+        """
+        left_at = models.Window(
+            Lead('change_date'),
+            partition_by=[models.F('inventory_item_id')],
+            order_by=[models.F('change_date').asc(), models.F('pk').asc()],
+        )
+        return self.annotate(
+            left_at=left_at,
+            dwell=models.ExpressionWrapper(
+                Coalesce(left_at, Now()) - models.F('change_date'),
+                output_field=models.DurationField(),
+            ),
+        ).order_by('inventory_item_id', 'change_date', 'pk')
+
+
+class StatusChangeLogBase(models.Model):
     old_status = models.CharField(max_length=20, choices=InventoryItem.STATUS_CHOICES)
     new_status = models.CharField(max_length=20, choices=InventoryItem.STATUS_CHOICES)
-    changed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     change_date = models.DateTimeField(auto_now_add=True)
     notes = models.TextField(blank=True, null=True)
 
+    objects = StatusChangeLogQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return f"{self.inventory_item} - {self.old_status} → {self.new_status}"
+
+
+class StatusChangeLog(StatusChangeLogBase):
+    """
+    Log of all status changes for inventory items.
+
+    Append-only and kept small: rows older than the retention window are
+    moved to StatusChangeLogArchive by the archive_status_logs command, so
+    inserts and index maintenance do not grow with the full history.
+    """
+    inventory_item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='status_logs')
+    changed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+
     class Meta:
         ordering = ['-change_date']
         verbose_name = "Status Change Log"
         verbose_name_plural = "Status Change Logs"
+        indexes = [
+            # Per-item history in date order, and date-range scans for the admin and archiving
+            models.Index(fields=['inventory_item', 'change_date'], name='statuslog_item_date_idx'),
+            models.Index(fields=['change_date'], name='statuslog_date_idx'),
+        ]
+
+
+class StatusChangeLogArchive(StatusChangeLogBase):
+    """
+    Rolled-over StatusChangeLog rows, ids preserved.
+
+    No foreign key constraints, so archived history survives item and user
+    deletion and bulk inserts skip constraint checks. On PostgreSQL
+    change_date also has a BRIN index, which stays tiny for append-ordered
+    data.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    inventory_item = models.ForeignKey(
+        InventoryItem, on_delete=models.DO_NOTHING, db_constraint=False, related_name='archived_status_logs',
+    )
+    changed_by = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='+',
+    )
+    change_date = models.DateTimeField()
+
+    # Column order shared by the INSERT ... SELECT that rolls rows over
+    COPY_FIELDS = ('id', 'inventory_item_id', 'old_status', 'new_status', 'changed_by_id', 'change_date', 'notes')
+
+    class Meta:
+        verbose_name = "Archived Status Change Log"
+        verbose_name_plural = "Archived Status Change Logs"
+        indexes = [
+            models.Index(fields=['inventory_item', 'change_date'], name='statuslog_archive_item_idx'),
+        ]
+
+    @classmethod
+    def archive_before(cls, cutoff, batch_size=10_000):
+        """
+        Move StatusChangeLog rows older than `cutoff` into the archive.
+
+        Each batch is one INSERT ... SELECT plus one DELETE in its own
+        transaction. Returns the number of rows moved.
+        """
+        moved = 0
+        columns = ', '.join(connection.ops.quote_name(field) for field in cls.COPY_FIELDS)
+        table = connection.ops.quote_name(cls._meta.db_table)
+        while True:
+            with transaction.atomic():
+                ids = list(StatusChangeLog.objects.filter(
+                    change_date__lt=cutoff
+                ).order_by('change_date', 'pk').values_list('pk', flat=True)[:batch_size])
+                if not ids:
+                    return moved
+                rows = StatusChangeLog.objects.filter(pk__in=ids).order_by().values_list(*cls.COPY_FIELDS)
+                select_sql, params = rows.query.sql_with_params()
+                with connection.cursor() as cursor:
+                    cursor.execute(f"INSERT INTO {table} ({columns}) {select_sql}", params)
+                StatusChangeLog.objects.filter(pk__in=ids).delete()
+                moved += len(ids)
+            if len(ids) < batch_size:
+                return moved
+
+    @classmethod
+    def purge_before(cls, cutoff, batch_size=10_000):
+        """Delete archived rows older than `cutoff`, batch by batch"""
+        purged = 0
+        while True:
+            ids = list(cls.objects.filter(change_date__lt=cutoff).order_by().values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return purged
+            purged += cls.objects.filter(pk__in=ids).delete()[0]
+            if len(ids) < batch_size:
+                return purged
+
+
+class StockCounterQuerySet(models.QuerySet):
+    def on_hand(self, product_variant_ids=None):
+        """{variant_id: units} on hand, read from counters instead of items"""
+        counters = self.filter(status__in=InventoryItem.IN_STOCK_STATUSES)
+        if product_variant_ids is not None:
+            counters = counters.filter(product_variant_id__in=product_variant_ids)
+        totals = counters.values('product_variant_id').annotate(
+            units=models.Sum('quantity')
+        ).order_by()
+        return {row['product_variant_id']: row['units'] for row in totals}
+
+
+class StockCounter(models.Model):
+    """
+    Number of InventoryItems per variant and status.
+
+    Maintained in the same transaction as every status change, receive and
+    delete so stock questions never have to count the items table. The
+    reconcile_stock_counters command rebuilds it and reports drift.
+    """
+    product_variant = models.ForeignKey(ProductVariant, on_delete=models.CASCADE, related_name="stock_counters")
+    status = models.CharField(max_length=20, choices=InventoryItem.STATUS_CHOICES)
+    quantity = models.IntegerField(default=0)
+
+    objects = StockCounterQuerySet.as_manager()
+
+    class Meta:
+        unique_together = ('product_variant', 'status')
+        verbose_name = "Stock Counter"
+        verbose_name_plural = "Stock Counters"
 
     def __str__(self):
-        return f"{self.inventory_item} - {self.old_status} → {self.new_status}"
+        return f"{self.product_variant} - {self.status}: {self.quantity}"
+
+    @classmethod
+    def apply(cls, deltas, using='default'):
+        """
+        Add {(variant_id, status): delta} to the counters in one statement.
+
+        An upsert that adds to the stored value server side, the same as an
+        F('quantity') + delta update, but it also creates missing rows.
+        """
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        conn = connections[using]
+        table = conn.ops.quote_name(cls._meta.db_table)
+        keys = sorted(deltas)
+        sql = (
+            f"INSERT INTO {table} (product_variant_id, status, quantity) "
+            f"VALUES {', '.join(['(%s, %s, %s)'] * len(keys))} "
+            f"ON CONFLICT (product_variant_id, status) DO UPDATE "
+            f"SET quantity = {table}.quantity + EXCLUDED.quantity"
+        )
+        params = [value for key in keys for value in (key[0], key[1], deltas[key])]
+        with conn.cursor() as cursor:
+            cursor.execute(sql, params)
+
+
+class Sale(TimeStampedModel):
+    """A committed point of sale ticket; its units are InventoryItems marked sold"""
+    number = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    def __str__(self):
+        return self.number or f"Sale #{self.pk}"
+
+
+class SaleLine(models.Model):
+    sale = models.ForeignKey(Sale, on_delete=models.CASCADE, related_name="lines")
+    product_variant = models.ForeignKey(ProductVariant, on_delete=models.PROTECT, related_name="sale_lines")
+    quantity = models.PositiveIntegerField()
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    def __str__(self):
+        return f"{self.sale} - {self.product_variant}: {self.quantity} x {self.unit_price}"
@@ -0,0 +1,71 @@
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connection
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.functions import Upper
+from .models import ProductVariant
+
+
+def looks_like_barcode(query):
+    """Barcodes have no spaces and contain at least one digit"""
+    return ' ' not in query and any(char.isdigit() for char in query)
+
+
+def search_products(queryset, query):
+    """
+    Filter and rank a Product queryset for the sale screen search box.
+
+    Queries that look like barcodes are resolved first, without joining
+    variants: through the unique index on ProductVariant.barcode, then
+    case-insensitively through variant_barcode_upper_idx. Everything else,
+    and barcodes that match nothing, search names only: with the trigram
+    index on PostgreSQL and a plain icontains scan everywhere else.
+    """
+    query = query.strip()
+    if not query:
+        return queryset
+
+    if looks_like_barcode(query):
+        product_ids = _barcode_product_ids(query)
+        if product_ids:
+            return queryset.filter(pk__in=product_ids)
+
+    if connection.vendor == 'postgresql':
+        return _trigram_search(queryset, query)
+    return _basic_search(queryset, query)
+
+
+def _barcode_product_ids(query):
+    variants = ProductVariant.objects.values_list('product_id', flat=True)
+    product_ids = list(variants.filter(barcode__in={query, query.upper()}))
+    if product_ids:
+        return product_ids
+    # UPPER(barcode) = UPPER(query), written so it matches the expression index
+    return list(variants.alias(barcode_upper=Upper('barcode')).filter(barcode_upper=query.upper()))
+
+
+def _trigram_search(queryset, query):
+    # Both lookups go through UPPER(name) so they share one GIN index.
+    # trigram_similar is the % operator, bounded by pg_trgm.similarity_threshold
+    return queryset.alias(
+        name_upper=Upper('name'),
+    ).annotate(
+        search_rank=Case(
+            When(name__istartswith=query, then=Value(1.0)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        ) + TrigramSimilarity('name_upper', query.upper()),
+    ).filter(
+        Q(name__icontains=query) | Q(name_upper__trigram_similar=query.upper())
+    ).order_by('-search_rank', 'name', 'pk')
+
+
+def _basic_search(queryset, query):
+    return queryset.annotate(
+        search_rank=Case(
+            When(name__istartswith=query, then=Value(1.0)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        ),
+    ).filter(
+        name__icontains=query
+    ).order_by('-search_rank', 'name', 'pk')
@@ -0,0 +1,235 @@
+from collections import namedtuple
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils.timezone import now
+from .barcode_cache import invalidate_variants
+from .cart import CartLine
+from .events import items_changed
+from .models import (
+    RESERVATION_TTL, InventoryItem, InventorySequence, ProductVariant, Sale, SaleLine, StatusChangeLog,
+    StockCounter,
+)
+
+RECEIVE_BATCH_SIZE = 1000
+RESERVATION_SWEEP_BATCH_SIZE = 1000
+
+ReceiveLine = namedtuple(
+    'ReceiveLine',
+    ['product_variant_id', 'quantity', 'purchase_price', 'supplier_id', 'purchase_order_reference'],
+    defaults=[None, None],
+)
+
+
+def receive_items(product_variant, quantity, purchase_price, supplier=None,
+                  user=None, purchase_order_reference=None, notes=None,
+                  batch_size=RECEIVE_BATCH_SIZE):
+    """
+    Register `quantity` units of one variant arriving from a supplier.
+
+    Returns the created InventoryItems, all in the 'received' status.
+    """
+    line = ReceiveLine(
+        product_variant_id=product_variant.pk,
+        quantity=quantity,
+        purchase_price=purchase_price,
+        supplier_id=supplier.pk if supplier else None,
+        purchase_order_reference=purchase_order_reference,
+    )
+    return receive_lines([line], user=user, notes=notes, batch_size=batch_size)
+
+
+def receive_lines(lines, user=None, notes=None, batch_size=RECEIVE_BATCH_SIZE):
+    """
+    Bulk version of receiving for any number of ReceiveLines.
+
+    Everything happens in one transaction with a fixed number of statements
+    per batch: one id allocation for all variants, batched inserts for the
+    items and their StatusChangeLog rows, and batched stock updates.
+    """
+    lines = list(lines)
+    for line in lines:
+        if line.quantity <= 0:
+            raise ValidationError("Received quantity must be positive")
+
+    counts = {}
+    for line in lines:
+        counts[line.product_variant_id] = counts.get(line.product_variant_id, 0) + line.quantity
+
+    received_at = now()
+    created = []
+    with transaction.atomic():
+        blocks = {
+            variant_id: iter(block)
+            for variant_id, block in InventorySequence.allocate_many(counts).items()
+        }
+        pending = []
+        for line in lines:
+            sequential_ids = blocks[line.product_variant_id]
+            for _ in range(line.quantity):
+                pending.append(InventoryItem(
+                    product_variant_id=line.product_variant_id,
+                    sequential_id=next(sequential_ids),
+                    supplier_id=line.supplier_id,
+                    purchase_price=line.purchase_price,
+                    purchase_order_reference=line.purchase_order_reference,
+                    current_status='received',
+                    date_ordered=received_at,
+                    date_received=received_at,
+                ))
+                if len(pending) >= batch_size:
+                    created.extend(_insert_received(pending, user, notes))
+                    pending = []
+        if pending:
+            created.extend(_insert_received(pending, user, notes))
+
+        _add_stock(counts, batch_size)
+        StockCounter.apply({(variant_id, 'received'): count for variant_id, count in counts.items()})
+        items_changed.send(sender=InventoryItem, using='default', product_variant_ids=set(counts))
+        transaction.on_commit(lambda: invalidate_variants(list(counts)))
+    return created
+
+
+def commit_sale(lines, user=None):
+    """
+    Sell the units of a ticket: lines are cart.CartLines.
+
+    For each variant the oldest ready_for_sale units are claimed with
+    SELECT ... FOR UPDATE SKIP LOCKED, so concurrent checkouts of the same
+    variant take different rows instead of waiting on each other. Claimed
+    units go through 'reserved' to 'sold' with bulk status updates. Logs,
+    stock counters and variant stock are written in the same transaction.
+    Prices are read again from the database there: the ones on the cart
+    lines may come from a cache entry older than the last price change.
+    Raises ValidationError, and sells nothing, when a line cannot be filled.
+    """
+    lines = sorted((line for line in lines if line.quantity > 0), key=lambda line: line.product_variant.pk)
+    if not lines:
+        raise ValidationError("The sale has no products")
+
+    with transaction.atomic():
+        prices = dict(ProductVariant.objects.filter(
+            pk__in=[line.product_variant.pk for line in lines],
+        ).values_list('pk', 'product__price'))
+        lines = [
+            CartLine(line.product_variant, line.quantity, prices[line.product_variant.pk],
+                     prices[line.product_variant.pk] * line.quantity)
+            for line in lines
+        ]
+        sale = Sale.objects.create(user=user, total=sum(line.subtotal for line in lines))
+        sale.number = f"V-{sale.pk:08d}"
+        sale.save(update_fields=['number'])
+
+        picked = []
+        for line in lines:
+            units = _claim_units(line.product_variant, line.quantity)
+            InventoryItem.objects.filter(pk__in=[unit.pk for unit in units]).update(
+                sale_price=line.unit_price, invoice_number=sale.number,
+            )
+            for unit in units:
+                unit.sale_price, unit.invoice_number = line.unit_price, sale.number
+            picked.extend(units)
+
+        InventoryItem.objects.bulk_update_status(picked, 'reserved', user=user, notes=sale.number)
+        InventoryItem.objects.bulk_update_status(picked, 'sold', user=user, notes=sale.number)
+        SaleLine.objects.bulk_create([
+            SaleLine(sale=sale, product_variant=line.product_variant,
+                     quantity=line.quantity, unit_price=line.unit_price)
+            for line in lines
+        ])
+        counts = {line.product_variant.pk: -line.quantity for line in lines}
+        _add_stock(counts, RECEIVE_BATCH_SIZE)
+        transaction.on_commit(lambda: invalidate_variants(list(counts)))
+    return sale
+
+
+def reserve_items(product_variant, quantity, ttl=RESERVATION_TTL, user=None, notes=None):
+    """
+    Hold the oldest `quantity` sellable units of a variant for `ttl`.
+
+    Units are claimed the same way as in commit_sale. Reservations that are
+    not sold in time are put back on sale by release_expired_reservations.
+    Returns the reserved InventoryItems.
+    """
+    with transaction.atomic():
+        units = _claim_units(product_variant, quantity)
+        InventoryItem.objects.bulk_update_status(
+            units, 'reserved', user=user, notes=notes, reserved_until=now() + ttl,
+        )
+    return units
+
+
+def release_expired_reservations(as_of=None, batch_size=RESERVATION_SWEEP_BATCH_SIZE):
+    """
+    Put reservations that expired before `as_of` back to 'ready_for_sale'.
+
+    Reservations without an expiry (made before reserved_until existed, or
+    by a direct UPDATE) count as expired and are released first. The rest
+    are read from inventoryitem_expiry_idx in expiry order. Each batch is
+    its own transaction, so locks stay short and a sweeper running next to
+    cashiers skips rows they are holding. Returns the number of released
+    items.
+    """
+    as_of = as_of or now()
+    reserved = InventoryItem.objects.filter(current_status='reserved').for_stock()
+    return (
+        _release_batches(reserved.filter(reserved_until__isnull=True).order_by(), batch_size)
+        + _release_batches(reserved.filter(reserved_until__lt=as_of).order_by('reserved_until'), batch_size)
+    )
+
+
+def _release_batches(queryset, batch_size):
+    released = 0
+    while True:
+        with transaction.atomic():
+            batch = list(queryset.select_for_update(skip_locked=True)[:batch_size])
+            if not batch:
+                return released
+            result = InventoryItem.objects.bulk_update_status(
+                batch, 'ready_for_sale', notes="Reservation expired",
+            )
+            released += len(result.updated)
+        if len(batch) < batch_size:
+            return released
+
+
+def _claim_units(product_variant, quantity):
+    # Oldest ready units first; rows locked by another checkout are skipped
+    units = list(InventoryItem.objects.filter(
+        product_variant=product_variant, current_status='ready_for_sale',
+    ).for_stock().order_by('sequential_id').select_for_update(skip_locked=True)[:quantity])
+    if len(units) < quantity:
+        raise ValidationError(
+            f"Only {len(units)} of {quantity} units of {product_variant} are available"
+        )
+    return units
+
+
+def _add_stock(counts, batch_size):
+    # One UPDATE per batch of variants instead of one per variant
+    counts = list(counts.items())
+    for start in range(0, len(counts), batch_size):
+        batch = counts[start:start + batch_size]
+        ProductVariant.objects.filter(pk__in=[pk for pk, _ in batch]).update(
+            stock=F('stock') + Case(
+                *[When(pk=pk, then=Value(count)) for pk, count in batch],
+                output_field=IntegerField(),
+            )
+        )
+
+
+def _insert_received(items, user, notes):
+    items = InventoryItem.objects.bulk_create(items)
+    for item in items:
+        item._remember_stock_key()
+    StatusChangeLog.objects.bulk_create([
+        StatusChangeLog(
+            inventory_item=item,
+            old_status='ordered',
+            new_status='received',
+            changed_by=user,
+            notes=notes,
+        )
+        for item in items
+    ])
+    return items
@@ -0,0 +1,41 @@
+# inventory/signals/handlers.py
+
+from django.db.models import F
+from ..barcode_cache import barcode_cache
+from ..catalog_cache import STOCK_SCOPE, bump_catalog
+from ..events import items_changed
+from ..models import ProductVariant, StockCounter
+
+def remember_previous_barcode(sender, instance, **kwargs):
+    # A renamed barcode must also drop the entry cached under the old value
+    if instance.pk:
+        instance._previous_barcode = ProductVariant.objects.filter(
+            pk=instance.pk
+        ).values_list('barcode', flat=True).first()
+
+def invalidate_variant_barcode(sender, instance, **kwargs):
+    barcode_cache.invalidate([
+        instance.barcode,
+        getattr(instance, '_previous_barcode', None),
+    ])
+
+def invalidate_product_barcodes(sender, instance, **kwargs):
+    barcode_cache.invalidate(list(
+        ProductVariant.objects.filter(product=instance).values_list('barcode', flat=True)
+    ))
+
+def bump_catalog_generation(sender, **kwargs):
+    # One incr per model; every cached entry built from the old generation is orphaned
+    bump_catalog(sender._meta.label_lower)
+
+def bump_stock_generation(sender, **kwargs):
+    bump_catalog(STOCK_SCOPE)
+
+def release_item_stock(sender, instance, **kwargs):
+    # Plain UPDATE: a cascading variant delete may already have removed the row
+    StockCounter.objects.filter(
+        product_variant_id=instance.product_variant_id,
+        status=instance.current_status,
+    ).update(quantity=F('quantity') - 1)
+    items_changed.send(sender=sender, using=kwargs.get('using', 'default'),
+                       product_variant_ids={instance.product_variant_id})
@@ -0,0 +1,50 @@
+# inventory/signals/receivers.py
+
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from ..events import items_changed
+from ..models import Brand, InventoryItem, Product, ProductVariant
+from .handlers import (
+    remember_previous_barcode,
+    invalidate_variant_barcode,
+    invalidate_product_barcodes,
+    release_item_stock,
+    bump_catalog_generation,
+    bump_stock_generation,
+)
+
+@receiver(pre_save, sender=ProductVariant)
+def on_variant_saving(sender, instance, **kwargs):
+    remember_previous_barcode(sender, instance, **kwargs)
+
+@receiver(post_save, sender=ProductVariant)
+def on_variant_saved(sender, instance, **kwargs):
+    invalidate_variant_barcode(sender, instance, **kwargs)
+    bump_catalog_generation(sender, **kwargs)
+
+@receiver(post_delete, sender=ProductVariant)
+def on_variant_deleted(sender, instance, **kwargs):
+    invalidate_variant_barcode(sender, instance, **kwargs)
+    bump_catalog_generation(sender, **kwargs)
+
+@receiver(post_save, sender=Product)
+def on_product_saved(sender, instance, **kwargs):
+    invalidate_product_barcodes(sender, instance, **kwargs)
+    bump_catalog_generation(sender, **kwargs)
+
+@receiver(post_delete, sender=Product)
+def on_product_deleted(sender, instance, **kwargs):
+    bump_catalog_generation(sender, **kwargs)
+
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+def on_brand_changed(sender, instance, **kwargs):
+    bump_catalog_generation(sender, **kwargs)
+
+@receiver(items_changed)
+def on_items_changed(sender, **kwargs):
+    bump_stock_generation(sender, **kwargs)
+
+@receiver(post_delete, sender=InventoryItem)
+def on_item_deleted(sender, instance, **kwargs):
+    release_item_stock(sender, instance, **kwargs)
@@ -0,0 +1,62 @@
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+_NO_TARGETS = frozenset()
+
+
+class StatusMachine:
+    """
+    InventoryItem's transition rules compiled once into lookup tables.
+
+    Every status gets a bit; for each target status the machine keeps the
+    frozenset and the bitmask of statuses allowed to move into it, plus the
+    name of the date field stamped on arrival. Checks are then a set or
+    bit test with no per-call allocation.
+    """
+
+    def __init__(self, choices, rules, date_field_prefix='date_'):
+        self.statuses = tuple(status for status, _ in choices)
+        self.labels = dict(choices)
+        self.valid = frozenset(self.statuses)
+        self.bits = {status: 1 << index for index, status in enumerate(self.statuses)}
+        self.targets = {status: frozenset(rules.get(status, ())) for status in self.statuses}
+        self.sources = {
+            target: frozenset(status for status in self.statuses if target in self.targets[status])
+            for target in self.statuses
+        }
+        self.source_masks = {
+            target: sum(self.bits[status] for status in sources)
+            for target, sources in self.sources.items()
+        }
+        self.date_fields = {status: f"{date_field_prefix}{status}" for status in self.statuses}
+
+    def can_transition(self, old_status, new_status):
+        return new_status in self.targets.get(old_status, _NO_TARGETS)
+
+    def validate(self, old_status, new_status):
+        """Raise ValidationError unless old_status → new_status is allowed"""
+        if new_status not in self.valid:
+            raise ValidationError(f"Invalid status: {new_status}")
+        if new_status not in self.targets.get(old_status, _NO_TARGETS):
+            raise ValidationError(f"Cannot change status from {old_status} to {new_status}")
+
+    def mask(self, statuses):
+        """Bitmask with the bit of every status in `statuses` set"""
+        bits = self.bits
+        return sum(bits[status] for status in set(statuses))
+
+    def allowed(self, statuses, new_status):
+        """
+        Vectorized check: one bool per entry of `statuses`, True when that
+        status may move to `new_status`.
+        """
+        if new_status not in self.valid:
+            raise ValidationError(f"Invalid status: {new_status}")
+        mask, bits = self.source_masks[new_status], self.bits
+        return [bool(bits.get(status, 0) & mask) for status in statuses]
+
+    def filter_q(self, new_status, field='current_status'):
+        """The same check as a SQL filter: rows that may move to `new_status`"""
+        if new_status not in self.valid:
+            raise ValidationError(f"Invalid status: {new_status}")
+        return Q(**{f"{field}__in": sorted(self.sources[new_status])})
@@ -1,12 +1,30 @@
+import threading
+from io import StringIO
+import unittest
 from django.test import TestCase
 from django.test import SimpleTestCase
+from django.test import TransactionTestCase
 from inventory.models import Product, Brand, ProductVariant, InventoryItem
+from inventory.models import InventoryItemDetails, InventorySequence, Sale, StatusChangeLog, StatusChangeLogArchive, StockCounter
+from inventory.services import commit_sale, receive_items, release_expired_reservations, reserve_items
+from inventory.cart import Cart, CartLine
 from srm.models import Supplier 
 from django.urls import reverse, resolve
 from django.core.exceptions import ValidationError
+from datetime import timedelta
 from decimal import Decimal
 from django.utils import timezone
 from django.contrib.auth.models import User 
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from inventory.views import PRODUCT_LIST_PAGE_SIZE
+from inventory.search import search_products
+from inventory.barcode_cache import barcode_cache, BarcodeCache
+from inventory.catalog_cache import get_product, get_variant_by_barcode, listing_cache
+from django.core.cache import cache
+from unittest import mock
+from inventory import fragments
 
 class BrandTest(TestCase):
     def test_create_brand(self):
@@ -159,6 +177,127 @@ class ProductListViewTest(TestCase):
         )
         self.assertTemplateUsed(response, 'table.html')
 
+    def _count_list_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('product_list'), HTTP_HX_REQUEST='true')
+        return len(ctx.captured_queries)
+
+    def _create_products(self, count):
+        for i in range(count):
+            product = Product.objects.create(name=f"Producto {i:03d}", price=1)
+            ProductVariant.objects.create(product=product, barcode=f"QC{product.pk}", stock=2)
+
+    def test_product_list_query_count_does_not_grow(self):
+        self._create_products(3)
+        small = self._count_list_queries()
+        self._create_products(30)
+        self.assertEqual(self._count_list_queries(), small)
+
+    def test_product_list_shows_stock_total(self):
+        product = Product.objects.create(name="Serrucho", price=1)
+        ProductVariant.objects.create(product=product, barcode="S1", stock=3)
+        ProductVariant.objects.create(product=product, barcode="S2", stock=4)
+
+        response = self.client.get(reverse('product_list'), {'q': 'S1'})
+        self.assertEqual(response.context['products'][0].total_stock, 7)
+
+    def test_product_list_is_paginated(self):
+        self._create_products(PRODUCT_LIST_PAGE_SIZE + 5)
+
+        response = self.client.get(reverse('product_list'))
+        self.assertEqual(len(response.context['products']), PRODUCT_LIST_PAGE_SIZE)
+        response = self.client.get(reverse('product_list'), {'page': 2})
+        self.assertEqual(len(response.context['products']), 5)
+
+class ProductSearchTest(TestCase):
+    def setUp(self):
+        self.hammer = Product.objects.create(name="Martillo", price=1)
+        self.box = Product.objects.create(name="Caja para Martillo", price=1)
+        ProductVariant.objects.create(product=self.hammer, barcode="750ABC1")
+
+    def test_prefix_matches_rank_first(self):
+        results = list(search_products(Product.objects.all(), "mart"))
+        self.assertEqual(results, [self.hammer, self.box])
+
+    def test_barcode_fast_path_is_case_insensitive(self):
+        results = list(search_products(Product.objects.all(), "750abc1"))
+        self.assertEqual(results, [self.hammer])
+
+    def test_mixed_case_barcode_found_on_every_backend(self):
+        # Neither the query nor its upper case is stored, so the name search must match it
+        drill = Product.objects.create(name="Taladro", price=1)
+        ProductVariant.objects.create(product=drill, barcode="750xYz2")
+        results = list(search_products(Product.objects.all(), "750XyZ2"))
+        self.assertEqual(results, [drill])
+
+    def test_name_search_does_not_touch_barcodes(self):
+        with CaptureQueriesContext(connection) as ctx:
+            list(search_products(Product.objects.all(), "martillo"))
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn('barcode', ctx.captured_queries[0]['sql'])
+
+    def test_barcode_fast_path_skips_variant_join(self):
+        with CaptureQueriesContext(connection) as ctx:
+            list(search_products(Product.objects.all(), "750ABC1"))
+        self.assertNotIn('JOIN', ctx.captured_queries[-1]['sql'])
+
+    def test_empty_query_returns_queryset_unchanged(self):
+        self.assertEqual(search_products(Product.objects.all(), "  ").count(), 2)
+
+class BarcodeLookupTest(TestCase):
+    def setUp(self):
+        barcode_cache.clear()
+        self.product = Product.objects.create(name="Taladro", price=Decimal("199.99"))
+        self.brand = Brand.objects.create(name="Makita")
+        self.variant = ProductVariant.objects.create(
+            product=self.product, brand=self.brand, barcode="7501", stock=4
+        )
+
+    def test_lookup_returns_compact_payload(self):
+        response = self.client.get(reverse('barcode_lookup', args=["7501"]))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['variant']['id'], self.variant.pk)
+        self.assertEqual(data['product']['name'], "Taladro")
+        self.assertEqual(data['price'], "199.99")
+        self.assertEqual(data['stock'], 4)
+
+    def test_unknown_barcode_returns_404(self):
+        response = self.client.get(reverse('barcode_lookup', args=["0000"]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_warm_lookup_skips_database(self):
+        self.client.get(reverse('barcode_lookup', args=["7501"]))
+        with self.assertNumQueries(0):
+            self.client.get(reverse('barcode_lookup', args=["7501"]))
+
+    def test_variant_save_invalidates_cache(self):
+        self.client.get(reverse('barcode_lookup', args=["7501"]))
+        self.variant.stock = 9
+        self.variant.save()
+        response = self.client.get(reverse('barcode_lookup', args=["7501"]))
+        self.assertEqual(response.json()['stock'], 9)
+
+    def test_barcode_change_invalidates_old_entry(self):
+        self.client.get(reverse('barcode_lookup', args=["7501"]))
+        self.variant.barcode = "7502"
+        self.variant.save()
+        response = self.client.get(reverse('barcode_lookup', args=["7501"]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_product_save_invalidates_cache(self):
+        self.client.get(reverse('barcode_lookup', args=["7501"]))
+        self.product.price = Decimal("150.00")
+        self.product.save()
+        response = self.client.get(reverse('barcode_lookup', args=["7501"]))
+        self.assertEqual(response.json()['price'], "150.00")
+
+    def test_local_cache_is_bounded(self):
+        lru = BarcodeCache(maxsize=2)
+        for code in ["a", "b", "c"]:
+            lru._store_local(code, {'code': code})
+        self.assertEqual(list(lru._entries), ["b", "c"])
+
 class InventoryItemCase(TestCase):
     def setUp(self):
         self.user = User.objects.create_user('testuser', 'test@example.com', 'password')
@@ -353,3 +492,757 @@ class InventoryItemCase(TestCase):
         self.assertTrue(item.is_in_stock)
         self.assertFalse(item.is_shipped)
 
+
+
+class InventorySequenceTest(TestCase):
+    def setUp(self):
+        product = Product.objects.create(name="pala", price="40")
+        self.variant = ProductVariant.objects.create(product=product, barcode="SEQ1")
+        self.other = ProductVariant.objects.create(product=product, barcode="SEQ2")
+
+    def test_allocate_returns_consecutive_blocks(self):
+        self.assertEqual(InventorySequence.allocate(self.variant.pk, 3), range(1, 4))
+        self.assertEqual(InventorySequence.allocate(self.variant.pk, 2), range(4, 6))
+        self.assertEqual(InventorySequence.allocate(self.other.pk), range(1, 2))
+
+    def test_allocate_many_is_one_statement(self):
+        with self.assertNumQueries(1):
+            blocks = InventorySequence.allocate_many({self.variant.pk: 10, self.other.pk: 5})
+        self.assertEqual(blocks, {self.variant.pk: range(1, 11), self.other.pk: range(1, 6)})
+
+    def test_save_assigns_next_sequential_id(self):
+        InventorySequence.allocate(self.variant.pk, 4)
+        with CaptureQueriesContext(connection) as ctx:
+            item = InventoryItem.objects.create(product_variant=self.variant, purchase_price=1)
+        self.assertEqual(item.sequential_id, 5)
+        self.assertFalse(any('MAX(' in query['sql'].upper() for query in ctx.captured_queries))
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', "needs concurrent writers")
+class InventorySequenceConcurrencyTest(TransactionTestCase):
+    THREADS = 8
+    ITEMS_PER_THREAD = 25
+
+    def test_concurrent_inserts_do_not_collide(self):
+        product = Product.objects.create(name="pala", price="40")
+        variant = ProductVariant.objects.create(product=product, barcode="SEQ-STRESS")
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(self.ITEMS_PER_THREAD):
+                    InventoryItem.objects.create(product_variant=variant, purchase_price=1)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        ids = list(InventoryItem.objects.filter(product_variant=variant).values_list('sequential_id', flat=True))
+        self.assertEqual(len(ids), self.THREADS * self.ITEMS_PER_THREAD)
+        self.assertEqual(len(set(ids)), len(ids))
+
+
+class BulkReceiveTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('receiver', 'r@example.com', 'password')
+        self.supplier = Supplier.objects.create(name="BLG")
+        product = Product.objects.create(name="pala", price="40")
+        self.variant = ProductVariant.objects.create(product=product, barcode="RCV1", stock=2)
+
+    def test_receive_items_creates_received_units(self):
+        items = receive_items(self.variant, 25, Decimal("12.50"), supplier=self.supplier, user=self.user)
+
+        self.assertEqual(len(items), 25)
+        self.assertEqual([item.sequential_id for item in items], list(range(1, 26)))
+        received = InventoryItem.objects.filter(product_variant=self.variant)
+        self.assertEqual(received.filter(current_status='received', supplier=self.supplier).count(), 25)
+        self.assertEqual(StatusChangeLog.objects.filter(new_status='received', changed_by=self.user).count(), 25)
+        self.variant.refresh_from_db()
+        self.assertEqual(self.variant.stock, 27)
+
+    def test_receive_items_continues_existing_sequence(self):
+        InventoryItem.objects.create(product_variant=self.variant, purchase_price=1)
+        items = receive_items(self.variant, 3, Decimal("1.00"))
+        self.assertEqual([item.sequential_id for item in items], [2, 3, 4])
+
+    def test_query_count_does_not_depend_on_quantity(self):
+        with CaptureQueriesContext(connection) as small:
+            receive_items(self.variant, 5, Decimal("1.00"), batch_size=100)
+        with CaptureQueriesContext(connection) as large:
+            receive_items(self.variant, 30, Decimal("1.00"), batch_size=100)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_rejects_non_positive_quantity(self):
+        with self.assertRaises(ValidationError):
+            receive_items(self.variant, 0, Decimal("1.00"))
+
+    def test_bulk_receive_endpoint(self):
+        self.client.force_login(User.objects.create_user('clerk', 'k@example.com', 'password', is_staff=True))
+        response = self.client.post(reverse('bulk_receive'), {
+            'product_variant': self.variant.pk,
+            'quantity': 10,
+            'purchase_price': '3.25',
+            'supplier': self.supplier.pk,
+            'purchase_order_reference': 'PO-1',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['received'], 10)
+        self.assertEqual(InventoryItem.objects.filter(purchase_order_reference='PO-1').count(), 10)
+
+    def test_bulk_receive_endpoint_is_staff_only(self):
+        data = {'product_variant': self.variant.pk, 'quantity': 10, 'purchase_price': '3.25'}
+        response = self.client.post(reverse('bulk_receive'), data)
+        self.assertEqual(response.status_code, 302)
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('bulk_receive'), data)
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(InventoryItem.objects.filter(product_variant=self.variant).exists())
+
+    def test_bulk_receive_endpoint_validates_input(self):
+        self.client.force_login(User.objects.create_user('clerk', 'k@example.com', 'password', is_staff=True))
+        response = self.client.post(reverse('bulk_receive'), {
+            'product_variant': self.variant.pk,
+            'quantity': 0,
+            'purchase_price': '-1',
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('quantity', response.json()['errors'])
+
+
+class BulkUpdateStatusTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('shipper', 's@example.com', 'password')
+        product = Product.objects.create(name="pala", price="40")
+        self.variant = ProductVariant.objects.create(product=product, barcode="BUS1")
+
+    def _items(self, count, status='sold'):
+        receive_items(self.variant, count, Decimal("1.00"))
+        items = list(InventoryItem.objects.filter(product_variant=self.variant, current_status='received'))
+        InventoryItem.objects.filter(pk__in=[item.pk for item in items]).update(current_status=status)
+        for item in items:
+            item.current_status = status
+        return items
+
+    def test_updates_status_date_and_logs(self):
+        items = self._items(5)
+        result = InventoryItem.objects.bulk_update_status(items, 'shipped', user=self.user, notes="Order 7")
+
+        self.assertEqual(len(result.updated), 5)
+        self.assertEqual(result.failed, {})
+        shipped = InventoryItem.objects.filter(current_status='shipped', date_shipped__isnull=False)
+        self.assertEqual(shipped.count(), 5)
+        logs = StatusChangeLog.objects.filter(new_status='shipped', old_status='sold', notes="Order 7")
+        self.assertEqual(logs.filter(changed_by=self.user).count(), 5)
+
+    def test_invalid_transitions_are_reported_per_item(self):
+        items = self._items(3)
+        blocked = self._items(1, status='ordered')[0]
+
+        result = InventoryItem.objects.bulk_update_status(items + [blocked], 'shipped')
+
+        self.assertEqual(len(result.updated), 3)
+        self.assertEqual(list(result.failed), [blocked.pk])
+        blocked.refresh_from_db()
+        self.assertEqual(blocked.current_status, 'ordered')
+        self.assertFalse(StatusChangeLog.objects.filter(inventory_item=blocked, new_status='shipped').exists())
+
+    def test_rows_changed_since_loading_are_reported_not_overwritten(self):
+        items = self._items(3)
+        stale = items[0]
+        InventoryItem.objects.filter(pk=stale.pk).update(current_status='returned')
+        before = dict(StockCounter.objects.filter(product_variant=self.variant).values_list('status', 'quantity'))
+
+        result = InventoryItem.objects.bulk_update_status(items, 'shipped')
+
+        self.assertEqual([item.pk for item in result.updated], [item.pk for item in items[1:]])
+        self.assertEqual(list(result.failed), [stale.pk])
+        self.assertEqual(stale.current_status, 'sold')
+        stale.refresh_from_db()
+        self.assertEqual((stale.current_status, stale.date_shipped), ('returned', None))
+        self.assertFalse(StatusChangeLog.objects.filter(inventory_item=stale, new_status='shipped').exists())
+        after = dict(StockCounter.objects.filter(product_variant=self.variant).values_list('status', 'quantity'))
+        self.assertEqual(after['shipped'] - before.get('shipped', 0), 2)
+
+    def test_existing_status_date_is_kept(self):
+        item = self._items(1, status='returned')[0]
+        first_ready = timezone.now() - timezone.timedelta(days=3)
+        InventoryItem.objects.filter(pk=item.pk).update(date_ready_for_sale=first_ready)
+        item.date_ready_for_sale = first_ready
+
+        InventoryItem.objects.bulk_update_status([item], 'ready_for_sale')
+        item.refresh_from_db()
+        self.assertEqual(item.date_ready_for_sale, first_ready)
+
+    def test_query_count_does_not_depend_on_batch_size(self):
+        small = self._items(2)
+        large = self._items(20)
+        with CaptureQueriesContext(connection) as small_ctx:
+            InventoryItem.objects.bulk_update_status(small, 'shipped')
+        with CaptureQueriesContext(connection) as large_ctx:
+            InventoryItem.objects.bulk_update_status(large, 'shipped')
+        self.assertEqual(len(small_ctx.captured_queries), len(large_ctx.captured_queries))
+
+    def test_unknown_status_raises(self):
+        with self.assertRaises(ValidationError):
+            InventoryItem.objects.bulk_update_status(self._items(1), 'lost')
+
+
+class StockCounterTest(TestCase):
+    def setUp(self):
+        product = Product.objects.create(name="pala", price="40")
+        self.variant = ProductVariant.objects.create(product=product, barcode="CNT1")
+
+    def _counts(self):
+        return dict(
+            StockCounter.objects.filter(product_variant=self.variant)
+            .exclude(quantity=0).values_list('status', 'quantity')
+        )
+
+    def test_receive_and_transitions_maintain_counters(self):
+        items = receive_items(self.variant, 4, Decimal("1.00"))
+        self.assertEqual(self._counts(), {'received': 4})
+
+        InventoryItem.objects.bulk_update_status(items, 'quality_check')
+        InventoryItem.objects.bulk_update_status(items[:3], 'ready_for_sale')
+        items[0].update_status('reserved')
+        self.assertEqual(self._counts(), {'quality_check': 1, 'ready_for_sale': 2, 'reserved': 1})
+        self.assertEqual(StockCounter.objects.on_hand(), {self.variant.pk: 3})
+
+    def test_create_and_delete_maintain_counters(self):
+        item = InventoryItem.objects.create(product_variant=self.variant, purchase_price=1)
+        InventoryItem.objects.create(product_variant=self.variant, purchase_price=1)
+        self.assertEqual(self._counts(), {'ordered': 2})
+        item.delete()
+        self.assertEqual(self._counts(), {'ordered': 1})
+
+    def test_direct_status_edit_on_loaded_item_is_counted(self):
+        InventoryItem.objects.create(product_variant=self.variant, purchase_price=1)
+        item = InventoryItem.objects.get(product_variant=self.variant)
+        item.current_status = 'discarded'
+        item.save()
+        self.assertEqual(self._counts(), {'discarded': 1})
+
+    def test_status_edit_on_deferred_item_is_counted(self):
+        InventoryItem.objects.create(product_variant=self.variant, purchase_price=1)
+        for queryset in (InventoryItem.objects.only('pk'), InventoryItem.objects.defer('current_status')):
+            item = queryset.get()
+            item.current_status = 'received' if item.current_status == 'ordered' else 'quality_check'
+            item.save()
+        self.assertEqual(self._counts(), {'quality_check': 1})
+
+    def test_save_without_status_leaves_counters_alone(self):
+        InventoryItem.objects.create(product_variant=self.variant, purchase_price=1)
+        item = InventoryItem.objects.get(product_variant=self.variant)
+        item.current_status, item.location_in_warehouse = 'discarded', 'B2'
+        item.save(update_fields=['location_in_warehouse'])
+        self.assertEqual(self._counts(), {'ordered': 1})
+        # The status edit is still pending and is counted when it is written
+        item.save(update_fields=['current_status'])
+        self.assertEqual(self._counts(), {'discarded': 1})
+
+    def test_reconcile_command_reports_and_fixes_drift(self):
+        receive_items(self.variant, 3, Decimal("1.00"))
+        StockCounter.objects.filter(product_variant=self.variant).update(quantity=7)
+
+        out = StringIO()
+        call_command('reconcile_stock_counters', '--dry-run', stdout=out)
+        self.assertIn("counter 7, items 3", out.getvalue())
+        self.assertEqual(self._counts(), {'received': 7})
+
+        call_command('reconcile_stock_counters', stdout=StringIO())
+        self.assertEqual(self._counts(), {'received': 3})
+
+
+def _ready_units(variant, count):
+    items = receive_items(variant, count, Decimal("5.00"))
+    for status in ('quality_check', 'ready_for_sale'):
+        InventoryItem.objects.bulk_update_status(items, status)
+    return items
+
+
+class CartTest(TestCase):
+    def setUp(self):
+        product = Product.objects.create(name="pala", price="40")
+        self.variant = ProductVariant.objects.create(product=product, barcode="CART1")
+
+    def test_add_accumulates_and_prices_from_product(self):
+        session = {}
+        cart = Cart(session)
+        cart.add(self.variant.pk, 2)
+        cart.add(self.variant.pk)
+        self.assertEqual(session, {Cart.SESSION_KEY: {str(self.variant.pk): 3}})
+        lines = cart.lines()
+        self.assertEqual([(line.quantity, line.subtotal) for line in lines], [(3, Decimal("120.00"))])
+        self.assertEqual(Cart.total(lines), Decimal("120.00"))
+
+    def test_scanned_barcode_is_added_through_the_view(self):
+        response = self.client.post(reverse('cart_add'), {'barcode': 'cart1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Cart(self.client.session).quantities(), {self.variant.pk: 1})
+
+    def test_unknown_barcode_is_rejected(self):
+        response = self.client.post(reverse('cart_add'), {'barcode': 'NOPE'})
+        self.assertEqual(response.status_code, 400)
+
+
+class CommitSaleTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('cashier', 'c@example.com', 'password')
+        product = Product.objects.create(name="pala", price="40")
+        self.variant = ProductVariant.objects.create(product=product, barcode="SALE1")
+        self.units = _ready_units(self.variant, 6)
+
+    def _line(self, quantity):
+        return CartLine(self.variant, quantity, Decimal("40.00"), Decimal("40.00") * quantity)
+
+    def test_sells_oldest_units_first(self):
+        sale = commit_sale([self._line(4)], user=self.user)
+        sold = InventoryItem.objects.filter(current_status='sold').order_by('sequential_id')
+        self.assertEqual([item.sequential_id for item in sold], [1, 2, 3, 4])
+        self.assertTrue(all(item.invoice_number == sale.number for item in sold))
+        self.assertEqual(sale.total, Decimal("160.00"))
+        self.assertEqual(list(sale.lines.values_list('quantity', flat=True)), [4])
+
+    def test_reserve_and_sell_are_logged_and_counted(self):
+        commit_sale([self._line(4)], user=self.user)
+        logs = StatusChangeLog.objects.filter(new_status__in=['reserved', 'sold'], changed_by=self.user)
+        self.assertEqual(logs.count(), 8)
+        self.assertEqual(StockCounter.objects.on_hand([self.variant.pk]), {self.variant.pk: 2})
+        self.assertEqual(
+            StockCounter.objects.get(product_variant=self.variant, status='sold').quantity, 4)
+        self.variant.refresh_from_db()
+        self.assertEqual(self.variant.stock, 2)
+
+    def test_short_stock_sells_nothing(self):
+        with self.assertRaises(ValidationError):
+            commit_sale([self._line(7)])
+        self.assertFalse(InventoryItem.objects.filter(current_status='sold').exists())
+        self.assertFalse(Sale.objects.exists())
+
+    def test_charges_the_current_price_not_the_cart_price(self):
+        # A change made by another process does not reach this process's cache
+        Product.objects.filter(pk=self.variant.product_id).update(price="45")
+        sale = commit_sale([self._line(2)])
+        self.assertEqual(sale.total, Decimal("90.00"))
+        self.assertEqual(sale.lines.get().unit_price, Decimal("45.00"))
+        self.assertEqual(
+            set(InventoryItem.objects.filter(current_status='sold').values_list('sale_price', flat=True)),
+            {Decimal("45.00")})
+
+    def test_query_count_does_not_depend_on_units(self):
+        with CaptureQueriesContext(connection) as small:
+            commit_sale([self._line(1)])
+        with CaptureQueriesContext(connection) as large:
+            commit_sale([self._line(5)])
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_save_invoice_view_clears_the_cart(self):
+        self.client.force_login(self.user)
+        self.client.post(reverse('cart_add'), {'barcode': 'SALE1', 'quantity': 2})
+        response = self.client.post(reverse('sale_commit'))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Sale.objects.get().user, self.user)
+        self.assertEqual(Cart(self.client.session).quantities(), {})
+
+    def test_save_invoice_view_reports_short_stock(self):
+        self.client.post(reverse('cart_add'), {'barcode': 'SALE1', 'quantity': 9})
+        response = self.client.post(reverse('sale_commit'))
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Cart(self.client.session).quantities(), {self.variant.pk: 9})
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', "needs concurrent writers")
+class CommitSaleConcurrencyTest(TransactionTestCase):
+    CASHIERS = 12
+    UNITS_PER_SALE = 3
+
+    def test_parallel_checkouts_on_one_variant(self):
+        product = Product.objects.create(name="pala", price="40")
+        variant = ProductVariant.objects.create(product=product, barcode="SALE-STRESS")
+        # One sale more than the stock can cover
+        _ready_units(variant, (self.CASHIERS - 1) * self.UNITS_PER_SALE)
+        line = CartLine(variant, self.UNITS_PER_SALE, Decimal("40.00"), Decimal("120.00"))
+        start = threading.Barrier(self.CASHIERS)
+        sold, rejected, errors = [], [], []
+
+        def cashier():
+            try:
+                start.wait()
+                sold.append(commit_sale([line]))
+            except ValidationError:
+                rejected.append(True)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=cashier) for _ in range(self.CASHIERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(sold) + len(rejected), self.CASHIERS)
+        sold_units = InventoryItem.objects.filter(product_variant=variant, current_status='sold')
+        self.assertEqual(sold_units.count(), len(sold) * self.UNITS_PER_SALE)
+        self.assertEqual(sold_units.values('invoice_number').distinct().count(), len(sold))
+        self.assertEqual(
+            StockCounter.objects.get(product_variant=variant, status='sold').quantity,
+            sold_units.count(),
+        )
+
+
+class ReservationTest(TestCase):
+    def setUp(self):
+        product = Product.objects.create(name="pala", price="40")
+        self.variant = ProductVariant.objects.create(product=product, barcode="RES1")
+        _ready_units(self.variant, 10)
+
+    def test_reserve_stamps_expiry(self):
+        units = reserve_items(self.variant, 3, ttl=timedelta(minutes=5))
+        self.assertEqual([unit.sequential_id for unit in units], [1, 2, 3])
+        reserved = InventoryItem.objects.filter(current_status='reserved')
+        self.assertEqual(reserved.count(), 3)
+        self.assertTrue(all(item.reserved_until > timezone.now() for item in reserved))
+
+    def test_selling_clears_expiry(self):
+        units = reserve_items(self.variant, 2)
+        InventoryItem.objects.bulk_update_status(units, 'sold')
+        self.assertFalse(InventoryItem.objects.filter(reserved_until__isnull=False).exists())
+
+    def test_sweeper_releases_only_expired(self):
+        reserve_items(self.variant, 4, ttl=timedelta(minutes=-1))
+        reserve_items(self.variant, 2, ttl=timedelta(minutes=30))
+        released = release_expired_reservations(batch_size=3)
+        self.assertEqual(released, 4)
+        self.assertEqual(InventoryItem.objects.filter(current_status='reserved').count(), 2)
+        self.assertEqual(StockCounter.objects.get(product_variant=self.variant, status='reserved').quantity, 2)
+        self.assertEqual(
+            StatusChangeLog.objects.filter(old_status='reserved', notes="Reservation expired").count(), 4)
+
+    def test_update_status_reservation_expires(self):
+        item = InventoryItem.objects.filter(current_status='ready_for_sale').first()
+        item.update_status('reserved')
+        self.assertGreater(item.reserved_until, timezone.now())
+        self.assertEqual(release_expired_reservations(), 0)
+        released = release_expired_reservations(as_of=timezone.now() + timedelta(minutes=16))
+        self.assertEqual(released, 1)
+        item.refresh_from_db()
+        self.assertEqual(item.current_status, 'ready_for_sale')
+
+    def test_bulk_reservation_defaults_expiry(self):
+        items = list(InventoryItem.objects.filter(current_status='ready_for_sale')[:2])
+        InventoryItem.objects.bulk_update_status(items, 'reserved')
+        self.assertFalse(InventoryItem.objects.filter(current_status='reserved', reserved_until__isnull=True).exists())
+
+    def test_sweeper_releases_reservations_without_expiry(self):
+        reserve_items(self.variant, 3)
+        InventoryItem.objects.filter(current_status='reserved').update(reserved_until=None)
+        self.assertEqual(release_expired_reservations(), 3)
+
+    def test_sweeper_queries_scale_with_batches_not_items(self):
+        reserve_items(self.variant, 8, ttl=timedelta(minutes=-1))
+        with CaptureQueriesContext(connection) as ctx:
+            release_expired_reservations(batch_size=4)
+        # One empty pass over reservations without expiry, then three (4, 4, empty)
+        # over expired ones, each a select, an update, a log insert and a counter upsert
+        selects = [q for q in ctx.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertEqual(len(selects), 4)
+
+    def test_command_reports_released(self):
+        reserve_items(self.variant, 2, ttl=timedelta(minutes=-1))
+        out = StringIO()
+        call_command('release_expired_reservations', stdout=out)
+        self.assertIn("2 reservations released", out.getvalue())
+
+
+class StatusLogArchiveTest(TestCase):
+    def setUp(self):
+        product = Product.objects.create(name="pala", price="40")
+        self.variant = ProductVariant.objects.create(product=product, barcode="ARCH1")
+        self.items = receive_items(self.variant, 5, Decimal("1.00"))
+        self.old = timezone.now() - timedelta(days=400)
+        StatusChangeLog.objects.filter(inventory_item__in=self.items[:3]).update(change_date=self.old)
+
+    def test_archive_moves_only_old_rows(self):
+        moved = StatusChangeLogArchive.archive_before(timezone.now() - timedelta(days=180), batch_size=2)
+        self.assertEqual(moved, 3)
+        self.assertEqual(StatusChangeLog.objects.count(), 2)
+        archived = StatusChangeLogArchive.objects.order_by('id')
+        self.assertEqual([row.inventory_item_id for row in archived], [item.pk for item in self.items[:3]])
+        self.assertEqual({(row.old_status, row.new_status) for row in archived}, {('ordered', 'received')})
+        self.assertEqual(archived[0].change_date, self.old)
+
+    def test_archived_history_survives_item_deletion(self):
+        StatusChangeLogArchive.archive_before(timezone.now() - timedelta(days=180))
+        self.items[0].delete()
+        self.assertEqual(StatusChangeLogArchive.objects.count(), 3)
+
+    def test_command_archives_and_purges(self):
+        out = StringIO()
+        call_command('archive_status_logs', '--days', '180', '--purge-days', '365', stdout=out)
+        self.assertIn("3 rows archived", out.getvalue())
+        self.assertIn("3 archived rows purged", out.getvalue())
+        self.assertFalse(StatusChangeLogArchive.objects.exists())
+
+    def test_dry_run_changes_nothing(self):
+        out = StringIO()
+        call_command('archive_status_logs', '--dry-run', stdout=out)
+        self.assertIn("3 rows to archive", out.getvalue())
+        self.assertEqual(StatusChangeLog.objects.count(), 5)
+
+
+class StatusTimelineTest(TestCase):
+    def setUp(self):
+        product = Product.objects.create(name="pala", price="40")
+        self.variant = ProductVariant.objects.create(product=product, barcode="TL1")
+        self.items = _ready_units(self.variant, 3)
+
+    def test_repeated_transitions_are_kept(self):
+        item = InventoryItem.objects.get(pk=self.items[0].pk)
+        for status in ('returned', 'ready_for_sale', 'returned'):
+            item.update_status(status)
+        statuses = [entry['status'] for entry in item.get_status_history()]
+        self.assertEqual(statuses, ['ordered', 'received', 'quality_check', 'ready_for_sale',
+                                    'returned', 'ready_for_sale', 'returned'])
+
+    def test_dwell_is_time_until_next_change(self):
+        item = self.items[0]
+        logs = list(item.status_logs.order_by('change_date', 'pk'))
+        base = timezone.now() - timedelta(hours=10)
+        for hours, log in zip((0, 1, 4), logs):
+            StatusChangeLog.objects.filter(pk=log.pk).update(change_date=base + timedelta(hours=hours))
+        history = InventoryItem.objects.get(pk=item.pk).get_status_history()
+        self.assertEqual([entry['dwell'] for entry in history[1:3]], [timedelta(hours=1), timedelta(hours=3)])
+        self.assertGreaterEqual(history[-1]['dwell'], timedelta(hours=6))
+        dwell = InventoryItem.objects.get(pk=item.pk).get_dwell_by_status()
+        self.assertEqual(dwell['received'], timedelta(hours=1))
+
+    def test_batch_timeline_is_one_prefetch_query(self):
+        with self.assertNumQueries(2):
+            items = list(InventoryItem.objects.filter(product_variant=self.variant).with_timeline())
+            histories = [item.get_status_history() for item in items]
+        self.assertTrue(all(len(history) == 4 for history in histories))
+
+    def test_archived_events_can_be_included(self):
+        item = self.items[0]
+        StatusChangeLog.objects.filter(inventory_item=item, new_status='received').update(
+            change_date=timezone.now() - timedelta(days=400))
+        StatusChangeLogArchive.archive_before(timezone.now() - timedelta(days=180))
+        item = InventoryItem.objects.get(pk=item.pk)
+        self.assertEqual(len(item.get_status_history()), 2)
+        self.assertEqual(len(item.get_status_history(include_archived=True)), 4)
+
+    def test_history_after_archiving_starts_at_first_live_change(self):
+        item = self.items[0]
+        StatusChangeLog.objects.filter(inventory_item=item, new_status='received').update(
+            change_date=timezone.now() - timedelta(days=400))
+        StatusChangeLogArchive.archive_before(timezone.now() - timedelta(days=180))
+        first_live = item.status_logs.order_by('change_date', 'pk').first()
+        for item in (InventoryItem.objects.get(pk=item.pk),
+                     InventoryItem.objects.filter(pk=item.pk).with_timeline().get()):
+            history = item.get_status_history()
+            self.assertEqual([entry['status'] for entry in history], ['quality_check', 'ready_for_sale'])
+            self.assertEqual(history[0]['date'], first_live.change_date)
+            self.assertNotIn('ordered', item.get_dwell_by_status())
+
+
+class StatusMachineTest(SimpleTestCase):
+    machine = InventoryItem.STATUS_MACHINE
+
+    def test_matches_transition_rules(self):
+        for old_status, targets in InventoryItem.STATUS_TRANSITION_RULES.items():
+            for new_status, _ in InventoryItem.STATUS_CHOICES:
+                self.assertEqual(self.machine.can_transition(old_status, new_status), new_status in targets)
+
+    def test_date_fields_exist_on_the_model(self):
+        field_names = {field.name for field in InventoryItem._meta.get_fields()}
+        self.assertTrue(set(self.machine.date_fields.values()) <= field_names)
+
+    def test_vectorized_check(self):
+        statuses = ['quality_check', 'sold', 'returned', 'reserved', 'ordered']
+        self.assertEqual(self.machine.allowed(statuses, 'ready_for_sale'), [True, False, True, True, False])
+        self.assertEqual(self.machine.mask(['ordered', 'received']), 0b11)
+
+    def test_invalid_status_messages(self):
+        with self.assertRaisesMessage(ValidationError, "Invalid status: lost"):
+            self.machine.validate('ordered', 'lost')
+        with self.assertRaisesMessage(ValidationError, "Cannot change status from sold to ordered"):
+            self.machine.validate('sold', 'ordered')
+
+
+class CanTransitionToTest(TestCase):
+    def test_sql_filter_matches_python_check(self):
+        product = Product.objects.create(name="pala", price="40")
+        variant = ProductVariant.objects.create(product=product, barcode="SM1")
+        items = receive_items(variant, 6, Decimal("1.00"))
+        InventoryItem.objects.bulk_update_status(items[:4], 'quality_check')
+        InventoryItem.objects.bulk_update_status(items[:2], 'ready_for_sale')
+
+        movable = InventoryItem.objects.filter(product_variant=variant).can_transition_to('ready_for_sale')
+        expected = [item.pk for item, ok in zip(
+            items, InventoryItem.STATUS_MACHINE.allowed([item.current_status for item in items], 'ready_for_sale')
+        ) if ok]
+        self.assertEqual(sorted(movable.values_list('pk', flat=True)), sorted(expected))
+        self.assertEqual(len(expected), 2)
+
+
+class InventoryItemDetailsTest(TestCase):
+    def setUp(self):
+        product = Product.objects.create(name="pala", price="40")
+        self.variant = ProductVariant.objects.create(product=product, barcode="DET1")
+
+    def test_cold_fields_round_trip_through_details(self):
+        item = InventoryItem.objects.create(
+            product_variant=self.variant, purchase_price=1, notes="Caja golpeada", tracking_number="TRK1",
+        )
+        details = InventoryItemDetails.objects.get(inventory_item=item)
+        self.assertEqual((details.notes, details.tracking_number), ("Caja golpeada", "TRK1"))
+        item = InventoryItem.objects.select_related('details').get(pk=item.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(item.notes, "Caja golpeada")
+
+    def test_items_without_cold_data_have_no_details_row(self):
+        item = InventoryItem.objects.create(product_variant=self.variant, purchase_price=1)
+        self.assertFalse(InventoryItemDetails.objects.exists())
+        item = InventoryItem.objects.get(pk=item.pk)
+        self.assertIsNone(item.shipping_carrier)
+        item.shipping_carrier = "DHL"
+        item.save()
+        self.assertEqual(InventoryItemDetails.objects.get().shipping_carrier, "DHL")
+
+    def test_update_fields_can_name_detail_fields(self):
+        item = InventoryItem.objects.create(product_variant=self.variant, purchase_price=1)
+        item = InventoryItem.objects.get(pk=item.pk)
+        item.notes, item.location_in_warehouse = "Revisar", "A1"
+        item.save(update_fields=['notes'])
+        item.refresh_from_db()
+        self.assertEqual(InventoryItemDetails.objects.get().notes, "Revisar")
+        self.assertIsNone(item.location_in_warehouse)
+        item.tracking_number = "TRK2"
+        item.save(update_fields=['location_in_warehouse'])
+        self.assertIsNone(InventoryItemDetails.objects.get().tracking_number)
+
+    def test_bulk_create_rejects_detail_fields(self):
+        with self.assertRaises(ValueError):
+            InventoryItem.objects.bulk_create([
+                InventoryItem(product_variant=self.variant, sequential_id=1, purchase_price=1, notes="x"),
+            ])
+        self.assertFalse(InventoryItem.objects.exists())
+
+    def test_presets_select_narrow_columns_without_default_ordering(self):
+        with CaptureQueriesContext(connection) as ctx:
+            list(InventoryItem.objects.for_stock())
+            list(InventoryItem.objects.all())
+        stock_sql, plain_sql = (query['sql'] for query in ctx.captured_queries)
+        self.assertNotIn('purchase_price', stock_sql)
+        self.assertNotIn('ORDER BY', plain_sql)
+        self.assertIn('ORDER BY', str(InventoryItem.objects.for_list().query))
+
+    def test_bulk_status_on_stock_preset_loads_no_deferred_fields(self):
+        receive_items(self.variant, 5, Decimal("1.00"))
+        items = list(InventoryItem.objects.for_stock())
+        with self.assertNumQueries(5):  # savepoint, update, logs, counters, release
+            result = InventoryItem.objects.bulk_update_status(items, 'quality_check')
+        self.assertEqual(len(result.updated), 5)
+        self.assertEqual(InventoryItem.objects.filter(date_quality_check__isnull=False).count(), 5)
+
+
+class CatalogCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.brand = Brand.objects.create(name="Truper")
+        self.product = Product.objects.create(name="Pinzas", price=Decimal("80.00"))
+        self.variant = ProductVariant.objects.create(product=self.product, brand=self.brand, barcode="CC1")
+
+    def _list(self):
+        return self.client.get(reverse('product_list'), HTTP_HX_REQUEST='true')
+
+    def test_lookups_are_served_from_cache(self):
+        get_product(self.product.pk)
+        get_variant_by_barcode("cc1")
+        with self.assertNumQueries(0):
+            self.assertEqual(get_product(self.product.pk).name, "Pinzas")
+            self.assertEqual(get_variant_by_barcode("cc1").brand.name, "Truper")
+
+    def test_saves_invalidate_lookups(self):
+        get_variant_by_barcode("CC1")
+        self.brand.name = "Pretul"
+        self.brand.save()
+        self.assertEqual(get_variant_by_barcode("CC1").brand.name, "Pretul")
+        self.product.delete()
+        self.assertIsNone(get_product(self.product.pk))
+
+    def test_listing_is_cached_until_stock_or_catalog_changes(self):
+        self._list()
+        with self.assertNumQueries(0):
+            response = self._list()
+        self.assertEqual(response.context['page_obj'].paginator.num_pages, 1)
+
+        receive_items(self.variant, 3, Decimal("40.00"))
+        self.assertEqual(self._list().context['products'][0].total_stock, 3)
+        Product.objects.create(name="Martillo", price=1)
+        self.assertContains(self._list(), "Martillo")
+
+    def test_cart_lines_read_cached_variants(self):
+        session = self.client.session
+        cart = Cart(session)
+        cart.add(self.variant.pk, 2)
+        cart.lines()
+        with self.assertNumQueries(0):
+            self.assertEqual(cart.lines()[0].subtotal, Decimal("160.00"))
+
+    def test_hit_ratio(self):
+        listing_cache.stats.reset()
+        self._list()
+        self._list()
+        self.assertEqual((listing_cache.stats.hits, listing_cache.stats.misses), (1, 1))
+
+
+class ProductRowFragmentTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = Product.objects.create(name="Pinzas", price=Decimal("80.00"))
+        self.variant = ProductVariant.objects.create(product=self.product, barcode="FR1")
+        Product.objects.create(name="Martillo", price=Decimal("120.00"))
+
+    def _rows(self):
+        return fragments.render_product_rows(list(Product.objects.with_stock_total().order_by('name')))
+
+    def _renders(self):
+        template = fragments.get_template(fragments.ROW_TEMPLATE)
+        patcher = mock.patch.object(fragments, 'get_template', return_value=mock.Mock(wraps=template))
+        self.addCleanup(patcher.stop)
+        return patcher.start().return_value.render
+
+    def test_unchanged_rows_are_not_rendered_again(self):
+        first = self._rows()
+        render = self._renders()
+        self.assertEqual(self._rows(), first)
+        self.assertEqual(render.call_count, 0)
+
+    def test_only_changed_rows_are_rendered(self):
+        self._rows()
+        render = self._renders()
+        self.product.price = Decimal("85.00")
+        self.product.save()
+        rows = self._rows()
+        self.assertEqual(render.call_count, 1)
+        self.assertIn("$85.00", rows[1])
+
+        receive_items(self.variant, 2, Decimal("40.00"))
+        self.assertIn("<td>2</td>", self._rows()[1])
+        self.assertEqual(render.call_count, 2)
+
+    def test_listing_renders_cached_rows(self):
+        response = self.client.get(reverse('product_list'), HTTP_HX_REQUEST='true')
+        self.assertContains(response, "<td>Pinzas</td>", html=False)
+        self.assertContains(response, "$120.00")
@@ -3,4 +3,10 @@ from . import views
 
 urlpatterns = [
     path("ventas/", views.product_list, name="product_list"),
+    path("ventas/barcode/<str:barcode>/", views.barcode_lookup, name="barcode_lookup"),
+    path("inventory/receive/", views.bulk_receive, name="bulk_receive"),
+    path("ventas/cart/add/", views.cart_add, name="cart_add"),
+    path("ventas/cart/remove/<int:product_variant_id>/", views.cart_remove, name="cart_remove"),
+    path("ventas/cart/clear/", views.cart_clear, name="cart_clear"),
+    path("ventas/sale/", views.sale_commit, name="sale_commit"),
 ]
@@ -1,18 +1,111 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render
-from django.db.models import Q
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET, require_POST
+from .barcode_cache import lookup_barcode
+from .cart import Cart
+from .catalog_cache import cached_page
+from .forms import BulkReceiveForm, CartAddForm
+from .fragments import render_product_rows
 from .models import Product
+from .search import search_products
+from .services import commit_sale, receive_items
+
+# Hard cap on rows rendered per request; the HTMX search fires on every keystroke
+PRODUCT_LIST_PAGE_SIZE = 50
 
 def product_list(request):
     search_query = request.GET.get('q', '').strip()
-    products = Product.objects.all().order_by('name')
-    
-    if search_query:
-        products = products.filter(
-            Q(name__icontains=search_query) |
-            Q(variants__barcode__iexact=search_query)  # Exact barcode match
-        ).distinct()  # Prevents duplicates
-    
+    products = Product.objects.with_stock_total().order_by('name', 'pk')
+    products = search_products(products, search_query)
+
+    # Rows and count come from the catalog listing cache until a product, variant or stock changes
+    page = cached_page(('products', search_query), products, PRODUCT_LIST_PAGE_SIZE, request.GET.get('page'))
+    context = {
+        'products': page.object_list,
+        'product_rows': render_product_rows(page.object_list),
+        'page_obj': page,
+        'search_query': search_query,
+    }
+
     # Keep your existing HTMX logic
     if request.headers.get('HX-Request'):
-        return render(request, 'table.html', {'products': products})
-    return render(request, 'list.html', {'products': products})
+        return render(request, 'table.html', context)
+    context.update(_cart_context(Cart(request.session)))
+    return render(request, 'list.html', context)
+
+@require_GET
+def barcode_lookup(request, barcode):
+    """Scanner endpoint: compact JSON for a single barcode"""
+    payload = lookup_barcode(barcode.strip())
+    if payload is None:
+        return JsonResponse({'error': 'Unknown barcode'}, status=404)
+    return JsonResponse(payload)
+
+@staff_member_required
+@require_POST
+def bulk_receive(request):
+    """Receive a supplier shipment of one variant as individual InventoryItems"""
+    form = BulkReceiveForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+
+    data = form.cleaned_data
+    items = receive_items(
+        data['product_variant'],
+        data['quantity'],
+        data['purchase_price'],
+        supplier=data['supplier'],
+        user=request.user,
+        purchase_order_reference=data['purchase_order_reference'] or None,
+        notes=data['notes'] or None,
+    )
+    return JsonResponse({
+        'received': len(items),
+        'first_sequential_id': items[0].sequential_id,
+        'last_sequential_id': items[-1].sequential_id,
+    }, status=201)
+
+def _cart_context(cart, **extra):
+    lines = cart.lines()
+    return {'cart_lines': lines, 'cart_total': Cart.total(lines), **extra}
+
+@require_POST
+def cart_add(request):
+    """Add a scanned barcode or a variant id to the session cart"""
+    form = CartAddForm(request.POST)
+    cart = Cart(request.session)
+    if not form.is_valid():
+        return render(request, 'cart.html', _cart_context(cart, errors=form.errors), status=400)
+    cart.add(form.cleaned_data['product_variant'].pk, form.cleaned_data['quantity'])
+    return render(request, 'cart.html', _cart_context(cart))
+
+@require_POST
+def cart_remove(request, product_variant_id):
+    cart = Cart(request.session)
+    cart.remove(product_variant_id)
+    return render(request, 'cart.html', _cart_context(cart))
+
+@require_POST
+def cart_clear(request):
+    """New Invoice: start an empty ticket"""
+    cart = Cart(request.session)
+    cart.clear()
+    return render(request, 'cart.html', _cart_context(cart))
+
+@require_POST
+def sale_commit(request):
+    """Save Invoice: sell everything in the cart in one transaction"""
+    cart = Cart(request.session)
+    try:
+        sale = commit_sale(cart.lines(), user=request.user if request.user.is_authenticated else None)
+    except ValidationError as exc:
+        if request.headers.get('HX-Request'):
+            return render(request, 'cart.html', _cart_context(cart, errors={'sale': exc.messages}))
+        return JsonResponse({'errors': exc.messages}, status=409)
+
+    cart.clear()
+    if request.headers.get('HX-Request'):
+        return render(request, 'cart.html', _cart_context(cart, sale=sale))
+    return JsonResponse({'sale': sale.number, 'total': str(sale.total)}, status=201)
@@ -24,7 +24,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-5n5es756q9%-y(tdg%ko)5&bxx#_&egtgf9%y5(m0b^2)zedhk'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv('DJANGO_DEBUG', 'True') == 'True'
 
 ALLOWED_HOSTS = []
 
@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'inventory.apps.InventoryConfig',
     'core.apps.CoreConfig',
     'crm.apps.CrmConfig',
@@ -91,6 +92,22 @@ DATABASES = {
     }
 }
 
+# Cache
+# Generation numbers of the catalog cache live here, so every process (gunicorn
+# workers, management commands) must see the same cache. The default is only
+# per process; with several processes use the database backend, whose incr()
+# and culling run in SQL:
+# CACHE_BACKEND=django.core.cache.backends.db.DatabaseCache CACHE_LOCATION=django_cache (+ createcachetable)
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'mi-proyecto'),
+        'TIMEOUT': 15 * 60,
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '20000'))},
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
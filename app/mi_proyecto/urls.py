@@ -5,6 +5,8 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('inventory.urls')),  # Include your app's URLs here
     path('', include('srm.urls')),  # Include your app's URLs here
+    path('', include('productsupplier.urls')),  # Include your app's URLs here
+    path('', include('report.urls')),  # Include your app's URLs here
     path('', include('core.urls')),  # Include your app's URLs here
 ]
 
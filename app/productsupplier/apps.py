@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ProductsupplierConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'productsupplier'
+
+    def ready(self):
+        from core import export, recompute
+        from .models import PRODUCT_SCORES, rescore_products
+        recompute.register(PRODUCT_SCORES, rescore_products)
+        from .exports import SUPPLIER_PRODUCTS
+        export.register(SUPPLIER_PRODUCTS)
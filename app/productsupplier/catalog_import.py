@@ -0,0 +1,379 @@
+"""
+Bulk import of a supplier's catalog.
+
+Rows carry a barcode, product name and retail price, optionally a brand,
+and the supplier's offer for that barcode (cost, min_order_quantity,
+is_active). Unknown barcodes create a Product and a ProductVariant, known
+ones update them; offers are upserted on (product_variant, supplier).
+
+Input is read as a stream of CSV or JSON Lines and cut into chunks of
+IMPORT_BATCH_SIZE records. Chunks are parsed and validated either in
+process or by a pool of worker processes; whichever way, the parent writes
+them back in file order, one transaction and a fixed number of statements
+per chunk. Score recomputation is suppressed while importing and run once
+for the touched products at the end.
+"""
+import csv
+import json
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal, InvalidOperation
+import django
+from django.db import transaction
+from core import recompute
+from inventory.barcode_cache import invalidate_products
+from inventory.catalog_cache import bump_catalog
+from inventory.models import Brand, Product, ProductVariant
+from .models import SupplierProduct, SupplierProductScore
+
+IMPORT_BATCH_SIZE = 1000
+# Past this many touched products the final pass rescores the whole catalog
+RESCORE_ALL_THRESHOLD = 100_000
+# Rejected rows kept in the result; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+FORMATS = ('csv', 'jsonl')
+
+CatalogRow = namedtuple('CatalogRow', [
+    'barcode', 'name', 'price', 'brand', 'cost', 'min_order_quantity', 'is_active',
+])
+ParsedChunk = namedtuple('ParsedChunk', ['rows', 'records', 'rejected', 'errors', 'seconds'])
+ChunkReport = namedtuple('ChunkReport', [
+    'index', 'first_line', 'records', 'rejected', 'parse_seconds', 'write_seconds',
+])
+ImportResult = namedtuple('ImportResult', [
+    'rows', 'created', 'updated', 'offers', 'rescored', 'rejected', 'errors', 'chunks',
+])
+
+_TRUE = {'1', 'true', 'yes', 'y', 'si', 'sí'}
+_FALSE = {'0', 'false', 'no', 'n', ''}
+
+
+def _text(raw, field, max_length, required=False):
+    value = '' if raw.get(field) is None else str(raw[field]).strip()
+    if required and not value:
+        raise ValueError(f"{field} is required")
+    if len(value) > max_length:
+        raise ValueError(f"{field} is longer than {max_length} characters")
+    return value or None
+
+
+def _money(raw, field, required=False):
+    value = raw.get(field)
+    if value is None or str(value).strip() == '':
+        if required:
+            raise ValueError(f"{field} is required")
+        return None
+    try:
+        amount = Decimal(str(value).strip()).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError(f"{field} is not a number: {value!r}")
+    if amount < 0:
+        raise ValueError(f"{field} cannot be negative")
+    return amount
+
+
+def _bool(raw, field):
+    value = raw.get(field)
+    if value is None or isinstance(value, bool):
+        return True if value is None else value
+    value = str(value).strip().lower()
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    raise ValueError(f"{field} is not a boolean: {value!r}")
+
+
+def field_limits():
+    """Column lengths checked by parse_row, read from the models once"""
+    return {
+        'barcode': ProductVariant._meta.get_field('barcode').max_length,
+        'name': Product._meta.get_field('name').max_length,
+        'brand': Brand._meta.get_field('name').max_length,
+    }
+
+
+def parse_row(raw, limits=None):
+    """CatalogRow from a dict of raw values; raises ValueError when invalid"""
+    limits = limits or field_limits()
+    quantity = raw.get('min_order_quantity')
+    try:
+        quantity = 1 if quantity is None or str(quantity).strip() == '' else int(str(quantity).strip())
+    except ValueError:
+        raise ValueError(f"min_order_quantity is not a whole number: {quantity!r}")
+    if quantity < 1:
+        raise ValueError("min_order_quantity must be at least 1")
+    return CatalogRow(
+        barcode=_text(raw, 'barcode', limits['barcode'], required=True),
+        name=_text(raw, 'name', limits['name'], required=True),
+        price=_money(raw, 'price', required=True),
+        brand=_text(raw, 'brand', limits['brand']),
+        cost=_money(raw, 'cost'),
+        min_order_quantity=quantity,
+        is_active=_bool(raw, 'is_active'),
+    )
+
+
+def _records(lines):
+    """
+    Group CSV lines into records: (first line number, [lines]).
+
+    The csv module decides where a record ends, so a quoted field may hold
+    line breaks and a bare quote inside an unquoted field (1/2" pipe) is
+    just a character, exactly as when the chunk is parsed later.
+    """
+    record = []
+
+    def read():
+        for line in lines:
+            record.append(line)
+            yield line
+
+    reader = csv.reader(read())
+    first = 1
+    for _ in reader:
+        yield first, list(record)
+        record.clear()
+        first = reader.line_num + 1
+
+
+def split_chunks(lines, fmt, chunk_size=IMPORT_BATCH_SIZE):
+    """
+    Cut the input into chunks of up to `chunk_size` records.
+
+    Returns (header, chunks): the CSV header fields (None for JSON Lines)
+    and an iterator of (first line number, [lines]) that never cuts a
+    record in two.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown catalog format: {fmt}")
+    if fmt == 'jsonl':
+        records = ((number, [line]) for number, line in enumerate(lines, start=1))
+        header = None
+    else:
+        records = _records(lines)
+        header_record = next(records, None)
+        header = next(csv.reader(header_record[1]), []) if header_record else []
+        header = [name.strip() for name in header]
+
+    def chunks():
+        first, chunk, count = None, [], 0
+        for number, record in records:
+            if not chunk:
+                first = number
+            chunk.extend(record)
+            count += 1
+            if count >= chunk_size:
+                yield first, chunk
+                chunk, count = [], 0
+        if chunk:
+            yield first, chunk
+
+    return header, chunks()
+
+
+def _raw_rows(fmt, header, first_line, lines):
+    # (line number, dict or ValueError) for each record of a chunk
+    if fmt == 'csv':
+        reader = csv.DictReader(lines, fieldnames=header)
+        for raw in reader:
+            yield first_line - 1 + reader.line_num, raw
+        return
+    for number, line in enumerate(lines, start=first_line):
+        if not line.strip():
+            continue
+        try:
+            raw = json.loads(line)
+        except ValueError as exc:
+            yield number, ValueError(f"invalid JSON: {exc}")
+            continue
+        yield number, raw if isinstance(raw, dict) else ValueError("expected a JSON object")
+
+
+def parse_chunk(fmt, header, first_line, lines, limits):
+    """
+    Parse and validate one chunk; runs in a worker process.
+
+    Returns a ParsedChunk whose rows map barcode to CatalogRow in file
+    order, the last row winning for a repeated barcode.
+    """
+    start = time.perf_counter()
+    rows, errors, records, rejected = {}, {}, 0, 0
+    for number, raw in _raw_rows(fmt, header, first_line, lines):
+        records += 1
+        try:
+            if isinstance(raw, Exception):
+                raise raw
+            row = parse_row(raw, limits)
+        except ValueError as exc:
+            rejected += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors[number] = str(exc)
+            continue
+        rows.pop(row.barcode, None)
+        rows[row.barcode] = row
+    return ParsedChunk(rows, records, rejected, errors, time.perf_counter() - start)
+
+
+def _parsed_chunks(chunks, fmt, header, workers):
+    """
+    Yield (first line, ParsedChunk) in file order.
+
+    With more than one worker, chunks are parsed by a process pool while
+    earlier ones are being written; at most two chunks per worker are in
+    flight, which bounds memory on inputs of any size.
+    """
+    limits = field_limits()
+    if workers <= 1:
+        for first_line, lines in chunks:
+            yield first_line, parse_chunk(fmt, header, first_line, lines, limits)
+        return
+
+    # Workers only parse; django.setup() lets them import the models under spawn too
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+        pending = deque()
+        for first_line, lines in chunks:
+            pending.append((first_line, pool.submit(parse_chunk, fmt, header, first_line, lines, limits)))
+            if len(pending) >= workers * 2:
+                first, future = pending.popleft()
+                yield first, future.result()
+        while pending:
+            first, future = pending.popleft()
+            yield first, future.result()
+
+
+class _BatchWriter:
+    """Writes batches of CatalogRows for one supplier"""
+
+    def __init__(self, supplier):
+        self.supplier = supplier
+        # The only catalog-wide map: brands are few, barcodes are looked up per batch
+        self.brands = dict(Brand.objects.values_list('name', 'pk'))
+
+    def _brand_ids(self, rows):
+        missing = {row.brand for row in rows if row.brand and row.brand not in self.brands}
+        if missing:
+            Brand.objects.bulk_create([Brand(name=name) for name in missing], ignore_conflicts=True)
+            self.brands.update(Brand.objects.filter(name__in=missing).values_list('name', 'pk'))
+
+    def write(self, rows):
+        """
+        Upsert one batch; `rows` maps barcode to CatalogRow.
+
+        Returns (created, updated, offers, product ids with new offers).
+        """
+        with transaction.atomic():
+            self._brand_ids(rows.values())
+            existing = {
+                barcode: (variant_id, product_id)
+                for barcode, variant_id, product_id in ProductVariant.objects.filter(
+                    barcode__in=list(rows),
+                ).values_list('barcode', 'pk', 'product_id')
+            }
+            new_rows = [row for barcode, row in rows.items() if barcode not in existing]
+            old_rows = [row for barcode, row in rows.items() if barcode in existing]
+
+            products = Product.objects.bulk_create(
+                [Product(name=row.name, price=row.price) for row in new_rows])
+            variants = ProductVariant.objects.bulk_create([
+                ProductVariant(product=product, barcode=row.barcode, brand_id=self.brands.get(row.brand))
+                for product, row in zip(products, new_rows)
+            ])
+            variant_ids = {variant.barcode: (variant.pk, variant.product_id) for variant in variants}
+
+            if old_rows:
+                # Upserts on the primary key: one statement updates every known product
+                updates = {existing[row.barcode][1]: row for row in old_rows}
+                Product.objects.bulk_create(
+                    [Product(pk=pk, name=row.name, price=row.price) for pk, row in updates.items()],
+                    update_conflicts=True, unique_fields=['pk'], update_fields=['name', 'price', 'updated_at'],
+                )
+                branded = [row for row in old_rows if row.brand]
+                if branded:
+                    ProductVariant.objects.bulk_create(
+                        [
+                            ProductVariant(product_id=existing[row.barcode][1], barcode=row.barcode,
+                                           brand_id=self.brands[row.brand])
+                            for row in branded
+                        ],
+                        update_conflicts=True, unique_fields=['barcode'], update_fields=['brand', 'updated_at'],
+                    )
+                variant_ids.update(existing)
+                # Name and price are per product, so every sibling variant's payload is stale too
+                transaction.on_commit(lambda: invalidate_products(list(updates)))
+
+            offers = [row for row in rows.values() if row.cost is not None]
+            SupplierProduct.objects.bulk_create(
+                [
+                    SupplierProduct(
+                        product_variant_id=variant_ids[row.barcode][0], supplier=self.supplier,
+                        cost=row.cost, min_order_quantity=row.min_order_quantity,
+                        is_active=row.is_active,
+                    )
+                    for row in offers
+                ],
+                update_conflicts=True,
+                unique_fields=['product_variant', 'supplier'],
+                update_fields=['cost', 'min_order_quantity', 'is_active', 'updated_at'],
+            )
+            # bulk_create sends no model signals
+            bump_catalog()
+        touched = {variant_ids[row.barcode][1] for row in offers}
+        return len(new_rows), len(old_rows), len(offers), touched
+
+
+def _rescore(product_ids):
+    if product_ids is None:
+        return SupplierProductScore.rescore_all()
+    product_ids, written = sorted(product_ids), 0
+    for start in range(0, len(product_ids), SupplierProductScore.BATCH_SIZE):
+        written += SupplierProductScore.calculate_scores_for_products(
+            product_ids[start:start + SupplierProductScore.BATCH_SIZE])
+    return written
+
+
+def import_catalog(supplier, lines, fmt='csv', batch_size=IMPORT_BATCH_SIZE, workers=1):
+    """
+    Import a catalog for `supplier` from an iterable of text lines.
+
+    Input is cut into chunks of `batch_size` records; with `workers` > 1
+    they are parsed in that many processes, while this process remains
+    the only writer and commits one chunk at a time in file order.
+    Invalid rows are skipped and reported in the result's `errors` as
+    {line number: message} (the first MAX_REPORTED_ERRORS of them);
+    `rejected` counts them all. When a barcode appears twice in one chunk
+    the last row wins. Each chunk commits on its own, so an interrupted
+    import can simply be run again. Returns an ImportResult whose
+    `chunks` holds a ChunkReport per chunk.
+    """
+    writer = _BatchWriter(supplier)
+    totals = {'rows': 0, 'created': 0, 'updated': 0, 'offers': 0, 'rejected': 0}
+    errors, touched, reports = {}, set(), []
+
+    header, chunks = split_chunks(lines, fmt, batch_size)
+    with recompute.suppressed():
+        for index, (first_line, parsed) in enumerate(_parsed_chunks(chunks, fmt, header, workers)):
+            start = time.perf_counter()
+            if parsed.rows:
+                created, updated, offers, products = writer.write(parsed.rows)
+                totals['created'] += created
+                totals['updated'] += updated
+                totals['offers'] += offers
+                if touched is not None:
+                    touched |= products
+                    if len(touched) > RESCORE_ALL_THRESHOLD:
+                        touched = None
+            totals['rows'] += parsed.records
+            totals['rejected'] += parsed.rejected
+            for number, message in parsed.errors.items():
+                if len(errors) >= MAX_REPORTED_ERRORS:
+                    break
+                errors[number] = message
+            reports.append(ChunkReport(index, first_line, parsed.records, parsed.rejected,
+                                       parsed.seconds, time.perf_counter() - start))
+
+    with transaction.atomic():
+        rescored = _rescore(touched)
+    return ImportResult(rescored=rescored, errors=errors, chunks=reports, **totals)
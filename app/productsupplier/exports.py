@@ -0,0 +1,16 @@
+from core.export import Dataset
+from .models import SupplierProduct
+
+# Offers with their scores; offers not scored yet have empty score columns
+SUPPLIER_PRODUCTS = Dataset('supplier_products', SupplierProduct.objects.order_by('pk'), [
+    ('id', 'pk'),
+    ('supplier', 'supplier__name'),
+    ('barcode', 'product_variant__barcode'),
+    ('product', 'product_variant__product__name'),
+    ('cost', 'cost'),
+    ('min_order_quantity', 'min_order_quantity'),
+    ('is_active', 'is_active'),
+    ('cost_score', 'score__cost_score'),
+    ('quantity_score', 'score__quantity_score'),
+    ('overall_score', 'score__overall_score'),
+])
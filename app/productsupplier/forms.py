@@ -0,0 +1,19 @@
+from django import forms
+from srm.models import Supplier
+from .catalog_import import FORMATS
+
+
+class CatalogImportForm(forms.Form):
+    supplier = forms.ModelChoiceField(queryset=Supplier.objects.all())
+    catalog = forms.FileField()
+    format = forms.ChoiceField(choices=[(fmt, fmt) for fmt in FORMATS], required=False)
+
+    def clean(self):
+        cleaned = super().clean()
+        catalog = cleaned.get('catalog')
+        if catalog is not None and not cleaned.get('format'):
+            extension = catalog.name.rsplit('.', 1)[-1].lower() if '.' in catalog.name else ''
+            if extension not in FORMATS:
+                raise forms.ValidationError("Cannot tell the catalog format from the file name")
+            cleaned['format'] = extension
+        return cleaned
@@ -0,0 +1,59 @@
+from decimal import Decimal
+from core.benchmarks import BenchmarkCommand
+from inventory.models import Product, ProductVariant
+from productsupplier.models import SupplierProduct
+from srm.models import Supplier
+
+
+def legacy_best_offer(product_variant, quantity):
+    # Previous pattern: load every offer and compare MOQ strings in Python
+    best = None
+    for offer in SupplierProduct.objects.filter(product_variant=product_variant, is_active=True):
+        if float(str(offer.min_order_quantity)) > quantity:
+            continue
+        if best is None or offer.cost < best.cost:
+            best = offer
+    return best
+
+
+class Command(BenchmarkCommand):
+    help = "Compare Python-side best offer selection with the indexed query"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--variants', type=int, default=1000)
+        parser.add_argument('--suppliers', type=int, default=1000)
+        parser.add_argument('--lookups', type=int, default=200)
+        parser.add_argument('--quantity', type=int, default=6)
+
+    def run_benchmark(self, variants, suppliers, lookups, quantity, **options):
+        supplier_objs = Supplier.objects.bulk_create(
+            [Supplier(name=f"Supplier {i}") for i in range(suppliers)]
+        )
+        product_objs = Product.objects.bulk_create(
+            [Product(name=f"Producto {i}", price=1) for i in range(variants)]
+        )
+        variant_objs = ProductVariant.objects.bulk_create(
+            [ProductVariant(product=p, barcode=f"BENCH-BO-{p.pk}") for p in product_objs]
+        )
+        for v in variant_objs:
+            SupplierProduct.objects.bulk_create(
+                [
+                    SupplierProduct(
+                        product_variant=v, supplier=s,
+                        cost=Decimal(10 + (v.pk * 7 + n * 13) % 90),
+                        min_order_quantity=1 + (v.pk + n) % 12,
+                        is_active=n % 10 != 0,
+                    )
+                    for n, s in enumerate(supplier_objs)
+                ],
+                batch_size=2000,
+            )
+        self.stdout.write(f"{variants} variants x {suppliers} suppliers, {lookups} lookups at Q={quantity}")
+
+        sample = variant_objs[:lookups]
+        self.measure("legacy, Python loop", lambda: [
+            legacy_best_offer(v, quantity) for v in sample
+        ], repeat=1)
+        self.measure("best_offer", lambda: [
+            SupplierProduct.objects.best_offer(v, quantity) for v in sample
+        ], repeat=3)
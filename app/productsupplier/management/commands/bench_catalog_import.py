@@ -0,0 +1,37 @@
+import os
+import time
+from core.benchmarks import BenchmarkCommand
+from productsupplier.catalog_import import IMPORT_BATCH_SIZE, import_catalog
+from srm.models import Supplier
+
+
+def catalog_lines(rows, brands, prefix, price_offset=0):
+    yield "barcode,name,price,brand,cost,min_order_quantity,is_active\n"
+    for i in range(rows):
+        yield f"{prefix}-{i},Producto {i},{100 + price_offset + i % 50},Marca {i % brands},{60 + i % 40},{1 + i % 12},1\n"
+
+
+class Command(BenchmarkCommand):
+    help = "Time streamed catalog imports: first loads and re-imports, parsed in process and by a worker pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50_000)
+        parser.add_argument('--brands', type=int, default=200)
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+
+    def run_benchmark(self, rows, brands, batch_size, workers, **options):
+        supplier = Supplier.objects.create(name="Bench catalog")
+        for mode_workers in sorted({1, workers}):
+            prefix = f"BENCH-CI-{mode_workers}"
+            for label, offset in (('first load', 0), ('re-import (updates)', 5)):
+                start = time.perf_counter()
+                result = import_catalog(supplier, catalog_lines(rows, brands, prefix, offset),
+                                        batch_size=batch_size, workers=mode_workers)
+                elapsed = time.perf_counter() - start
+                parse = sum(chunk.parse_seconds for chunk in result.chunks)
+                write = sum(chunk.write_seconds for chunk in result.chunks)
+                self.stdout.write(
+                    f"{mode_workers:>2} workers {label:<20} {rows} rows {elapsed:>8.2f} s "
+                    f"{rows / elapsed:>8.0f} rows/s  (parse {parse:.2f} s, write {write:.2f} s)"
+                )
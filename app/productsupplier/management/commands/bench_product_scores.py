@@ -0,0 +1,66 @@
+from decimal import Decimal
+from core.benchmarks import BenchmarkCommand
+from inventory.models import Product, ProductVariant
+from productsupplier.models import SupplierProduct, SupplierProductScore
+from srm.models import Supplier
+
+
+def legacy_calculate_scores_for_product(product):
+    # Query pattern of the previous implementation: get_or_create + save per offer
+    all_products = SupplierProduct.objects.filter(product_variant__product=product).select_related('supplier')
+    if not all_products.exists():
+        return
+    active_products = all_products.filter(is_active=True)
+    if not active_products.exists():
+        return
+    costs = [float(p.cost) for p in active_products]
+    quantities = [p.min_order_quantity for p in active_products]
+    min_cost, max_cost = min(costs), max(costs)
+    min_qty, max_qty = min(quantities), max(quantities)
+    for sp in all_products:
+        score, _ = SupplierProductScore.objects.get_or_create(supplier_product=sp)
+        score.cost_score = 5.0 if max_cost == min_cost else round(
+            5.0 - 4.0 * (float(sp.cost) - min_cost) / (max_cost - min_cost), 2)
+        score.quantity_score = 5.0 if max_qty == min_qty else round(
+            5.0 - 4.0 * (sp.min_order_quantity - min_qty) / (max_qty - min_qty), 2)
+        score.overall_score = round(score.cost_score * 0.9 + score.quantity_score * 0.1, 2)
+        score.save()
+
+
+class Command(BenchmarkCommand):
+    help = "Compare per-offer score recalculation with the set-based upsert"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=200)
+        parser.add_argument('--suppliers', type=int, default=20)
+
+    def run_benchmark(self, products, suppliers, **options):
+        supplier_objs = Supplier.objects.bulk_create(
+            [Supplier(name=f"Supplier {i}") for i in range(suppliers)]
+        )
+        product_objs = Product.objects.bulk_create(
+            [Product(name=f"Producto {i}", price=1) for i in range(products)]
+        )
+        variants = ProductVariant.objects.bulk_create(
+            [ProductVariant(product=p, barcode=f"BENCH-PS-{p.pk}") for p in product_objs]
+        )
+        SupplierProduct.objects.bulk_create(
+            [
+                SupplierProduct(
+                    product_variant=v, supplier=s,
+                    cost=Decimal(10 + (v.pk * 7 + n * 13) % 90),
+                    min_order_quantity=1 + (v.pk + n) % 12,
+                )
+                for v in variants for n, s in enumerate(supplier_objs)
+            ],
+            batch_size=2000,
+        )
+        self.stdout.write(f"{products} products x {suppliers} suppliers")
+
+        self.measure("legacy, per product", lambda: [
+            legacy_calculate_scores_for_product(p) for p in product_objs
+        ], repeat=1)
+        self.measure("set-based, per product", lambda: [
+            SupplierProductScore.calculate_scores_for_product(p) for p in product_objs
+        ], repeat=3)
+        self.measure("rescore_all", SupplierProductScore.rescore_all, repeat=3)
@@ -0,0 +1,51 @@
+import os
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from productsupplier.catalog_import import FORMATS, IMPORT_BATCH_SIZE, import_catalog
+from srm.models import Supplier
+
+
+class Command(BaseCommand):
+    help = "Import a supplier catalog from a CSV or JSON Lines file ('-' reads stdin)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--supplier', type=int, required=True, help="Supplier id")
+        parser.add_argument('--format', choices=FORMATS,
+                            help="Defaults to the file extension, or csv for stdin")
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+                            help="Records per chunk; each chunk is one transaction")
+        parser.add_argument('--workers', type=int, default=1,
+                            help="Processes parsing chunks in parallel (default: parse in this process)")
+
+    def handle(self, *args, path, supplier, format, batch_size, workers, verbosity, **options):
+        try:
+            supplier = Supplier.objects.get(pk=supplier)
+        except Supplier.DoesNotExist:
+            raise CommandError(f"Supplier {supplier} does not exist")
+        fmt = format or os.path.splitext(path)[1].lstrip('.').lower() or 'csv'
+        if fmt not in FORMATS:
+            raise CommandError(f"Cannot tell the format of {path}; pass --format")
+
+        if path == '-':
+            result = import_catalog(supplier, sys.stdin, fmt, batch_size=batch_size, workers=workers)
+        else:
+            with open(path, newline='', encoding='utf-8-sig') as lines:
+                result = import_catalog(supplier, lines, fmt, batch_size=batch_size, workers=workers)
+
+        if verbosity > 1:
+            for chunk in result.chunks:
+                self.stdout.write(
+                    f"chunk {chunk.index:>5} line {chunk.first_line:>9}: {chunk.records} records, "
+                    f"{chunk.rejected} rejected, parsed in {chunk.parse_seconds * 1000:.0f} ms, "
+                    f"written in {chunk.write_seconds * 1000:.0f} ms"
+                )
+        parse = sum(chunk.parse_seconds for chunk in result.chunks)
+        write = sum(chunk.write_seconds for chunk in result.chunks)
+        self.stdout.write(f"{len(result.chunks)} chunks: {parse:.1f} s parsing, {write:.1f} s writing")
+        for number, message in result.errors.items():
+            self.stderr.write(f"line {number}: {message}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{result.rows} rows: {result.created} products created, {result.updated} updated, "
+            f"{result.offers} offers, {result.rejected} rejected; {result.rescored} scores written"
+        ))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from productsupplier.models import SupplierProductScore
+
+
+class Command(BaseCommand):
+    help = "Recompute SupplierProductScore for every product in one pass"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            written = SupplierProductScore.rescore_all()
+        self.stdout.write(self.style.SUCCESS(f"Rescored {written} supplier products"))
@@ -0,0 +1,59 @@
+# Generated by Django 4.2 on 2026-10-18 14:13
+
+import math
+import re
+
+import django.core.validators
+from django.db import migrations, models
+
+NUMBER = re.compile(r'\d+(?:[.,]\d+)?')
+
+
+def parse_min_order_quantity(value):
+    """Leading number of the old free-text value ("12", "12 pzas", "2.5 kg"); 1 if none"""
+    match = NUMBER.search(value or '')
+    if not match:
+        return 1
+    return max(1, math.ceil(float(match.group().replace(',', '.'))))
+
+
+def copy_min_order_quantity(apps, schema_editor):
+    SupplierProduct = apps.get_model('productsupplier', 'SupplierProduct')
+    offers = list(SupplierProduct.objects.only('pk', 'min_order_quantity'))
+    for offer in offers:
+        offer.min_order_quantity_number = parse_min_order_quantity(offer.min_order_quantity)
+    SupplierProduct.objects.bulk_update(offers, ['min_order_quantity_number'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productsupplier', '0004_rename_purchase_unit_supplierproduct_min_order_quantity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='supplierproduct',
+            name='min_order_quantity_number',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(copy_min_order_quantity, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='supplierproduct',
+            name='min_order_quantity',
+        ),
+        migrations.RenameField(
+            model_name='supplierproduct',
+            old_name='min_order_quantity_number',
+            new_name='min_order_quantity',
+        ),
+        migrations.AlterField(
+            model_name='supplierproduct',
+            name='min_order_quantity',
+            field=models.PositiveIntegerField(default=1, help_text='Minimum units per order', validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+        migrations.AddIndex(
+            model_name='supplierproduct',
+            index=models.Index(fields=['product_variant', 'is_active', 'cost'], name='supplierproduct_offer_idx'),
+        ),
+    ]
@@ -3,9 +3,29 @@ from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.core.validators import MinValueValidator
 from decimal import Decimal
+from itertools import groupby
+from operator import itemgetter
+from core import recompute
 from inventory.models import ProductVariant
 from srm.models import Supplier
 
+# core.recompute kind; keys are Product ids
+PRODUCT_SCORES = 'product_scores'
+
+class SupplierProductQuerySet(models.QuerySet):
+    def best_offer(self, product_variant, quantity):
+        """
+        Cheapest active offer for a variant whose minimum order `quantity` meets.
+
+        Served by the (product_variant, is_active, cost) index: the first row
+        in cost order that passes the MOQ filter is the answer.
+        """
+        return self.filter(
+            product_variant=product_variant,
+            is_active=True,
+            min_order_quantity__lte=quantity,
+        ).order_by('cost', 'pk').first()
+
 class SupplierProduct(models.Model):
     product_variant = models.ForeignKey(
         ProductVariant,
@@ -24,24 +44,33 @@ class SupplierProduct(models.Model):
         validators=[MinValueValidator(Decimal('0.00'))],
         help_text="Cost per unit from supplier"
     )
-    min_order_quantity= models.CharField(max_length=50)
+    min_order_quantity = models.PositiveIntegerField(
+        default=1,
+        validators=[MinValueValidator(1)],
+        help_text="Minimum units per order"
+    )
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = SupplierProductQuerySet.as_manager()
+
     class Meta:
         unique_together = ['product_variant', 'supplier']
         ordering = ['product_variant__product__name', 'supplier__name']
+        indexes = [
+            # Best offer lookups walk one variant's active offers in cost order
+            models.Index(
+                fields=['product_variant', 'is_active', 'cost'],
+                name='supplierproduct_offer_idx',
+            ),
+        ]
         verbose_name = "Supplier Product"
         verbose_name_plural = "Supplier Products"
 
     def __str__(self):
         return f"{self.product_variant.product.name} - {self.supplier.name} (${self.cost}/{self.min_order_quantity})"
 
-    def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        SupplierProductScore.calculate_scores_for_product(self.product_variant.product)
-
 class SupplierProductScore(models.Model):
     supplier_product = models.OneToOneField(
         SupplierProduct,
@@ -52,90 +81,126 @@ class SupplierProductScore(models.Model):
     quantity_score = models.FloatField(default=0.0)  # Lower MOQ → higher score (1-5)
     overall_score = models.FloatField(default=0.0)  # 70% cost + 30% quantity
 
+    SCORE_FIELDS = ['cost_score', 'quantity_score', 'overall_score']
+    _SCORE_COLUMNS = ('pk', 'product_variant__product_id', 'cost', 'min_order_quantity', 'is_active')
+    # Rows per upsert statement and per chunk read when rescoring everything
+    BATCH_SIZE = 2000
+
     @classmethod
     def calculate_scores_for_product(cls, product):
-        # Get all products (active and inactive)
-        all_products = SupplierProduct.objects.filter(
-            product_variant__product=product
-        ).select_related('supplier')
-        
-        if not all_products.exists():
-            cls.objects.filter(supplier_product__product_variant__product=product).delete()
-            return
+        """Recompute the scores of every supplier offer for one product"""
+        return cls.calculate_scores_for_products([product])
+
+    @classmethod
+    def calculate_scores_for_products(cls, products):
+        """
+        Recompute scores for several products (instances or ids).
+
+        One query reads the offers, scores are computed in a single pass in
+        memory and written back with one upsert, whatever the number of
+        offers.
+        """
+        rows = SupplierProduct.objects.filter(
+            product_variant__product__in=products
+        ).order_by('product_variant__product_id').values_list(*cls._SCORE_COLUMNS)
+        return cls._upsert(cls._scores_from_rows(rows))
+
+    @classmethod
+    def rescore_all(cls):
+        """Recompute every product's scores in one streamed pass over all offers"""
+        rows = SupplierProduct.objects.order_by(
+            'product_variant__product_id'
+        ).values_list(*cls._SCORE_COLUMNS).iterator(chunk_size=cls.BATCH_SIZE)
 
-        # Only consider active products for min/max calculations
-        active_products = all_products.filter(is_active=True)
-        
-        # Handle cases where all products are inactive
-        if not active_products.exists():
-            for sp in all_products:
-                cls.objects.update_or_create(
-                    supplier_product=sp,
-                    defaults={
-                        'cost_score': 0.0,
-                        'quantity_score': 0.0,
-                        'overall_score': 0.0
-                    }
-                )
+        written, batch = 0, []
+        for score in cls._scores_from_rows(rows):
+            batch.append(score)
+            if len(batch) >= cls.BATCH_SIZE:
+                written += cls._upsert(batch)
+                batch = []
+        return written + cls._upsert(batch)
+
+    @classmethod
+    def _scores_from_rows(cls, rows):
+        """Yield unsaved scores for rows ordered by product"""
+        for _, offers in groupby(rows, key=itemgetter(1)):
+            yield from cls._score_offers(list(offers))
+
+    @classmethod
+    def _score_offers(cls, offers):
+        # Only consider active offers for min/max calculations
+        active = [
+            (pk, float(cost), quantity)
+            for pk, _, cost, quantity, is_active in offers if is_active
+        ]
+        for pk, _, _, _, is_active in offers:
+            if not is_active:
+                # Set all scores to 0 for inactive products
+                yield cls(supplier_product_id=pk, cost_score=0.0, quantity_score=0.0, overall_score=0.0)
+        if not active:
             return
 
-        # Calculate min/max only from active products
-        costs = [float(p.cost) for p in active_products]
-        quantities = [p.min_order_quantity for p in active_products]
-        
+        costs = [cost for _, cost, _ in active]
+        quantities = [quantity for _, _, quantity in active]
         min_cost, max_cost = min(costs), max(costs)
         min_qty, max_qty = min(quantities), max(quantities)
 
-        for sp in all_products:
-            if not sp.is_active:
-                # Set all scores to 0 for inactive products
-                cls.objects.update_or_create(
-                    supplier_product=sp,
-                    defaults={
-                        'cost_score': 0.0,
-                        'quantity_score': 0.0,
-                        'overall_score': 0.0
-                    }
-                )
-                continue
-                
-            # Proceed with normal calculation for active products
-            score, created = cls.objects.get_or_create(supplier_product=sp)
-            
+        for pk, cost, quantity in active:
             # Cost score (5 = cheapest, 1 = most expensive)
             if max_cost == min_cost:
-                score.cost_score = 5.0
+                cost_score = 5.0
             else:
-                cost_normalized = (float(sp.cost) - min_cost) / (max_cost - min_cost)
-                score.cost_score = round(5.0 - (4.0 * cost_normalized), 2)
-            
+                cost_normalized = (cost - min_cost) / (max_cost - min_cost)
+                cost_score = round(5.0 - (4.0 * cost_normalized), 2)
+
             # Quantity score (5 = lowest MOQ, 1 = highest MOQ)
             if max_qty == min_qty:
-                score.quantity_score = 5.0
+                quantity_score = 5.0
             else:
-                qty_normalized = (sp.min_order_quantity - min_qty) / (max_qty - min_qty)
-                score.quantity_score = round(5.0 - (4.0 * qty_normalized), 2)
-            
+                qty_normalized = (quantity - min_qty) / (max_qty - min_qty)
+                quantity_score = round(5.0 - (4.0 * qty_normalized), 2)
+
             # Overall score (90% cost, 10% quantity)
-            score.overall_score = round(
-                (score.cost_score * 0.9) + (score.quantity_score * 0.1),
-                2
+            yield cls(
+                supplier_product_id=pk,
+                cost_score=cost_score,
+                quantity_score=quantity_score,
+                overall_score=round((cost_score * 0.9) + (quantity_score * 0.1), 2),
+            )
+
+    @classmethod
+    def _upsert(cls, scores):
+        scores = list(scores)
+        if scores:
+            cls.objects.bulk_create(
+                scores,
+                batch_size=cls.BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['supplier_product'],
+                update_fields=cls.SCORE_FIELDS,
             )
-            score.save()
+        return len(scores)
+
+def rescore_products(keys):
+    """core.recompute handler for PRODUCT_SCORES"""
+    SupplierProductScore.calculate_scores_for_products([int(key) for key in keys])
 
-# Signals
+# Signals: recomputation is queued and runs once per product after commit
 @receiver(post_save, sender=SupplierProduct)
 def update_scores(sender, instance, **kwargs):
     """Update scores when SupplierProduct is saved"""
-    SupplierProductScore.calculate_scores_for_product(instance.product_variant.product)
+    recompute.schedule(PRODUCT_SCORES, instance.product_variant.product_id)
 
 @receiver(post_delete, sender=SupplierProduct)
 def rescore_on_delete(sender, instance, **kwargs):
     """Update scores when SupplierProduct is deleted"""
-    SupplierProductScore.calculate_scores_for_product(instance.product_variant.product)
+    recompute.schedule(PRODUCT_SCORES, instance.product_variant.product_id)
 
 @receiver(post_save, sender=Supplier)
 def update_supplier_scores(sender, instance, **kwargs):
     """Update all scores when Supplier changes"""
-    for sp in instance.supplied_product_variants.all():
-        SupplierProductScore.calculate_scores_for_product(sp.product_variant.product)
+    product_ids = instance.supplied_product_variants.values_list(
+        'product_variant__product_id', flat=True
+    ).order_by().distinct()
+    for product_id in product_ids:
+        recompute.schedule(PRODUCT_SCORES, product_id)
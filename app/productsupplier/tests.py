@@ -1,3 +1,292 @@
+import importlib
+import io
+import os
+import tempfile
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+from core import recompute
+from core.models import RecomputeTask
+from inventory.barcode_cache import barcode_cache, lookup_barcode
+from inventory.models import Brand, Product, ProductVariant
+from productsupplier.catalog_import import import_catalog
+from productsupplier.models import PRODUCT_SCORES, SupplierProduct, SupplierProductScore
+from srm.models import Supplier
 
-# Create your tests here.
+
+class DeferredScoringTest(TestCase):
+    def setUp(self):
+        self.suppliers = Supplier.objects.bulk_create(
+            [Supplier(name=f"Supplier {i}") for i in range(50)]
+        )
+        self.products = []
+        for i in range(10):
+            product = Product.objects.create(name=f"Producto {i}", price=1)
+            ProductVariant.objects.create(product=product, barcode=f"DS{i}")
+            self.products.append(product)
+
+    def test_import_queues_one_rescore_per_product(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for product in self.products:
+                variant = product.variants.get()
+                for n, supplier in enumerate(self.suppliers):
+                    SupplierProduct.objects.create(
+                        product_variant=variant, supplier=supplier,
+                        cost=Decimal(10 + n), min_order_quantity=1,
+                    )
+            self.assertFalse(SupplierProductScore.objects.exists())
+
+        queued = RecomputeTask.objects.filter(kind=PRODUCT_SCORES)
+        self.assertEqual(
+            sorted(queued.values_list('key', flat=True)),
+            sorted(str(product.pk) for product in self.products),
+        )
+
+        recompute.drain()
+        self.assertEqual(SupplierProductScore.objects.count(), 500)
+        cheapest = SupplierProductScore.objects.get(
+            supplier_product__supplier=self.suppliers[0],
+            supplier_product__product_variant__product=self.products[0],
+        )
+        self.assertEqual(cheapest.cost_score, 5.0)
+
+
+class SupplierProductScoreTest(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name="Taladro", price=1)
+        self.variant = ProductVariant.objects.create(product=self.product, barcode="SPS1")
+
+    def _offers(self, count, variant=None):
+        variant = variant or self.variant
+        suppliers = Supplier.objects.bulk_create(
+            [Supplier(name=f"S{variant.pk}-{i}") for i in range(count)]
+        )
+        return SupplierProduct.objects.bulk_create([
+            SupplierProduct(
+                product_variant=variant, supplier=supplier,
+                cost=Decimal(10 + i), min_order_quantity=1 + i,
+            )
+            for i, supplier in enumerate(suppliers)
+        ])
+
+    def _score(self, offer):
+        return SupplierProductScore.objects.get(supplier_product=offer)
+
+    def test_scores_span_one_to_five(self):
+        offers = self._offers(3)
+        SupplierProductScore.calculate_scores_for_product(self.product)
+
+        cheapest, middle, dearest = (self._score(offer) for offer in offers)
+        self.assertEqual((cheapest.cost_score, cheapest.quantity_score, cheapest.overall_score), (5.0, 5.0, 5.0))
+        self.assertEqual((middle.cost_score, middle.quantity_score), (3.0, 3.0))
+        self.assertEqual((dearest.cost_score, dearest.overall_score), (1.0, 1.0))
+
+    def test_inactive_offers_score_zero_and_are_ignored_for_bounds(self):
+        offers = self._offers(3)
+        SupplierProduct.objects.filter(pk=offers[2].pk).update(is_active=False)
+        SupplierProductScore.calculate_scores_for_product(self.product)
+
+        self.assertEqual(self._score(offers[2]).overall_score, 0.0)
+        self.assertEqual(self._score(offers[1]).cost_score, 1.0)
+
+    def test_recalculation_updates_existing_rows(self):
+        offers = self._offers(2)
+        SupplierProductScore.calculate_scores_for_product(self.product)
+        SupplierProduct.objects.filter(pk=offers[0].pk).update(cost=Decimal(50))
+        SupplierProductScore.calculate_scores_for_product(self.product)
+
+        self.assertEqual(SupplierProductScore.objects.count(), 2)
+        self.assertEqual(self._score(offers[0]).cost_score, 1.0)
+
+    def test_query_count_does_not_depend_on_offers(self):
+        self._offers(3)
+        with self.assertNumQueries(2):  # one read, one upsert
+            SupplierProductScore.calculate_scores_for_product(self.product)
+        self._offers(40)
+        with self.assertNumQueries(2):
+            SupplierProductScore.calculate_scores_for_product(self.product)
+
+    def test_rescore_all_covers_every_product(self):
+        self._offers(3)
+        other = Product.objects.create(name="Pala", price=1)
+        self._offers(2, variant=ProductVariant.objects.create(product=other, barcode="SPS2"))
+
+        self.assertEqual(SupplierProductScore.rescore_all(), 5)
+        self.assertEqual(
+            SupplierProductScore.objects.filter(
+                supplier_product__product_variant__product=other, cost_score=5.0
+            ).count(),
+            1,
+        )
+
+
+class BestOfferTest(TestCase):
+    def setUp(self):
+        product = Product.objects.create(name="Cemento", price=1)
+        self.variant = ProductVariant.objects.create(product=product, barcode="BO1")
+        self.bulk, self.retail, self.idle = Supplier.objects.bulk_create([
+            Supplier(name="Bulk"), Supplier(name="Retail"), Supplier(name="Idle"),
+        ])
+        SupplierProduct.objects.bulk_create([
+            SupplierProduct(product_variant=self.variant, supplier=self.bulk, cost=Decimal("80"), min_order_quantity=100),
+            SupplierProduct(product_variant=self.variant, supplier=self.retail, cost=Decimal("95"), min_order_quantity=1),
+            SupplierProduct(product_variant=self.variant, supplier=self.idle, cost=Decimal("50"), min_order_quantity=1, is_active=False),
+        ])
+
+    def test_small_quantity_gets_cheapest_reachable_offer(self):
+        self.assertEqual(SupplierProduct.objects.best_offer(self.variant, 10).supplier, self.retail)
+
+    def test_large_quantity_unlocks_bulk_price(self):
+        self.assertEqual(SupplierProduct.objects.best_offer(self.variant, 100).supplier, self.bulk)
+
+    def test_best_offer_is_a_single_query(self):
+        with self.assertNumQueries(1):
+            SupplierProduct.objects.best_offer(self.variant, 5)
+
+    def test_no_offer_below_any_minimum(self):
+        SupplierProduct.objects.filter(supplier=self.retail).update(min_order_quantity=20)
+        self.assertIsNone(SupplierProduct.objects.best_offer(self.variant, 5))
+
+
+class MinOrderQuantityMigrationTest(TestCase):
+    def test_parses_free_text_quantities(self):
+        migration = importlib.import_module('productsupplier.migrations.0005_numeric_min_order_quantity')
+        parse = migration.parse_min_order_quantity
+        self.assertEqual(parse("12"), 12)
+        self.assertEqual(parse("24 pzas"), 24)
+        self.assertEqual(parse("caja de 6"), 6)
+        self.assertEqual(parse("2,5 kg"), 3)
+        self.assertEqual(parse("sin minimo"), 1)
+        self.assertEqual(parse(""), 1)
+
+
+CATALOG = """barcode,name,price,brand,cost,min_order_quantity,is_active
+CAT1,Martillo,100.00,Pretul,60.00,10,1
+CAT2,Pinzas,80.00,Truper,45.50,,yes
+CAT3,Desarmador,30.00,,,,
+CAT4,Serrucho,abc,Pretul,10,1,1
+"""
+
+
+class CatalogImportTestCase(TestCase):
+    def setUp(self):
+        self.supplier = Supplier.objects.create(name="Truper")
+        Brand.objects.create(name="Pretul")
+
+    def _import(self, text, fmt='csv', **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return import_catalog(self.supplier, io.StringIO(text), fmt, **kwargs)
+
+
+class CatalogImportTest(CatalogImportTestCase):
+    def test_creates_products_variants_brands_and_offers(self):
+        result = self._import(CATALOG)
+        self.assertEqual((result.rows, result.created, result.updated, result.offers, result.rejected), (4, 3, 0, 2, 1))
+        self.assertEqual(list(result.errors), [5])
+        variant = ProductVariant.objects.select_related('product', 'brand').get(barcode="CAT2")
+        self.assertEqual((variant.product.name, variant.product.price, variant.brand.name), ("Pinzas", Decimal("80.00"), "Truper"))
+        self.assertIsNone(ProductVariant.objects.get(barcode="CAT3").brand)
+        offer = SupplierProduct.objects.get(product_variant__barcode="CAT1")
+        self.assertEqual((offer.cost, offer.min_order_quantity, offer.is_active), (Decimal("60.00"), 10, True))
+
+    def test_reimport_updates_in_place(self):
+        self._import(CATALOG)
+        result = self._import("barcode,name,price,cost,is_active\nCAT1,Martillo 16oz,120.00,55.00,0\n")
+        self.assertEqual((result.created, result.updated), (0, 1))
+        variant = ProductVariant.objects.select_related('product', 'brand').get(barcode="CAT1")
+        self.assertEqual((variant.product.name, variant.product.price, variant.brand.name), ("Martillo 16oz", Decimal("120.00"), "Pretul"))
+        offer = SupplierProduct.objects.get(product_variant=variant)
+        self.assertEqual((offer.cost, offer.is_active), (Decimal("55.00"), False))
+        self.assertEqual(Product.objects.count(), 3)
+
+    def test_price_update_reaches_sibling_variants_in_the_barcode_cache(self):
+        self._import(CATALOG)
+        ProductVariant.objects.create(product=Product.objects.get(variants__barcode="CAT1"), barcode="CAT1B")
+        barcode_cache.clear()
+        self.assertEqual(lookup_barcode("CAT1B")['price'], "100.00")
+        self._import("barcode,name,price\nCAT1,Martillo,125.00\n")
+        self.assertEqual(lookup_barcode("CAT1B")['price'], "125.00")
+
+    def test_scores_are_computed_once_at_the_end(self):
+        result = self._import(CATALOG)
+        self.assertFalse(RecomputeTask.objects.exists())
+        self.assertEqual(result.rescored, 2)
+        self.assertEqual(SupplierProductScore.objects.count(), 2)
+
+    def test_json_lines(self):
+        lines = '{"barcode": "J1", "name": "Cinta", "price": 15, "cost": "9.5", "is_active": true}\n\n[1]\n'
+        result = self._import(lines, 'jsonl')
+        self.assertEqual((result.created, result.offers, result.rejected), (1, 1, 1))
+        self.assertEqual(SupplierProduct.objects.get().cost, Decimal("9.50"))
+
+    def test_statements_per_batch_do_not_grow_with_rows(self):
+        rows = "".join(f"B{i},Producto {i},10,Marca {i % 3},5,1,1\n" for i in range(60))
+        header = "barcode,name,price,brand,cost,min_order_quantity,is_active\n"
+        self._import(header + rows, batch_size=60)
+        # Brand map, then per batch: lookup, product and variant upserts, offers, cache invalidation; then the rescore
+        with self.assertNumQueries(12):
+            self._import(header + rows, batch_size=60)
+
+
+class ParallelCatalogImportTest(CatalogImportTestCase):
+    def _snapshot(self):
+        return sorted(SupplierProduct.objects.values_list(
+            'product_variant__barcode', 'product_variant__product__name', 'product_variant__brand__name',
+            'cost', 'min_order_quantity', 'is_active'))
+
+    def test_worker_pool_matches_serial_import(self):
+        catalog = CATALOG + "".join(f"P{i},Producto {i},10,Marca {i % 4},{5 + i % 7},2,1\n" for i in range(40))
+        serial = self._import(catalog, batch_size=7)
+        expected = self._snapshot()
+        SupplierProduct.objects.all().delete()
+        parallel = self._import(catalog, batch_size=7, workers=2)
+        self.assertEqual(self._snapshot(), expected)
+        self.assertEqual((parallel.rows, parallel.rejected, parallel.errors), (serial.rows, serial.rejected, serial.errors))
+        self.assertEqual([chunk.first_line for chunk in parallel.chunks], list(range(2, 46, 7)))
+        self.assertEqual(sum(chunk.records for chunk in parallel.chunks), 44)
+
+    def test_chunks_do_not_split_quoted_line_breaks(self):
+        catalog = 'barcode,name,price\nQ1,"Llave\nEspañola",10\nQ2,Tuerca,1\nQ3,"Pija ""6""",2\n'
+        result = self._import(catalog, batch_size=1)
+        self.assertEqual([chunk.first_line for chunk in result.chunks], [2, 4, 5])
+        self.assertEqual(Product.objects.get(variants__barcode="Q1").name, "Llave\nEspañola")
+        self.assertEqual(Product.objects.get(variants__barcode="Q3").name, 'Pija "6"')
+
+    def test_inch_marks_do_not_merge_chunks(self):
+        rows = "".join(f'T{i},Tubo 1/2" PVC {i},10\n' for i in range(25))
+        result = self._import("barcode,name,price\n" + rows, batch_size=10)
+        self.assertEqual([chunk.records for chunk in result.chunks], [10, 10, 5])
+        self.assertEqual([chunk.first_line for chunk in result.chunks], [2, 12, 22])
+        self.assertEqual(Product.objects.get(variants__barcode="T3").name, 'Tubo 1/2" PVC 3')
+
+    def test_errors_keep_their_file_line_numbers(self):
+        result = self._import(CATALOG, batch_size=1, workers=2)
+        self.assertEqual(result.errors, {5: "price is not a number: 'abc'"})
+
+
+class CatalogImportEntryPointTest(TestCase):
+    def setUp(self):
+        self.supplier = Supplier.objects.create(name="Truper")
+
+    def test_command(self):
+        out = io.StringIO()
+        path = self._write(CATALOG)
+        call_command('import_catalog', path, supplier=self.supplier.pk, stdout=out, stderr=io.StringIO())
+        self.assertIn("4 rows: 3 products created", out.getvalue())
+
+    def test_upload(self):
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+        upload = SimpleUploadedFile("catalogo.csv", CATALOG.encode(), content_type="text/csv")
+        response = self.client.post(reverse('catalog_import'), {'supplier': self.supplier.pk, 'catalog': upload})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 3)
+
+    def _write(self, text):
+        handle = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+        with handle:
+            handle.write(text)
+        self.addCleanup(os.remove, handle.name)
+        return handle.name
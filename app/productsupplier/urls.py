@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path("catalogo/importar/", views.catalog_import, name="catalog_import"),
+]
@@ -1,3 +1,33 @@
-from django.shortcuts import render
+import io
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+from .catalog_import import import_catalog
+from .forms import CatalogImportForm
 
-# Create your views here.
+
+@require_POST
+@staff_member_required
+def catalog_import(request):
+    """
+    Upload a supplier catalog (CSV or JSON Lines).
+
+    Large uploads are spooled to a temporary file by Django and read from
+    there line by line.
+    """
+    form = CatalogImportForm(request.POST, request.FILES)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+
+    data = form.cleaned_data
+    lines = io.TextIOWrapper(data['catalog'].file, encoding='utf-8-sig', newline='')
+    result = import_catalog(data['supplier'], lines, data['format'])
+    return JsonResponse({
+        'rows': result.rows,
+        'created': result.created,
+        'updated': result.updated,
+        'offers': result.offers,
+        'rescored': result.rescored,
+        'rejected': result.rejected,
+        'errors': result.errors,
+    }, status=201)
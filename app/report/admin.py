@@ -1,3 +1,16 @@
 from django.contrib import admin
+from .models import SalesSummary, StockValuation
 
-# Register your models here.
+
+@admin.register(StockValuation)
+class StockValuationAdmin(admin.ModelAdmin):
+    list_display = ('product_variant', 'supplier', 'status', 'units', 'cost_value', 'refreshed_at')
+    list_filter = ('status',)
+    readonly_fields = ('product_variant', 'supplier', 'status', 'units', 'cost_value', 'refreshed_at')
+
+
+@admin.register(SalesSummary)
+class SalesSummaryAdmin(admin.ModelAdmin):
+    list_display = ('product_variant', 'supplier', 'day', 'units', 'revenue', 'cost', 'profit')
+    date_hierarchy = 'day'
+    readonly_fields = ('product_variant', 'supplier', 'day', 'units', 'revenue', 'cost', 'profit', 'refreshed_at')
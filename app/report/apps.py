@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ReportConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'report'
+
+    def ready(self):
+        import report.signals  # This triggers the signal registration
+        from core import recompute
+        from .services import INVENTORY_REPORT, refresh_report
+        recompute.register(INVENTORY_REPORT, refresh_report)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from report.services import REFRESH_BATCH_SIZE, rebuild_all
+
+
+class Command(BaseCommand):
+    help = "Recompute every StockValuation and SalesSummary row from the items table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=REFRESH_BATCH_SIZE,
+                            help="Variants refreshed per transaction")
+
+    def handle(self, *args, batch_size, **options):
+        variants = rebuild_all(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Report rebuilt for {variants} variants"))
@@ -0,0 +1,62 @@
+# Generated by Django 4.2 on 2026-10-18 14:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('inventory', '0008_inventoryitem_details'),
+        ('srm', '0010_purchase_orders'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockValuation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=20)),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('cost_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+                ('product_variant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='inventory.productvariant')),
+                ('supplier', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='srm.supplier')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SalesSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cost', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('profit', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+                ('product_variant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='inventory.productvariant')),
+                ('supplier', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='srm.supplier')),
+            ],
+            options={
+                'verbose_name_plural': 'Sales summaries',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='stockvaluation',
+            index=models.Index(fields=['product_variant', 'status'], name='report_stoc_product_1460bf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockvaluation',
+            index=models.Index(fields=['status'], name='report_stoc_status_f64185_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salessummary',
+            index=models.Index(fields=['day'], name='report_sale_day_036839_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salessummary',
+            index=models.Index(fields=['product_variant', 'day'], name='report_sale_product_922b9f_idx'),
+        ),
+    ]
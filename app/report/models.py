@@ -1,3 +1,51 @@
 from django.db import models
 
-# Create your models here.
+
+class StockValuation(models.Model):
+    """
+    Units and purchase cost per variant, supplier and item status.
+
+    Materialized from InventoryItem by report.services.refresh_variants and
+    kept current through the core.recompute queue, so dashboards never scan
+    the items table.
+    """
+    product_variant = models.ForeignKey('inventory.ProductVariant', on_delete=models.CASCADE, related_name='+')
+    supplier = models.ForeignKey('srm.Supplier', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    status = models.CharField(max_length=20)
+    units = models.PositiveIntegerField(default=0)
+    cost_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['product_variant', 'status']),
+            models.Index(fields=['status']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_variant_id} {self.status}: {self.units}"
+
+
+class SalesSummary(models.Model):
+    """
+    Sold units, net revenue (after discount, with tax), cost and profit per
+    variant, supplier and day of sale. Same refresh path as StockValuation.
+    """
+    product_variant = models.ForeignKey('inventory.ProductVariant', on_delete=models.CASCADE, related_name='+')
+    supplier = models.ForeignKey('srm.Supplier', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    day = models.DateField()
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cost = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    profit = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Sales summaries"
+        indexes = [
+            models.Index(fields=['day']),
+            models.Index(fields=['product_variant', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_variant_id} {self.day}: {self.units}"
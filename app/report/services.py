@@ -0,0 +1,132 @@
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import TruncDate, TruncDay, TruncMonth, TruncWeek
+from inventory.models import InventoryItem, ProductVariant
+from .models import SalesSummary, StockValuation
+
+# core.recompute kind; keys are ProductVariant ids
+INVENTORY_REPORT = 'inventory_report'
+
+# Item statuses whose sale still stands
+SOLD_STATUSES = ('sold', 'shipped', 'delivered')
+
+REFRESH_BATCH_SIZE = 500
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+# Same arithmetic as InventoryItem.calculate_profit(), as a SQL expression.
+# Percentages are multiplied by 0.01 so SQLite does not integer-divide them
+NET_REVENUE = ExpressionWrapper(
+    F('sale_price')
+    * (Value(Decimal('1')) - F('discount_applied') * Value(Decimal('0.01')))
+    * (Value(Decimal('1')) + F('tax_rate') * Value(Decimal('0.01'))),
+    output_field=MONEY,
+)
+
+DIMENSIONS = {
+    'product': ('product_variant__product_id', 'product_variant__product__name'),
+    'brand': ('product_variant__brand_id', 'product_variant__brand__name'),
+    'supplier': ('supplier_id', 'supplier__name'),
+}
+
+PERIODS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+def refresh_variants(variant_ids):
+    """
+    Rebuild the summary rows of some variants from their items.
+
+    Two grouped aggregates over the variants' items, computed by the
+    database, replace the old rows in one transaction.
+    """
+    variant_ids = sorted({int(pk) for pk in variant_ids})
+    items = InventoryItem.objects.filter(product_variant_id__in=variant_ids).order_by()
+
+    stock = items.values('product_variant_id', 'supplier_id', 'current_status').annotate(
+        units=Count('pk'),
+        cost_value=Sum('purchase_price'),
+    )
+    sales = items.filter(
+        current_status__in=SOLD_STATUSES, date_sold__isnull=False, sale_price__isnull=False,
+    ).annotate(
+        day=TruncDate('date_sold'),
+    ).values('product_variant_id', 'supplier_id', 'day').annotate(
+        units=Count('pk'),
+        revenue=Sum(NET_REVENUE),
+        cost=Sum('purchase_price'),
+    )
+
+    with transaction.atomic():
+        StockValuation.objects.filter(product_variant_id__in=variant_ids).delete()
+        SalesSummary.objects.filter(product_variant_id__in=variant_ids).delete()
+        StockValuation.objects.bulk_create([
+            StockValuation(
+                product_variant_id=row['product_variant_id'],
+                supplier_id=row['supplier_id'],
+                status=row['current_status'],
+                units=row['units'],
+                cost_value=row['cost_value'] or 0,
+            )
+            for row in stock
+        ], batch_size=REFRESH_BATCH_SIZE)
+        SalesSummary.objects.bulk_create([
+            SalesSummary(
+                product_variant_id=row['product_variant_id'],
+                supplier_id=row['supplier_id'],
+                day=row['day'],
+                units=row['units'],
+                revenue=_cents(row['revenue']),
+                cost=_cents(row['cost']),
+                profit=_cents(row['revenue']) - _cents(row['cost']),
+            )
+            for row in sales
+        ], batch_size=REFRESH_BATCH_SIZE)
+
+
+def _cents(value):
+    return Decimal(value or 0).quantize(Decimal('0.01'))
+
+
+def refresh_report(keys):
+    """core.recompute handler for INVENTORY_REPORT"""
+    refresh_variants(keys)
+
+
+def rebuild_all(batch_size=REFRESH_BATCH_SIZE):
+    """Refresh every variant, a batch at a time. Returns the number of variants"""
+    variant_ids = list(ProductVariant.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(variant_ids), batch_size):
+        refresh_variants(variant_ids[start:start + batch_size])
+    return len(variant_ids)
+
+
+def stock_valuation(group_by='product', statuses=InventoryItem.IN_STOCK_STATUSES):
+    """Units, cost and retail value of stock per product, brand or supplier"""
+    key, label = DIMENSIONS[group_by]
+    return StockValuation.objects.filter(status__in=statuses).values(key, label).annotate(
+        # Before `units` is re-bound to the aggregate below
+        retail_value=Sum(F('units') * F('product_variant__product__price'), output_field=MONEY),
+        units=Sum('units'),
+        cost_value=Sum('cost_value'),
+    ).order_by('-cost_value', label)
+
+
+def sales_margins(group_by='product', period='month', start=None, end=None):
+    """Units, revenue, cost and profit per period and product, brand or supplier"""
+    key, label = DIMENSIONS[group_by]
+    rows = SalesSummary.objects.all()
+    if start:
+        rows = rows.filter(day__gte=start)
+    if end:
+        rows = rows.filter(day__lte=end)
+    return rows.annotate(period=PERIODS[period]('day')).values('period', key, label).annotate(
+        units=Sum('units'),
+        revenue=Sum('revenue'),
+        cost=Sum('cost'),
+        profit=Sum('profit'),
+    ).order_by('-period', '-profit', label)
@@ -0,0 +1,2 @@
+# This ensures the receivers are registered when the app loads
+from . import receivers
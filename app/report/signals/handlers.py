@@ -0,0 +1,9 @@
+# report/signals/handlers.py
+
+from core import recompute
+from ..services import INVENTORY_REPORT
+
+def schedule_report_refresh(sender, product_variant_ids, using='default', **kwargs):
+    # Collapsed per variant and refreshed after commit by the recompute worker
+    for variant_id in product_variant_ids:
+        recompute.schedule(INVENTORY_REPORT, variant_id, using=using)
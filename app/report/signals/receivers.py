@@ -0,0 +1,9 @@
+# report/signals/receivers.py
+
+from django.dispatch import receiver
+from inventory.events import items_changed
+from .handlers import schedule_report_refresh
+
+@receiver(items_changed)
+def on_items_changed(sender, **kwargs):
+    schedule_report_refresh(sender, **kwargs)
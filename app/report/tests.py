@@ -1,3 +1,121 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from core import recompute
+from core.models import RecomputeTask
+from inventory.models import Brand, InventoryItem, Product, ProductVariant
+from inventory.services import receive_items
+from report.models import SalesSummary, StockValuation
+from report.services import INVENTORY_REPORT, rebuild_all, refresh_variants, sales_margins, stock_valuation
+from srm.models import Supplier
 
-# Create your tests here.
+
+class ReportTestCase(TestCase):
+    def setUp(self):
+        # Creating the supplier already queues work, so capture from the start
+        with self.captureOnCommitCallbacks(execute=True):
+            self.supplier = Supplier.objects.create(name="Truper")
+            brand = Brand.objects.create(name="Pretul")
+            self.product = Product.objects.create(name="Martillo", price=Decimal("100.00"))
+            self.variant = ProductVariant.objects.create(product=self.product, brand=brand, barcode="REP1")
+            self.items = receive_items(self.variant, 5, Decimal("40.00"), supplier=self.supplier)
+            for status in ('quality_check', 'ready_for_sale'):
+                InventoryItem.objects.bulk_update_status(self.items, status)
+        recompute.drain()
+
+    def _sell(self, items, sale_price, discount=0, tax=0):
+        InventoryItem.objects.filter(pk__in=[item.pk for item in items]).update(
+            sale_price=sale_price, discount_applied=discount, tax_rate=tax)
+        InventoryItem.objects.bulk_update_status(items, 'reserved')
+        InventoryItem.objects.bulk_update_status(items, 'sold')
+
+
+class RefreshTest(ReportTestCase):
+    def test_valuation_groups_stock_by_status(self):
+        refresh_variants([self.variant.pk])
+        row = StockValuation.objects.get(product_variant=self.variant)
+        self.assertEqual((row.status, row.units, row.cost_value, row.supplier), ('ready_for_sale', 5, Decimal("200.00"), self.supplier))
+
+    def test_margins_match_calculate_profit(self):
+        self._sell(self.items[:2], Decimal("100.00"), discount=Decimal("10"), tax=Decimal("16"))
+        refresh_variants([self.variant.pk])
+        summary = SalesSummary.objects.get(product_variant=self.variant)
+        expected = sum(InventoryItem.objects.get(pk=item.pk).calculate_profit() for item in self.items[:2])
+        self.assertEqual(summary.units, 2)
+        self.assertEqual(summary.revenue, Decimal("208.80"))
+        self.assertEqual(summary.profit, expected)
+        self.assertEqual(summary.day, timezone.now().date())
+
+    def test_refresh_replaces_previous_rows(self):
+        refresh_variants([self.variant.pk])
+        self._sell(self.items[:1], Decimal("90.00"))
+        refresh_variants([self.variant.pk])
+        statuses = dict(StockValuation.objects.values_list('status', 'units'))
+        self.assertEqual(statuses, {'ready_for_sale': 4, 'sold': 1})
+
+    def test_refresh_is_a_fixed_number_of_queries(self):
+        self._sell(self.items[:1], Decimal("90.00"))
+        with self.assertNumQueries(8):  # 2 deletes, 2 aggregates, 2 inserts, savepoint pair
+            refresh_variants([self.variant.pk])
+
+    def test_rebuild_all(self):
+        self.assertEqual(rebuild_all(), 1)
+        self.assertTrue(StockValuation.objects.exists())
+
+
+class IncrementalRefreshTest(ReportTestCase):
+    def test_status_changes_queue_the_variant(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._sell(self.items[:2], Decimal("100.00"))
+        keys = set(RecomputeTask.objects.filter(kind=INVENTORY_REPORT).values_list('key', flat=True))
+        self.assertEqual(keys, {str(self.variant.pk)})
+
+        recompute.drain()
+        self.assertEqual(SalesSummary.objects.get(product_variant=self.variant).units, 2)
+        self.assertFalse(RecomputeTask.objects.exists())
+
+
+class ReportQueryTest(ReportTestCase):
+    def setUp(self):
+        super().setUp()
+        self._sell(self.items[:2], Decimal("100.00"))
+        refresh_variants([self.variant.pk])
+        SalesSummary.objects.create(
+            product_variant=self.variant, supplier=self.supplier, day=timezone.now().date() - timedelta(days=62),
+            units=1, revenue=Decimal("50.00"), cost=Decimal("40.00"), profit=Decimal("10.00"),
+        )
+
+    def test_stock_valuation_by_brand(self):
+        rows = list(stock_valuation('brand'))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((rows[0]['product_variant__brand__name'], rows[0]['units'], rows[0]['retail_value']),
+                         ("Pretul", 3, Decimal("300.00")))
+
+    def test_sales_margins_by_supplier_and_month(self):
+        rows = list(sales_margins('supplier', 'month'))
+        self.assertEqual([(row['units'], row['profit']) for row in rows],
+                         [(2, Decimal("120.00")), (1, Decimal("10.00"))])
+        recent = list(sales_margins('supplier', 'month', start=timezone.now().date() - timedelta(days=7)))
+        self.assertEqual(len(recent), 1)
+
+    def test_dashboard_reads_summaries_only(self):
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+        # Session and user, then one query per table
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('report_dashboard'), {'group': 'supplier', 'period': 'week'})
+        self.assertContains(response, "Truper")
+
+    def test_dashboard_is_staff_only(self):
+        response = self.client.get(reverse('report_dashboard'))
+        self.assertEqual(response.status_code, 302)
+        self.assertNotContains(response, "Truper", status_code=302)
+
+    def test_dashboard_ignores_impossible_dates(self):
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+        response = self.client.get(reverse('report_dashboard'), {'start': '2024-13-45', 'end': '2024-02-30'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['start'])
+        self.assertIsNone(response.context['end'])
@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path("reportes/", views.report_dashboard, name="report_dashboard"),
+]
@@ -1,3 +1,44 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render
+from django.utils.dateparse import parse_date
+from .services import DIMENSIONS, PERIODS, sales_margins, stock_valuation
 
-# Create your views here.
+# Rows shown per table; the summaries can still hold one row per product
+REPORT_ROW_LIMIT = 100
+
+def _date_param(request, name):
+    # Malformed or impossible dates (2024-13-45) just drop the filter
+    try:
+        return parse_date(request.GET.get(name, '') or '')
+    except ValueError:
+        return None
+
+@staff_member_required
+def report_dashboard(request):
+    """Valuation and margins read from the precomputed summary tables"""
+    group_by = request.GET.get('group', 'product')
+    if group_by not in DIMENSIONS:
+        group_by = 'product'
+    period = request.GET.get('period', 'month')
+    if period not in PERIODS:
+        period = 'month'
+    start = _date_param(request, 'start')
+    end = _date_param(request, 'end')
+
+    _, label = DIMENSIONS[group_by]
+    context = {
+        'group_by': group_by,
+        'period': period,
+        'groups': list(DIMENSIONS),
+        'periods': list(PERIODS),
+        'valuation': [
+            {**row, 'label': row[label]} for row in stock_valuation(group_by)[:REPORT_ROW_LIMIT]
+        ],
+        'margins': [
+            {**row, 'label': row[label]}
+            for row in sales_margins(group_by, period, start, end)[:REPORT_ROW_LIMIT]
+        ],
+        'start': start,
+        'end': end,
+    }
+    return render(request, 'report.html', context)
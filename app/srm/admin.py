@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Supplier  # Import your Supplier model
+from .models import PurchaseOrder, PurchaseOrderLine, Supplier  # Import your Supplier model
 
 @admin.register(Supplier)  # This decorator registers the model
 class SupplierAdmin(admin.ModelAdmin):
@@ -9,3 +9,17 @@ class SupplierAdmin(admin.ModelAdmin):
     ordering = ('name',)  # Default ordering
 
     readonly_fields = ('overall_score','credit_score','reliability_score','cost_delivery_score')
+
+
+class PurchaseOrderLineInline(admin.TabularInline):
+    model = PurchaseOrderLine
+    raw_id_fields = ('product_variant',)
+    extra = 0
+
+
+@admin.register(PurchaseOrder)
+class PurchaseOrderAdmin(admin.ModelAdmin):
+    list_display = ('reference', 'supplier', 'status', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('reference', 'supplier__name')
+    inlines = [PurchaseOrderLineInline]
@@ -6,3 +6,8 @@ class SrmConfig(AppConfig):
 
     def ready(self):
         import srm.signals  # This triggers the signal registration
+        from core import export, recompute
+        from .services import SUPPLIER_SCORES, rescore_suppliers
+        recompute.register(SUPPLIER_SCORES, rescore_suppliers)
+        from .exports import SUPPLIERS
+        export.register(SUPPLIERS)
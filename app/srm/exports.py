@@ -0,0 +1,14 @@
+from core.export import Dataset
+from .models import Supplier
+
+# Suppliers with their scores
+SUPPLIERS = Dataset('suppliers', Supplier.objects.order_by('pk'), [
+    ('id', 'pk'),
+    ('name', 'name'),
+    ('credit_days', 'credit_days'),
+    ('delivery_cost', 'delivery_cost'),
+    ('reliability_score', 'reliability_score'),
+    ('credit_score', 'credit_score'),
+    ('cost_delivery_score', 'cost_delivery_score'),
+    ('overall_score', 'overall_score'),
+])
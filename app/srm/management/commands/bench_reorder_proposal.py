@@ -0,0 +1,46 @@
+from decimal import Decimal
+from core.benchmarks import BenchmarkCommand
+from inventory.models import Product, ProductVariant, StockCounter
+from productsupplier.models import SupplierProduct, SupplierProductScore
+from srm.models import Supplier
+from srm.reorder import build_reorder_proposal
+
+
+class Command(BenchmarkCommand):
+    help = "Time a full-catalog reorder proposal"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--variants', type=int, default=50000)
+        parser.add_argument('--suppliers', type=int, default=20)
+        parser.add_argument('--offers-per-variant', type=int, default=3)
+
+    def run_benchmark(self, variants, suppliers, offers_per_variant, **options):
+        supplier_objs = Supplier.objects.bulk_create(
+            [Supplier(name=f"Supplier {i}") for i in range(suppliers)]
+        )
+        product_objs = Product.objects.bulk_create(
+            [Product(name=f"Producto {i}", price=1, min_stock=10, max_stock=40) for i in range(variants)],
+            batch_size=2000,
+        )
+        variant_objs = ProductVariant.objects.bulk_create(
+            [ProductVariant(product=p, barcode=f"BENCH-RO-{p.pk}") for p in product_objs],
+            batch_size=2000,
+        )
+        SupplierProduct.objects.bulk_create(
+            [
+                SupplierProduct(
+                    product_variant=v, supplier=supplier_objs[(v.pk + n) % suppliers],
+                    cost=Decimal(10 + (v.pk * 7 + n * 13) % 90),
+                    min_order_quantity=1 + (v.pk + n) % 12,
+                )
+                for v in variant_objs for n in range(min(offers_per_variant, suppliers))
+            ],
+            batch_size=2000,
+        )
+        SupplierProductScore.rescore_all()
+        StockCounter.apply({(v.pk, 'ready_for_sale'): v.pk % 30 for v in variant_objs})
+        self.stdout.write(f"{variants} variants, {suppliers} suppliers")
+
+        proposal = build_reorder_proposal()
+        self.stdout.write(f"{sum(len(o.lines) for o in proposal.orders)} lines in {len(proposal.orders)} drafts")
+        self.measure("build_reorder_proposal", build_reorder_proposal, repeat=3)
@@ -0,0 +1,62 @@
+import random
+from django.db.models import Max, Min
+from core.benchmarks import BenchmarkCommand
+from srm.models import Supplier
+from srm.services import calculate_scores, supplier_score_bounds
+
+
+def legacy_calculate_scores():
+    # The per-row Python loop calculate_scores() used before
+    result = Supplier.objects.aggregate(
+        max_credit=Max('credit_days'), min_credit=Min('credit_days'),
+        max_delivery_cost=Max('delivery_cost'), min_delivery_cost=Min('delivery_cost'))
+    minimum_credit = result["min_credit"] or 0
+    delta_credit = (result["max_credit"] or 0) - minimum_credit or 1
+    minimum_delivery = result["min_delivery_cost"] or 0
+    delta_delivery = (result["max_delivery_cost"] or 0) - minimum_delivery or 1
+    suppliers = Supplier.objects.all()
+    for s in suppliers:
+        s.credit_score = round(1 + ((s.credit_days - minimum_credit) / delta_credit) * 4, 2)
+        s.cost_delivery_score = round(5 - ((s.delivery_cost - minimum_delivery) / delta_delivery) * 4, 2)
+    Supplier.objects.bulk_update(suppliers, ['credit_score', 'cost_delivery_score'])
+
+
+class Command(BenchmarkCommand):
+    help = "Compare the Python supplier scoring loop with the single UPDATE engine"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--suppliers', type=int, nargs='+', default=[10_000, 100_000])
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def run_benchmark(self, suppliers, repeat, **options):
+        rng = random.Random(42)
+        created = 0
+        for total in sorted(suppliers):
+            Supplier.objects.bulk_create(
+                [
+                    Supplier(
+                        name=f"Supplier {i}",
+                        credit_days=rng.randint(1, 89),
+                        delivery_cost=rng.uniform(1, 499),
+                    )
+                    for i in range(created, total)
+                ],
+                batch_size=5000,
+            )
+            # Fixed extremes so single-supplier edits stay inside the bounds
+            Supplier.objects.bulk_create([
+                Supplier(name="Min", credit_days=0, delivery_cost=0.0),
+                Supplier(name="Max", credit_days=90, delivery_cost=500.0),
+            ])
+            created = total
+            one = Supplier.objects.filter(name="Supplier 0").first()
+
+            self.stdout.write(f"-- {total} suppliers")
+            self.measure("python loop + bulk_update", legacy_calculate_scores, repeat)
+            self.measure("single UPDATE", calculate_scores, repeat)
+            self.measure(
+                "one supplier saved, bounds unchanged",
+                lambda: calculate_scores(supplier_score_bounds(), supplier_ids=[one.pk]),
+                repeat,
+            )
+            Supplier.objects.filter(name__in=["Min", "Max"]).delete()
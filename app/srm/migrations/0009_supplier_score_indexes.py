@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-18 14:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('srm', '0008_rename_deleivery_cost_supplier_delivery_cost'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='supplier',
+            index=models.Index(fields=['credit_days'], name='srm_supplie_credit__d30c00_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='supplier',
+            index=models.Index(fields=['delivery_cost'], name='srm_supplie_deliver_10e2c1_idx'),
+        ),
+    ]
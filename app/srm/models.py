@@ -14,6 +14,65 @@ class Supplier(TimeStampedModel):
 
     class Meta:
         app_label = 'srm'
+        indexes = [
+            # Let MIN()/MAX() for score normalisation read the index ends
+            models.Index(fields=['credit_days']),
+            models.Index(fields=['delivery_cost']),
+        ]
 
     def __str__(self):
         return self.name
+
+
+class PurchaseOrder(TimeStampedModel):
+    STATUS_CHOICES = [
+        ('draft', 'Draft'),
+        ('sent', 'Sent'),
+        ('partial', 'Partially Received'),
+        ('received', 'Received'),
+        ('cancelled', 'Cancelled'),
+    ]
+    # Orders whose lines can still be received
+    OPEN_STATUSES = ('draft', 'sent', 'partial')
+
+    supplier = models.ForeignKey(Supplier, on_delete=models.PROTECT, related_name="purchase_orders")
+    reference = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
+    notes = models.TextField(blank=True, null=True)
+
+    class Meta:
+        app_label = 'srm'
+        indexes = [
+            models.Index(fields=['supplier', 'status']),
+        ]
+
+    def __str__(self):
+        return self.reference or f"PO #{self.pk}"
+
+
+class PurchaseOrderLine(models.Model):
+    order = models.ForeignKey(PurchaseOrder, on_delete=models.CASCADE, related_name="lines")
+    # String reference: inventory.models imports this module
+    product_variant = models.ForeignKey('inventory.ProductVariant', on_delete=models.PROTECT, related_name="purchase_order_lines")
+    quantity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+    quantity_received = models.PositiveIntegerField(default=0)
+    unit_cost = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(Decimal("0.00"))])
+
+    class Meta:
+        app_label = 'srm'
+        unique_together = ('order', 'product_variant')
+        indexes = [
+            # Only lines still waiting for goods; outstanding queries never touch closed ones
+            models.Index(
+                fields=['order', 'product_variant'],
+                condition=models.Q(quantity_received__lt=models.F('quantity')),
+                name='po_line_open_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.order} - {self.product_variant}: {self.quantity_received}/{self.quantity}"
+
+    @property
+    def outstanding(self):
+        return self.quantity - self.quantity_received
@@ -0,0 +1,129 @@
+from collections import namedtuple
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, IntegerField, Q, Sum, Value, When
+from inventory.services import ReceiveLine, receive_lines
+from .models import PurchaseOrder, PurchaseOrderLine, Supplier
+
+LINE_BATCH_SIZE = 1000
+
+OrderLine = namedtuple('OrderLine', ['product_variant_id', 'quantity', 'unit_cost'])
+
+# Lines that still expect goods; matches the po_line_open_idx condition
+OPEN_LINE = Q(quantity_received__lt=F('quantity'))
+
+
+def create_purchase_order(supplier, lines, reference=None, notes=None, batch_size=LINE_BATCH_SIZE):
+    """
+    Create a draft PurchaseOrder with all of its lines.
+
+    Lines are OrderLines and are inserted with bulk_create, so an order
+    with thousands of lines costs a handful of statements. Without a
+    `reference` one is generated from the order id.
+    """
+    lines = list(lines)
+    for line in lines:
+        if line.quantity <= 0:
+            raise ValidationError("Ordered quantity must be positive")
+
+    with transaction.atomic():
+        order = PurchaseOrder.objects.create(supplier=supplier, reference=reference, notes=notes)
+        if reference is None:
+            order.reference = f"PO-{order.pk:06d}"
+            order.save(update_fields=['reference'])
+        PurchaseOrderLine.objects.bulk_create(
+            [
+                PurchaseOrderLine(
+                    order=order,
+                    product_variant_id=line.product_variant_id,
+                    quantity=line.quantity,
+                    unit_cost=line.unit_cost,
+                )
+                for line in lines
+            ],
+            batch_size=batch_size,
+        )
+    return order
+
+
+def create_orders_from_proposal(proposal):
+    """Turn each DraftOrder of a srm.reorder proposal into a PurchaseOrder"""
+    suppliers = Supplier.objects.in_bulk([draft.supplier_id for draft in proposal.orders])
+    return [
+        create_purchase_order(
+            suppliers[draft.supplier_id],
+            [OrderLine(line.product_variant_id, line.quantity, line.unit_cost) for line in draft.lines],
+        )
+        for draft in proposal.orders
+    ]
+
+
+def receive_purchase_order(order, quantities=None, user=None, notes=None):
+    """
+    Receive goods against an open purchase order.
+
+    `quantities` maps product variant ids to units delivered; by default
+    everything outstanding arrives. Quantities are capped at what each line
+    still expects. Items are created in batches through
+    inventory.services.receive_lines and line totals are written with one
+    UPDATE per LINE_BATCH_SIZE lines. Returns the created InventoryItems.
+    """
+    with transaction.atomic():
+        order = PurchaseOrder.objects.select_for_update().get(pk=order.pk)
+        if order.status not in PurchaseOrder.OPEN_STATUSES:
+            raise ValidationError(f"Purchase order {order} is {order.status}")
+
+        open_lines = order.lines.filter(OPEN_LINE).order_by('pk').values_list(
+            'pk', 'product_variant_id', 'quantity', 'quantity_received', 'unit_cost',
+        ).select_for_update()
+
+        receiving, arrived = [], {}
+        for pk, variant_id, quantity, received, unit_cost in open_lines:
+            outstanding = quantity - received
+            units = outstanding if quantities is None else min(quantities.get(variant_id, 0), outstanding)
+            if units <= 0:
+                continue
+            arrived[pk] = units
+            receiving.append(ReceiveLine(
+                product_variant_id=variant_id,
+                quantity=units,
+                purchase_price=unit_cost,
+                supplier_id=order.supplier_id,
+                purchase_order_reference=order.reference,
+            ))
+        if not receiving:
+            return []
+
+        items = receive_lines(receiving, user=user, notes=notes)
+        arrived = list(arrived.items())
+        for start in range(0, len(arrived), LINE_BATCH_SIZE):
+            batch = arrived[start:start + LINE_BATCH_SIZE]
+            PurchaseOrderLine.objects.filter(pk__in=[pk for pk, _ in batch]).update(
+                quantity_received=F('quantity_received') + Case(
+                    *[When(pk=pk, then=Value(units)) for pk, units in batch],
+                    output_field=IntegerField(),
+                )
+            )
+
+        order.status = 'partial' if order.lines.filter(OPEN_LINE).exists() else 'received'
+        order.save(update_fields=['status', 'updated_at'])
+    return items
+
+
+def outstanding_by_supplier():
+    """
+    Units and value still expected from each supplier, in one aggregate query.
+
+    Only open lines of open orders are read, through po_line_open_idx.
+    """
+    outstanding = F('quantity') - F('quantity_received')
+    return PurchaseOrderLine.objects.filter(
+        OPEN_LINE, order__status__in=PurchaseOrder.OPEN_STATUSES,
+    ).values(
+        'order__supplier_id', 'order__supplier__name',
+    ).annotate(
+        orders=Count('order', distinct=True),
+        lines=Count('pk'),
+        units=Sum(outstanding),
+        value=Sum(outstanding * F('unit_cost'), output_field=DecimalField(max_digits=14, decimal_places=2)),
+    ).order_by('order__supplier__name')
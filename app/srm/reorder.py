@@ -0,0 +1,138 @@
+import re
+import uuid
+from collections import namedtuple
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+from inventory.models import InventoryItem, ProductVariant, StockCounter
+from productsupplier.models import SupplierProduct
+from .models import PurchaseOrder, PurchaseOrderLine
+
+ReorderLine = namedtuple('ReorderLine', [
+    'product_variant_id', 'product_name', 'barcode',
+    'on_hand', 'incoming', 'min_stock', 'max_stock',
+    'quantity', 'supplier_product_id', 'unit_cost',
+])
+DraftOrder = namedtuple('DraftOrder', ['supplier_id', 'supplier_name', 'lines', 'total'])
+ReorderProposal = namedtuple('ReorderProposal', ['orders', 'unsourced'])
+
+# A proposal is built once per run and paged from the cache; a new visit starts a new run
+PROPOSAL_CACHE_TIMEOUT = 10 * 60
+_RUN_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+def _counter_total(statuses):
+    totals = StockCounter.objects.filter(
+        product_variant=OuterRef('pk'), status__in=statuses,
+    ).order_by().values('product_variant').annotate(units=Sum('quantity')).values('units')
+    return Coalesce(Subquery(totals, output_field=IntegerField()), 0)
+
+
+def _on_order_total():
+    # Units on open purchase orders that have not been received yet
+    totals = PurchaseOrderLine.objects.filter(
+        product_variant=OuterRef('pk'),
+        quantity_received__lt=F('quantity'),
+        order__status__in=PurchaseOrder.OPEN_STATUSES,
+    ).order_by().values('product_variant').annotate(
+        units=Sum(F('quantity') - F('quantity_received'))
+    ).values('units')
+    return Coalesce(Subquery(totals, output_field=IntegerField()), 0)
+
+
+def variants_to_reorder():
+    """
+    Variants at or below their product's min_stock, counting stock on order.
+
+    One query over the catalog: on-hand and incoming units come from the
+    stock counters and open purchase order lines, and the order-up-to level is max_stock (or min_stock
+    when max_stock was left lower). Thresholds apply to each variant.
+    """
+    return ProductVariant.objects.filter(
+        product__min_stock__gt=0,
+    ).annotate(
+        on_hand=_counter_total(InventoryItem.IN_STOCK_STATUSES),
+        incoming=_counter_total(InventoryItem.INCOMING_STATUSES) + _on_order_total(),
+        target=Greatest('product__max_stock', 'product__min_stock'),
+    ).filter(
+        on_hand__lte=F('product__min_stock') - F('incoming'),
+    ).annotate(
+        shortfall=F('target') - F('on_hand') - F('incoming'),
+    )
+
+
+def best_offers(variants):
+    """
+    The best-scoring active offer for each variant in `variants`.
+
+    Ties on score go to the cheaper offer. PostgreSQL picks one row per
+    variant with DISTINCT ON; other backends use a correlated subquery
+    over the (product_variant, is_active, cost) index.
+    """
+    ranking = (F('score__overall_score').desc(nulls_last=True), 'cost', 'pk')
+    offers = SupplierProduct.objects.filter(
+        is_active=True, product_variant__in=variants.values('pk'),
+    )
+    if connection.vendor == 'postgresql':
+        offers = offers.order_by('product_variant_id', *ranking).distinct('product_variant_id')
+    else:
+        best = SupplierProduct.objects.filter(
+            product_variant=OuterRef('product_variant'), is_active=True,
+        ).order_by(*ranking).values('pk')[:1]
+        offers = offers.filter(pk=Subquery(best)).order_by()
+    return offers.values_list(
+        'product_variant_id', 'pk', 'supplier_id', 'supplier__name', 'cost', 'min_order_quantity',
+    )
+
+
+def build_reorder_proposal():
+    """
+    Draft one purchase order per supplier for everything below minimum stock.
+
+    Runs two queries whatever the catalog size: the variants that need
+    stock and the best offer for each of them. Quantities are rounded up to
+    the offer's minimum order quantity; variants without an active offer
+    are returned in `unsourced`.
+    """
+    offers = {row[0]: row[1:] for row in best_offers(variants_to_reorder()).iterator()}
+    variants = variants_to_reorder().values_list(
+        'pk', 'product__name', 'barcode', 'on_hand', 'incoming',
+        'product__min_stock', 'product__max_stock', 'shortfall',
+    ).order_by('product__name', 'pk')
+
+    by_supplier, unsourced = {}, []
+    for pk, name, barcode, on_hand, incoming, min_stock, max_stock, shortfall in variants.iterator():
+        offer = offers.get(pk)
+        if offer is None:
+            unsourced.append(ReorderLine(
+                pk, name, barcode, on_hand, incoming, min_stock, max_stock, shortfall, None, None))
+            continue
+        offer_id, supplier_id, supplier_name, cost, min_order_quantity = offer
+        line = ReorderLine(
+            pk, name, barcode, on_hand, incoming, min_stock, max_stock,
+            max(shortfall, min_order_quantity), offer_id, cost,
+        )
+        by_supplier.setdefault((supplier_name, supplier_id), []).append(line)
+
+    orders = [
+        DraftOrder(supplier_id, supplier_name, lines,
+                   sum((line.unit_cost * line.quantity for line in lines), Decimal('0')))
+        for (supplier_name, supplier_id), lines in sorted(by_supplier.items())
+    ]
+    return ReorderProposal(orders, unsourced)
+
+
+def reorder_run(run=None):
+    """
+    (run id, ReorderProposal) for the paged automatic order view.
+
+    The proposal cached under `run` is returned while it lives; a missing,
+    expired or malformed run builds a fresh proposal under a new id.
+    """
+    proposal = cache.get(f'reorder-run:{run}') if run and _RUN_ID.match(run) else None
+    if proposal is None:
+        run, proposal = uuid.uuid4().hex, build_reorder_proposal()
+        cache.set(f'reorder-run:{run}', proposal, PROPOSAL_CACHE_TIMEOUT)
+    return run, proposal
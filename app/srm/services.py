@@ -1,28 +1,59 @@
 from .models import Supplier
-from django.db.models import Max,Min
+from django.db.models import DecimalField, ExpressionWrapper, F, FloatField, Max, Min, Value
+from django.db.models.functions import Cast, Round
 
-def calculate_scores():
+# core.recompute kind and the key that stands for "every supplier"
+SUPPLIER_SCORES = 'supplier_scores'
+ALL_SUPPLIERS = '*'
+
+def supplier_score_bounds():
+    """Min/max of the inputs every supplier score is normalised against"""
     result=Supplier.objects.aggregate(
             max_credit=Max('credit_days'),
             min_credit=Min('credit_days'),
             max_delivery_cost=Max('delivery_cost'),
             min_delivery_cost=Min('delivery_cost'))
+    return (
+        result["min_credit"] or 0,
+        result["max_credit"] or 0,
+        result["min_delivery_cost"] or 0,
+        result["max_delivery_cost"] or 0,
+    )
 
-    maximum_credit=result["max_credit"] or 0
-    minimum_credit=result["min_credit"] or 0
-    delta_credit=maximum_credit-minimum_credit or 1
+def _scaled(field, minimum, delta):
+    # (value - min) / delta * 4, always in floating point
+    return ExpressionWrapper(
+        (F(field) - Value(minimum)) * Value(4.0 / delta),
+        output_field=FloatField())
+
+def _rounded(expression):
+    # PostgreSQL only has ROUND(numeric, int), so round through a decimal
+    return Round(Cast(expression, DecimalField(max_digits=12, decimal_places=6)), 2)
 
-    maximum_delivery=result["max_delivery_cost"] or 0
-    minimum_delivery=result["min_delivery_cost"] or 0
+def calculate_scores(bounds=None, supplier_ids=None):
+    """
+    Rescore suppliers with one UPDATE statement.
+
+    Pass `supplier_ids` to rescore only those rows when the bounds are known
+    to be unchanged; otherwise every supplier is rewritten.
+    """
+    if bounds is None:
+        bounds = supplier_score_bounds()
+    minimum_credit, maximum_credit, minimum_delivery, maximum_delivery = bounds
+    delta_credit=maximum_credit-minimum_credit or 1
     delta_delivery=maximum_delivery-minimum_delivery or 1
 
     suppliers=Supplier.objects.all()
+    if supplier_ids is not None:
+        suppliers=suppliers.filter(pk__in=supplier_ids)
 
-    for s in suppliers:
-        credit_score = 1 + ((s.credit_days - minimum_credit)/ delta_credit)*4
-        s.credit_score = round(credit_score,2)
-
-        delivery_score= 5 - ((s.delivery_cost - minimum_delivery)/ delta_delivery)*4
-        s.cost_delivery_score = round(delivery_score,2)
+    return suppliers.update(
+        credit_score=_rounded(Value(1.0) + _scaled('credit_days', minimum_credit, delta_credit)),
+        cost_delivery_score=_rounded(Value(5.0) - _scaled('delivery_cost', minimum_delivery, delta_delivery)),
+    )
 
-    Supplier.objects.bulk_update(suppliers, ['credit_score','cost_delivery_score'])
+def rescore_suppliers(keys):
+    """core.recompute handler: keys are supplier ids or ALL_SUPPLIERS"""
+    if ALL_SUPPLIERS in keys:
+        return calculate_scores()
+    return calculate_scores(supplier_ids=[int(key) for key in keys])
@@ -1,6 +1,17 @@
 # srm/handlers.py
 
-from ..services import calculate_scores
+from core import recompute
+from ..services import ALL_SUPPLIERS, SUPPLIER_SCORES, supplier_score_bounds
 
-def recalculate_supplier_score(sender, instance, **kwargs):
-    calculate_scores()
+def remember_score_bounds(sender, instance, **kwargs):
+    # Bounds before the write, compared after it to decide how much to rescore
+    instance._score_bounds = supplier_score_bounds()
+
+def recalculate_supplier_score(sender, instance, deleted=False, **kwargs):
+    previous_bounds = getattr(instance, '_score_bounds', None)
+    if previous_bounds is not None and supplier_score_bounds() == previous_bounds:
+        # Bounds did not move: only the changed supplier's own scores are stale
+        if not deleted:
+            recompute.schedule(SUPPLIER_SCORES, instance.pk)
+    else:
+        recompute.schedule(SUPPLIER_SCORES, ALL_SUPPLIERS)
@@ -1,14 +1,22 @@
 # srm/signals.py
 
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
 from django.dispatch import receiver
 from ..models import Supplier
-from .handlers import recalculate_supplier_score
+from .handlers import remember_score_bounds, recalculate_supplier_score
+
+@receiver(pre_save, sender=Supplier)
+def on_supplier_saving(sender, instance, **kwargs):
+    remember_score_bounds(sender, instance, **kwargs)
 
 @receiver(post_save, sender=Supplier)
 def on_supplier_saved(sender, instance, **kwargs):
     recalculate_supplier_score(sender, instance, **kwargs)
 
+@receiver(pre_delete, sender=Supplier)
+def on_supplier_deleting(sender, instance, **kwargs):
+    remember_score_bounds(sender, instance, **kwargs)
+
 @receiver(post_delete, sender=Supplier)
 def on_supplier_deleted(sender, instance, **kwargs):
-    recalculate_supplier_score(sender, instance, **kwargs)
+    recalculate_supplier_score(sender, instance, deleted=True, **kwargs)
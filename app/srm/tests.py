@@ -1,5 +1,20 @@
+from decimal import Decimal
+from django.core.exceptions import ValidationError
+from unittest import mock
+from django.core.cache import cache
 from django.test import TestCase
-from srm.models import Supplier
+from django.db import connection
+from django.db.models import F
+from django.urls import reverse
+from django.test.utils import CaptureQueriesContext
+from srm.models import PurchaseOrder, Supplier
+from srm.purchasing import OrderLine, create_purchase_order, outstanding_by_supplier, receive_purchase_order
+from core import recompute
+from core.models import RecomputeTask
+from srm.services import ALL_SUPPLIERS, SUPPLIER_SCORES, calculate_scores
+from srm.reorder import build_reorder_proposal
+from inventory.models import Product, ProductVariant, StockCounter
+from productsupplier.models import SupplierProduct, SupplierProductScore
 
 class SupplierModelsTest(TestCase):
 
@@ -15,4 +30,230 @@ class SupplierModelsTest(TestCase):
         self.assertEqual(supplier.credit_score,7.0)
         self.assertEqual(supplier.cost_delivery_score,9.0)
 
+class SupplierScoringTest(TestCase):
 
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cheap = Supplier.objects.create(name="Cheap", credit_days=0, delivery_cost=10.0)
+            self.middle = Supplier.objects.create(name="Middle", credit_days=15, delivery_cost=55.0)
+            self.generous = Supplier.objects.create(name="Generous", credit_days=30, delivery_cost=100.0)
+        recompute.drain()
+
+    def _queued_keys(self):
+        return set(RecomputeTask.objects.filter(kind=SUPPLIER_SCORES).values_list('key', flat=True))
+
+    def _scores(self, supplier):
+        supplier.refresh_from_db()
+        return supplier.credit_score, supplier.cost_delivery_score
+
+    def test_scores_are_normalised_between_bounds(self):
+        self.assertEqual(self._scores(self.cheap), (1.0, 5.0))
+        self.assertEqual(self._scores(self.middle), (3.0, 3.0))
+        self.assertEqual(self._scores(self.generous), (5.0, 1.0))
+
+    def test_calculate_scores_is_a_single_update(self):
+        with CaptureQueriesContext(connection) as ctx:
+            calculate_scores()
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(len(ctx.captured_queries), 2)  # bounds aggregate + update
+
+    def test_change_inside_bounds_only_rescores_that_supplier(self):
+        self.middle.credit_days = 20
+        with self.captureOnCommitCallbacks(execute=True):
+            self.middle.save()
+        self.assertEqual(self._queued_keys(), {str(self.middle.pk)})
+
+        with CaptureQueriesContext(connection) as ctx:
+            recompute.drain()
+        updates = [q['sql'] for q in ctx.captured_queries
+                   if q['sql'].startswith('UPDATE') and 'ROUND' in q['sql']]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('IN (%d)' % self.middle.pk, updates[0])
+        self.assertEqual(self._scores(self.middle)[0], round(1 + 20 / 30 * 4, 2))
+
+    def test_change_of_bounds_rescores_everyone(self):
+        self.generous.credit_days = 60
+        with self.captureOnCommitCallbacks(execute=True):
+            self.generous.save()
+        self.assertEqual(self._queued_keys(), {ALL_SUPPLIERS})
+        recompute.drain()
+        self.assertEqual(self._scores(self.middle)[0], 2.0)
+
+    def test_delete_of_bound_supplier_rescores_everyone(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.generous.delete()
+        recompute.drain()
+        self.assertEqual(self._scores(self.middle), (5.0, 1.0))
+
+    def test_scores_are_not_recomputed_inside_the_request(self):
+        self.middle.refresh_from_db()
+        self.middle.credit_days = 25
+        self.middle.save()
+        self.assertEqual(self._scores(self.middle)[0], 3.0)
+        self.assertFalse(RecomputeTask.objects.exists())  # queued only after commit
+
+class ReorderProposalTest(TestCase):
+
+    def setUp(self):
+        self.cheap = Supplier.objects.create(name="Cheap")
+        self.dear = Supplier.objects.create(name="Dear")
+        self.nails = self._variant("Clavos", "RP1", min_stock=10, max_stock=50)
+        self.screws = self._variant("Tornillos", "RP2", min_stock=10, max_stock=40)
+        self.glue = self._variant("Pegamento", "RP3", min_stock=5, max_stock=20)
+        self.paint = self._variant("Pintura", "RP4", min_stock=5, max_stock=20)
+        SupplierProduct.objects.bulk_create([
+            SupplierProduct(product_variant=self.nails, supplier=self.cheap, cost=Decimal("1.00")),
+            SupplierProduct(product_variant=self.nails, supplier=self.dear, cost=Decimal("3.00")),
+            SupplierProduct(product_variant=self.screws, supplier=self.dear, cost=Decimal("2.00"), min_order_quantity=100),
+            SupplierProduct(product_variant=self.glue, supplier=self.cheap, cost=Decimal("4.00")),
+        ])
+        SupplierProductScore.rescore_all()
+        StockCounter.apply({
+            (self.nails.pk, 'ready_for_sale'): 4,
+            (self.screws.pk, 'ready_for_sale'): 2,
+            (self.screws.pk, 'ordered'): 3,
+            (self.glue.pk, 'ready_for_sale'): 30,
+        })
+
+    def _variant(self, name, barcode, **stock_levels):
+        product = Product.objects.create(name=name, price=1, **stock_levels)
+        return ProductVariant.objects.create(product=product, barcode=barcode)
+
+    def _lines(self, proposal):
+        return {line.product_variant_id: (order.supplier_name, line.quantity)
+                for order in proposal.orders for line in order.lines}
+
+    def test_orders_up_to_max_from_best_scored_offer(self):
+        lines = self._lines(build_reorder_proposal())
+        self.assertEqual(lines[self.nails.pk], ("Cheap", 46))
+
+    def test_incoming_stock_reduces_need_and_moq_rounds_up(self):
+        lines = self._lines(build_reorder_proposal())
+        self.assertEqual(lines[self.screws.pk], ("Dear", 100))
+
+    def test_variants_above_minimum_are_skipped(self):
+        self.assertNotIn(self.glue.pk, self._lines(build_reorder_proposal()))
+
+    def test_variants_without_offers_are_unsourced(self):
+        proposal = build_reorder_proposal()
+        self.assertEqual([line.product_variant_id for line in proposal.unsourced], [self.paint.pk])
+
+    def test_one_draft_per_supplier_with_totals(self):
+        orders = build_reorder_proposal().orders
+        self.assertEqual([(o.supplier_name, o.total) for o in orders],
+                         [("Cheap", Decimal("46.00")), ("Dear", Decimal("200.00"))])
+
+    def test_query_count_does_not_grow_with_catalog(self):
+        for n in range(20):
+            variant = self._variant(f"Extra {n}", f"RPX{n}", min_stock=3, max_stock=6)
+            SupplierProduct.objects.create(product_variant=variant, supplier=self.cheap, cost=Decimal("1.00"))
+        with self.assertNumQueries(2):
+            build_reorder_proposal()
+
+    def test_view_renders_paginated_proposal(self):
+        response = self.client.get(reverse('orderauto'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Clavos")
+        self.assertEqual(len(response.context['orders']), 2)
+
+    def test_pages_of_a_run_reuse_its_proposal(self):
+        cache.clear()
+        run = self.client.get(reverse('orderauto')).context['run']
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('orderauto'), {'run': run, 'page': 2})
+        self.assertEqual(response.context['run'], run)
+        # An unknown run starts over with a fresh proposal
+        response = self.client.get(reverse('orderauto'), {'run': 'x' * 32})
+        self.assertNotEqual(response.context['run'], run)
+
+    def test_unsourced_variants_are_paginated(self):
+        for n in range(5):
+            self._variant(f"Sin oferta {n}", f"RPU{n}", min_stock=3, max_stock=6)
+        with mock.patch('srm.views.UNSOURCED_PAGE_SIZE', 2):
+            response = self.client.get(reverse('orderauto'), {'unsourced_page': 2})
+        unsourced = response.context['unsourced']
+        self.assertEqual((unsourced.paginator.count, len(unsourced.object_list)), (6, 2))
+        self.assertContains(response, "Sin proveedor activo (6)")
+
+
+class PurchaseOrderTest(TestCase):
+
+    def setUp(self):
+        self.supplier = Supplier.objects.create(name="Ferretera")
+        self.other = Supplier.objects.create(name="Otra")
+        product = Product.objects.create(name="Brocas", price=1)
+        self.variants = ProductVariant.objects.bulk_create([
+            ProductVariant(product=product, barcode=f"PO{n}") for n in range(40)
+        ])
+
+    def _order(self, supplier=None, quantity=2, variants=None):
+        return create_purchase_order(supplier or self.supplier, [
+            OrderLine(v.pk, quantity, Decimal("5.00")) for v in (variants or self.variants)
+        ])
+
+    def test_lines_are_bulk_inserted(self):
+        with self.assertNumQueries(5):  # savepoint, order, reference, lines, release
+            order = self._order()
+        self.assertEqual(order.lines.count(), 40)
+        self.assertEqual(order.reference, f"PO-{order.pk:06d}")
+
+    def test_receive_everything_outstanding(self):
+        order = self._order()
+        items = receive_purchase_order(order)
+        self.assertEqual(len(items), 80)
+        self.assertTrue(all(item.purchase_order_reference == order.reference for item in items))
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'received')
+        self.assertFalse(order.lines.filter(quantity_received__lt=F('quantity')).exists())
+
+    def test_partial_receipt_is_capped_per_line(self):
+        order = self._order()
+        first, second = self.variants[:2]
+        items = receive_purchase_order(order, {first.pk: 1, second.pk: 99})
+        self.assertEqual(len(items), 3)
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'partial')
+        received = dict(order.lines.values_list('product_variant_id', 'quantity_received'))
+        self.assertEqual((received[first.pk], received[second.pk]), (1, 2))
+
+    def test_receiving_a_closed_order_fails(self):
+        order = self._order()
+        receive_purchase_order(order)
+        with self.assertRaises(ValidationError):
+            receive_purchase_order(order)
+
+    def test_receiving_query_count_does_not_grow_with_lines(self):
+        small, large = self._order(variants=self.variants[:2]), self._order(self.other)
+        with CaptureQueriesContext(connection) as small_ctx:
+            receive_purchase_order(small)
+        with CaptureQueriesContext(connection) as large_ctx:
+            receive_purchase_order(large)
+        # Only the batched item/log inserts scale with the number of units
+        inserts = lambda ctx: [q for q in ctx.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(small_ctx.captured_queries) - len(inserts(small_ctx)),
+                         len(large_ctx.captured_queries) - len(inserts(large_ctx)))
+
+    def test_outstanding_by_supplier_is_one_query(self):
+        self._order()
+        self._order(self.other, quantity=3, variants=self.variants[:5])
+        receive_purchase_order(PurchaseOrder.objects.get(supplier=self.other), {self.variants[0].pk: 3})
+        with self.assertNumQueries(1):
+            rows = list(outstanding_by_supplier())
+        self.assertEqual(
+            [(r['order__supplier__name'], r['lines'], r['units'], r['value']) for r in rows],
+            [("Ferretera", 40, 80, Decimal("400.00")), ("Otra", 4, 12, Decimal("60.00"))],
+        )
+
+    def test_open_orders_count_as_incoming_for_reorder(self):
+        product = Product.objects.create(name="Lijas", price=1, min_stock=5, max_stock=10)
+        variant = ProductVariant.objects.create(product=product, barcode="POLIJA")
+        SupplierProduct.objects.create(product_variant=variant, supplier=self.supplier, cost=Decimal("1.00"))
+        create_purchase_order(self.supplier, [OrderLine(variant.pk, 6, Decimal("1.00"))])
+        lines = [line.product_variant_id for order in build_reorder_proposal().orders for line in order.lines]
+        self.assertNotIn(variant.pk, lines)
+
+    def test_outstanding_view(self):
+        self._order()
+        response = self.client.get(reverse('order_outstanding'))
+        self.assertContains(response, "Ferretera")
@@ -4,4 +4,5 @@ from . import views
 urlpatterns = [
     path("order/", views.orderMainMenu, name="orderMainMenu"),
     path("order/auto/", views.orderauto, name="orderauto"),
+    path("order/outstanding/", views.order_outstanding, name="order_outstanding"),
 ]
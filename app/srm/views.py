@@ -1,16 +1,46 @@
 # srm/views.py
 
+from itertools import groupby
+from django.core.paginator import Paginator
 from django.shortcuts import render
+from .purchasing import outstanding_by_supplier
+from .reorder import reorder_run
+
+# Proposal lines per page; a full catalog run can propose tens of thousands
+REORDER_PAGE_SIZE = 100
+# Variants without an active offer, listed per page under the proposal
+UNSOURCED_PAGE_SIZE = 100
 
 def orderMainMenu(request):
     modules = [
         {"name": "Orden Automatica", "url": "auto/", "icon": "fas fa-shopping-cart"},
         {"name": "Orden Manual", "url": "/compras/", "icon": "fas fa-store"},
+        {"name": "Pendientes", "url": "outstanding/", "icon": "fas fa-truck"},
         {"name": "Historial", "url": "/clientes/", "icon": "fas fa-user-friends"},
         {"name": "Ultima", "url": "/reportes/", "icon": "fas fa-chart-bar"},
     ]
     return render(request, "orders.html", {"modules": modules})
 
 def orderauto(request):
-    return render(request, "ordersAuto.html")
+    # Pages of one run share a proposal instead of rebuilding it for each page
+    run, proposal = reorder_run(request.GET.get('run'))
+    rows = [(order, line) for order in proposal.orders for line in order.lines]
+    page = Paginator(rows, REORDER_PAGE_SIZE).get_page(request.GET.get('page'))
+
+    # Regroup only the current page so each table section is one supplier
+    sections = [
+        (order, [line for _, line in group])
+        for order, group in groupby(page.object_list, key=lambda row: row[0])
+    ]
+    return render(request, "ordersAuto.html", {
+        "orders": proposal.orders,
+        "unsourced": Paginator(proposal.unsourced, UNSOURCED_PAGE_SIZE).get_page(
+            request.GET.get('unsourced_page')),
+        "sections": sections,
+        "page_obj": page,
+        "run": run,
+    })
 
+def order_outstanding(request):
+    """What each supplier still owes on open purchase orders"""
+    return render(request, "ordersOutstanding.html", {"suppliers": outstanding_by_supplier()})